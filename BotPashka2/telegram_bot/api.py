@@ -1,17 +1,86 @@
-import asyncio
+import functools
+import hashlib
+import json
 import logging
-import sqlite3
-from fastapi import FastAPI, HTTPException, logger
-from fastapi.responses import JSONResponse
+import os
+from fastapi import FastAPI, HTTPException, Request, logger
+from fastapi.responses import JSONResponse, Response
 
-from scraper.scraper_contacts import get_contacts_from_db, run_contacts_scraper
-from scraper.scraper_price import get_prices_from_db, init_db, run_price_scraper
-from scraper.scraper_recomendation import get_recommendations_from_db, run_recommendation_scraper
-from scraper.scraper_working_hours import get_schedule_from_db, run_working_hours_scraper
+from http_client import HttpClient
+from scraper.db_operations import AsyncDatabaseExecutor, DatabaseManager
+from scraper.pipeline import ScrapePipeline
+from scraper.scheduler import ScraperScheduler
+from scraper import scraper_contacts, scraper_price, scraper_recomendation, scraper_working_hours
+from scraper.scraper_contacts import get_contacts_from_db
+from scraper.scraper_price import get_prices_from_db, get_prices_by_specialty_from_db, get_specialties_from_db
+from scraper.scraper_recomendation import get_recommendations_from_db
+from scraper.scraper_working_hours import get_schedule_from_db
 
 app = FastAPI()
 logger = logging.getLogger(__name__)
 
+# Все обращения к SQLite выполняются в отдельном пуле потоков, а не в цикле событий
+db_executor = AsyncDatabaseExecutor(max_workers=int(os.environ.get("API_DB_WORKERS", "4")))
+
+# Интервалы принудительного обновления наборов данных (секунды)
+REFRESH_INTERVALS = {
+    "contacts": int(os.environ.get("API_REFRESH_CONTACTS", "86400")),
+    "price": int(os.environ.get("API_REFRESH_PRICE", "86400")),
+    "recomendation": int(os.environ.get("API_REFRESH_RECOMENDATION", "86400")),
+    "schedule": int(os.environ.get("API_REFRESH_SCHEDULE", "21600")),
+}
+
+# Инициализация схем всех наборов данных
+SCHEMA_INITIALIZERS = [
+    scraper_contacts.init_db,
+    scraper_price.init_db,
+    scraper_recomendation.init_db,
+    scraper_working_hours.init_db,
+]
+
+# Все скраперы скачивают страницы через один пул соединений с лимитом на хост
+scrape_pipeline = ScrapePipeline(http_client=HttpClient(
+    limit_per_host=int(os.environ.get("API_SCRAPE_LIMIT_PER_HOST", "4")),
+    timeout=float(os.environ.get("API_SCRAPE_TIMEOUT", "60")),
+))
+SCHEMA_INITIALIZERS.append(scrape_pipeline.init_db)
+
+scheduler = ScraperScheduler()
+for name in REFRESH_INTERVALS:
+    scheduler.add_job(name, functools.partial(scrape_pipeline.run_source, name), REFRESH_INTERVALS[name])
+
+
+def data_pending_response(dataset: str) -> JSONResponse:
+    """Ответ для пустой таблицы: данные загружаются в фоне."""
+    scheduler.trigger(dataset)
+    return JSONResponse(
+        status_code=503,
+        content={"status": "pending", "message": "Данные загружаются, повторите запрос позже"},
+        headers={"Retry-After": "30"}
+    )
+
+
+@app.on_event("startup")
+async def startup():
+    """Создает схемы всех баз один раз и запускает планировщик обновления данных."""
+    for init_schema in SCHEMA_INITIALIZERS:
+        if not await db_executor.run(init_schema):
+            logger.error(f"Ошибка инициализации схемы: {init_schema.__module__}")
+    scheduler.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await scheduler.stop()
+    await scrape_pipeline.close()
+    db_executor.shutdown()
+
+
+@app.get("/scraper/status")
+async def scraper_status():
+    """Состояние фонового обновления: длительность, результат и ошибки последних запусков."""
+    return {"jobs": scheduler.status(), "pipeline": scrape_pipeline.stats()}
+
 
 @app.get("/review")
 async def review():
@@ -22,189 +91,186 @@ async def review():
         }
     )
 
-def get_db_connection():
-    conn = sqlite3.connect('data_base/FAQ.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+def etag_response(request: Request, payload: dict) -> Response:
+    """Возвращает JSON с ETag по полю data; при совпадении If-None-Match отвечает 304."""
+    digest = hashlib.sha1(json.dumps(payload["data"], ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+    etag = f'"{digest}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(content=payload, headers={"ETag": etag})
+
+FAQ_DB_PATH = os.path.join(os.path.dirname(__file__), "data_base", "FAQ.db")
+faq_db = DatabaseManager(FAQ_DB_PATH)
 
 @app.get("/faq")
 async def get_all_questions():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, question FROM faqs")
-    questions = cursor.fetchall()
-    conn.close()
-    return [dict(question) for question in questions]
+    questions = await db_executor.run(faq_db.fetch_all, "SELECT id, question FROM faqs")
+    return [{"id": item[0], "question": item[1]} for item in questions]
 
 @app.get("/faq/{faq_id}")
 async def get_answer(faq_id: int):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT question, answer FROM faqs WHERE id = ?", (faq_id,))
-    faq = cursor.fetchone()
-    conn.close()
+    faq = await db_executor.run(faq_db.fetch_one, "SELECT question, answer FROM faqs WHERE id = ?", (faq_id,))
     if faq is None:
         return JSONResponse(status_code=404, content={"message": "FAQ not found"})
-    return dict(faq)
+    return {"question": faq[0], "answer": faq[1]}
 
 @app.get("/schedule")
-async def schedule():
+async def schedule(request: Request):
     """
-    Получает расписание работы клиники либо из базы данных, либо запускает скрапер для получения данных.
+    Получает расписание работы клиники из базы данных, которую обновляет фоновая задача.
     """
     try:
         logger.info("Запрос расписания через API")
-        
-        # Инициализируем БД
-        if not init_db():
-            logger.error("Ошибка инициализации БД")
-            raise HTTPException(status_code=500, detail="Ошибка инициализации базы данных")
-        
-        # Пытаемся получить данные из БД
-        schedule_data = await asyncio.to_thread(get_schedule_from_db)
+        schedule_data = await db_executor.run(get_schedule_from_db)
         logger.info(f"Данные из БД: {schedule_data}")
-        
-        # Если в БД нет данных, запускаем скрапер
-        if not schedule_data or not schedule_data[0][0]:
-            logger.info("В базе данных нет данных, запускаем скрапер...")
-            if await asyncio.to_thread(run_working_hours_scraper):
-                schedule_data = await asyncio.to_thread(get_schedule_from_db)
-                logger.info(f"Данные после скрапера: {schedule_data}")
-            else:
-                logger.error("Не удалось получить данные через скрапер")
-                raise HTTPException(status_code=500, detail="Не удалось получить данные через скрапер")
-        
-        # Преобразуем данные
-        result = schedule_data[0][0] if schedule_data and schedule_data[0][0] else ""
-        logger.info(f"Возвращаемые данные: {result}")
-        
-        return {
-            "status": "success",
-            "data": result,
-            "count": 1 if result else 0,
-            "source": "database" if schedule_data and schedule_data[0][0] else "scraper"
-        }
-        
     except Exception as e:
         logger.error(f"Ошибка при получении расписания: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
+
+    # Если в БД нет данных, скрапер запускается в фоне
+    if not schedule_data or not schedule_data[0][0]:
+        logger.info("В базе данных нет расписания, запрошено фоновое обновление")
+        return data_pending_response("schedule")
+
+    result = schedule_data[0][0]
+    return etag_response(request, {
+        "status": "success",
+        "data": result,
+        "count": 1,
+        "source": "database"
+    })
     
 @app.get("/contacts")
-async def contacts():
+async def contacts(request: Request):
     """
-    Получает список контактов (адресов) либо из базы данных, либо запускает скрапер для получения данных.
+    Получает список контактов (адресов) из базы данных, которую обновляет фоновая задача.
     """
     try:
-        # Инициализируем БД (если еще не создана)
-        if not init_db():
-            raise HTTPException(status_code=500, detail="Ошибка инициализации базы данных")
-        
-        # Пытаемся получить данные из БД
-        contacts = get_contacts_from_db()
-        
-        # Если в БД нет данных, запускаем скрапер
-        if not contacts:
-            logger.info("В базе данных нет данных, запускаем скрапер...")
-            if run_contacts_scraper():
-                contacts = get_contacts_from_db()
-            else:
-                raise HTTPException(status_code=500, detail="Не удалось получить данные через скрапер")
-        
-        # Преобразуем данные в удобный для API формат
-        result = [address[0] for address in contacts] if contacts else []
-        
-        return {
-            "status": "success",
-            "data": result,
-            "count": len(result),
-            "source": "database" if contacts else "scraper"
-        }
-        
+        contacts = await db_executor.run(get_contacts_from_db)
     except Exception as e:
         logger.error(f"Ошибка при получении контактов: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
 
+    if not contacts:
+        logger.info("В базе данных нет контактов, запрошено фоновое обновление")
+        return data_pending_response("contacts")
+
+    # Преобразуем данные в удобный для API формат
+    result = [address[0] for address in contacts]
+    return etag_response(request, {
+        "status": "success",
+        "data": result,
+        "count": len(result),
+        "source": "database"
+    })
+
+def service_to_dict(item) -> dict:
+    """Преобразует строку таблицы services в словарь ответа API."""
+    return {
+        "service_name": item[0],
+        "doctor_specialty": item[1],
+        "appointment_type": item[2],
+        "price": item[3],
+        "specialty_name": item[4],
+        "specialty_slug": item[5]
+    }
+
 @app.get("/price")
-async def price():
+async def price(request: Request):
     """
-    Получает список услуг либо из базы данных, либо запускает скрапер для получения данных.
+    Получает список услуг из базы данных, которую обновляет фоновая задача.
     """
     try:
-        # Инициализируем БД (если еще не создана)
-        if not init_db():
-            raise HTTPException(status_code=500, detail="Ошибка инициализации базы данных")
-        
-        # Пытаемся получить данные из БД
-        prices = get_prices_from_db()
-        
-        # Если в БД нет данных, запускаем скрапер
-        if not prices:
-            logger.info("В базе данных нет данных, запускаем скрапер...")
-            if run_price_scraper():
-                prices = get_prices_from_db()
-            else:
-                raise HTTPException(status_code=500, detail="Не удалось получить данные через скрапер")
-        
-        # Преобразуем данные в удобный для API формат
-        result = [
-            {
-                "service_name": item[0],
-                "doctor_specialty": item[1],
-                "appointment_type": item[2],
-                "price": item[3]
-            }
-            for item in prices
-        ]
-        
-        return {
-            "status": "success",
-            "data": result,
-            "count": len(result),
-            "source": "database" if prices else "scraper"
-        }
-        
+        prices = await db_executor.run(get_prices_from_db)
     except Exception as e:
         logger.error(f"Ошибка при получении данных: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
 
+    if not prices:
+        logger.info("В базе данных нет услуг, запрошено фоновое обновление")
+        return data_pending_response("price")
 
-@app.get("/recomendation")
-async def recomendation():
+    # Преобразуем данные в удобный для API формат
+    result = [service_to_dict(item) for item in prices]
+    return etag_response(request, {
+        "status": "success",
+        "data": result,
+        "count": len(result),
+        "source": "database"
+    })
+
+
+@app.get("/price/specialties")
+async def price_specialties(request: Request):
     """
-    Получает список рекомендаций либо из базы данных, либо запускает скрапер для получения данных.
+    Возвращает список специальностей врачей с количеством услуг.
     """
     try:
-        # Инициализируем БД (если еще не создана)
-        if not init_db():
-            raise HTTPException(status_code=500, detail="Ошибка инициализации базы данных")
-        
-        # Пытаемся получить данные из БД
-        recommendations = get_recommendations_from_db()
-        
-        # Если в БД нет данных, запускаем скрапер
-        if not recommendations:
-            logger.info("В базе данных нет данных, запускаем скрапер...")
-            if run_recommendation_scraper():
-                recommendations = get_recommendations_from_db()
-            else:
-                raise HTTPException(status_code=500, detail="Не удалось получить данные через скрапер")
-        
-        # Преобразуем данные в удобный для API формат
+        specialties = await db_executor.run(get_specialties_from_db)
         result = [
-            {
-                "analysis_type": item[0],
-                "recommendations": item[1].split('\n')  # Разбиваем на список
-            }
-            for item in recommendations
+            {"specialty_slug": item[0], "specialty_name": item[1], "count": item[2]}
+            for item in specialties
         ]
-        
-        return {
+        return etag_response(request, {
             "status": "success",
             "data": result,
             "count": len(result),
-            "source": "database" if recommendations else "scraper"
-        }
-        
+            "source": "database"
+        })
+
+    except Exception as e:
+        logger.error(f"Ошибка при получении специальностей: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
+
+@app.get("/price/specialty/{slug}")
+async def price_by_specialty(slug: str, request: Request):
+    """
+    Возвращает услуги одной специальности по её slug.
+    """
+    try:
+        services = await db_executor.run(get_prices_by_specialty_from_db, slug)
+    except Exception as e:
+        logger.error(f"Ошибка при получении услуг специальности {slug}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
+
+    if not services:
+        return JSONResponse(status_code=404, content={"message": "Specialty not found"})
+
+    result = [service_to_dict(item) for item in services]
+    return etag_response(request, {
+        "status": "success",
+        "data": result,
+        "count": len(result),
+        "source": "database"
+    })
+
+
+@app.get("/recomendation")
+async def recomendation(request: Request):
+    """
+    Получает список рекомендаций из базы данных, которую обновляет фоновая задача.
+    """
+    try:
+        recommendations = await db_executor.run(get_recommendations_from_db)
     except Exception as e:
         logger.error(f"Ошибка при получении рекомендаций: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
+
+    if not recommendations:
+        logger.info("В базе данных нет рекомендаций, запрошено фоновое обновление")
+        return data_pending_response("recomendation")
+
+    # Преобразуем данные в удобный для API формат
+    result = [
+        {
+            "analysis_type": item[0],
+            "recommendations": item[1].split('\n')  # Разбиваем на список
+        }
+        for item in recommendations
+    ]
+    return etag_response(request, {
+        "status": "success",
+        "data": result,
+        "count": len(result),
+        "source": "database"
+    })
@@ -0,0 +1,92 @@
+"""Бенчмарк времени импорта модулей бота с сохранением истории замеров.
+
+Каждый модуль импортируется в отдельном процессе интерпретатора (холодный старт),
+берется минимум из нескольких повторов. Результат дописывается в файл истории
+и сравнивается с предыдущим замером.
+
+Запуск:
+    python benchmark_imports.py --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+MODULES = [
+    "config",
+    "http_client",
+    "handlers",
+    "integration.gigachat",
+    "integration.reminder",
+    "integration.deepgram",
+    "integration.analysis",
+    "integration.pdf_extraction",
+    "tg_bot",
+]
+HISTORY_PATH = os.path.join(os.path.dirname(__file__), "data_base", "import_times.jsonl")
+
+MEASURE_CODE = "import time, importlib; t = time.perf_counter(); importlib.import_module({module!r}); print(time.perf_counter() - t)"
+
+
+def measure(module: str, repeat: int) -> float:
+    """Возвращает минимальное время импорта модуля в свежем процессе (секунды)."""
+    timings = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", MEASURE_CODE.format(module=module)],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Не удалось импортировать {module}: {result.stderr.strip().splitlines()[-1]}")
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return min(timings)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def load_previous(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        lines = [line for line in f if line.strip()]
+    return json.loads(lines[-1])["modules"] if lines else {}
+
+
+def main(repeat: int, history_path: str) -> None:
+    previous = load_previous(history_path)
+    results = {}
+    for module in MODULES:
+        try:
+            results[module] = measure(module, repeat)
+        except RuntimeError as e:
+            print(e)
+            continue
+        change = ""
+        if module in previous:
+            change = f"  ({(results[module] - previous[module]) * 1000:+.0f} мс)"
+        print(f"{module:<30} {results[module] * 1000:8.0f} мс{change}")
+
+    record = {"timestamp": datetime.now().isoformat(timespec="seconds"), "revision": git_revision(), "modules": results}
+    os.makedirs(os.path.dirname(history_path), exist_ok=True)
+    with open(history_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замер времени импорта модулей бота")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--history", default=HISTORY_PATH)
+    args = parser.parse_args()
+    started = time.perf_counter()
+    main(args.repeat, args.history)
+    print(f"Замер занял {time.perf_counter() - started:.1f} с")
@@ -7,4 +7,61 @@ DEEPGRAM_API_KEY = "f074cb6a75557e6213b58a5f55ac7791987b17aa"
 
 STATE_NORMAL = 0
 STATE_AWAITING_FEEDBACK = 1
-STATE_AWAITING_REMINDER = 2
\ No newline at end of file
+STATE_AWAITING_REMINDER = 2
+
+# Локальный классификатор намерений: минимальная уверенность для ответа без GigaChat
+INTENT_CONFIDENCE_THRESHOLD = 0.75
+INTENT_EXAMPLES_PATH = "data_base/intent_examples.json"
+
+# Пул клиентов GigaChat
+GIGACHAT_POOL_SIZE = 2
+GIGACHAT_MAX_CONCURRENCY = 8
+GIGACHAT_REQUEST_TIMEOUT = 60.0
+
+# Кэш ответов GigaChat на свободные вопросы
+RESPONSE_CACHE_DB = "data_base/response_cache.db"
+RESPONSE_CACHE_TTL = 7 * 24 * 3600
+RESPONSE_CACHE_SIZE = 1000
+# Нечеткий поиск для медицинских ответов отключен: близкие по написанию вопросы
+# («12 недель» и «32 недели») требуют разных ответов
+RESPONSE_CACHE_SIMILARITY = None
+
+# Кэш результатов определения намерений
+INTENT_CACHE_TTL = 24 * 3600
+INTENT_CACHE_SIZE = 5000
+
+# Как долго бот использует снимок данных API без условного запроса (секунды)
+SNAPSHOT_REFRESH_INTERVAL = 60.0
+
+# Общий HTTP-клиент бота
+HTTP_POOL_LIMIT = 100
+HTTP_POOL_LIMIT_PER_HOST = 10
+HTTP_TIMEOUT = 30.0
+HTTP_RETRIES = 2
+
+# Разбор PDF с анализами в пуле процессов
+ANALYSIS_PDF_WORKERS = 2
+ANALYSIS_MAX_PDF_PAGES = 20
+ANALYSIS_MAX_PDF_BYTES = 10 * 1024 * 1024
+ANALYSIS_PDF_TIMEOUT = 30.0
+
+# Кэш результатов анализа PDF (по file_unique_id и хэшу содержимого)
+ANALYSIS_CACHE_DB = "data_base/analysis_cache.db"
+ANALYSIS_CACHE_TTL = 7 * 24 * 3600
+
+# Напоминания: база и допустимое опоздание пропущенных при перезапуске уведомлений (секунды)
+REMINDER_DB = "data_base/reminders.db"
+REMINDER_CATCHUP_WINDOW = 12 * 3600
+
+# Очередь отправки сообщений: лимиты Telegram (сообщений в секунду) и повторы
+DELIVERY_GLOBAL_RATE = 30.0
+DELIVERY_CHAT_RATE = 1.0
+DELIVERY_MAX_IN_FLIGHT = 10
+DELIVERY_MAX_RETRIES = 3
+
+# Хранилище состояний пользователей: "memory", "sqlite" или "redis"
+STATE_BACKEND = "memory"
+STATE_TTL = 24 * 3600
+STATE_MAX_USERS = 100_000
+STATE_DB = "data_base/user_states.db"
+STATE_REDIS_URL = "redis://localhost:6379/0"
\ No newline at end of file
@@ -0,0 +1,314 @@
+import asyncio
+import functools
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from aiogram import Bot
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Очереди приоритетов: меньшее значение отправляется раньше
+PRIORITY_REMINDER = 0
+PRIORITY_BULK = 1
+LANE_NAMES = {PRIORITY_REMINDER: "reminder", PRIORITY_BULK: "bulk"}
+
+# Как часто удаляются корзины чатов, в которые давно ничего не отправлялось
+_PRUNE_EVERY = 1000
+
+
+class TokenBucket:
+    """Корзина токенов: rate токенов в секунду, не больше capacity подряд."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Через сколько секунд будет доступен токен (0 — доступен сейчас)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+@dataclass
+class OutgoingMessage:
+    """Сообщение в очереди отправки."""
+    chat_id: int
+    text: str
+    kwargs: Dict[str, Any]
+    priority: int
+    seq: int
+    enqueued_at: float
+    future: asyncio.Future
+    attempts: int = 0
+
+
+@dataclass
+class _LaneStats:
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    total_lag: float = 0.0
+    max_lag: float = 0.0
+
+
+class DeliveryQueue:
+    """Очередь исходящих сообщений Telegram с ограничением скорости.
+
+    Одна задача-диспетчер выбирает сообщения по приоритету и отправляет их не
+    чаще global_rate в секунду всего и chat_rate в секунду в один чат. Сообщение
+    в чат, исчерпавший лимит, откладывается и не задерживает остальные. На
+    TelegramRetryAfter отправка приостанавливается на указанное Telegram время,
+    сетевые ошибки повторяются с экспоненциальной задержкой.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        chat_burst: float = 1.0,
+        max_in_flight: int = 10,
+        max_retries: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Инициализация очереди.
+
+        Args:
+            bot (Bot): Бот, через который отправляются сообщения.
+            global_rate (float): Максимум сообщений в секунду для всего бота.
+            chat_rate (float): Максимум сообщений в секунду в один чат.
+            chat_burst (float): Сколько сообщений в один чат можно отправить подряд.
+            max_in_flight (int): Максимум одновременных запросов к Telegram.
+            max_retries (int): Повторы при сетевых ошибках.
+            clock (Callable): Монотонные часы.
+        """
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.clock = clock
+        self._global = TokenBucket(global_rate, 1.0, clock())
+        self._chats: Dict[int, TokenBucket] = {}
+        self._ready: List[Tuple[int, int, OutgoingMessage]] = []
+        self._delayed: List[Tuple[float, int, int, OutgoingMessage]] = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._wakeup = asyncio.Event()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self._dispatched = 0
+        self.pauses = 0
+        self._lanes: Dict[int, _LaneStats] = {priority: _LaneStats() for priority in LANE_NAMES}
+
+    def start(self) -> None:
+        """Запускает диспетчер отправки."""
+        if self._task is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._task = asyncio.create_task(self._run())
+
+    def enqueue(self, chat_id: int, text: str, priority: int = PRIORITY_BULK, **kwargs) -> asyncio.Future:
+        """Ставит сообщение в очередь и возвращает future с результатом отправки."""
+        item = OutgoingMessage(
+            chat_id=chat_id, text=text, kwargs=kwargs, priority=priority, seq=next(self._seq),
+            enqueued_at=self.clock(), future=asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(self._ready, (item.priority, item.seq, item))
+        self._wakeup.set()
+        return item.future
+
+    async def send_message(self, chat_id: int, text: str, priority: int = PRIORITY_BULK, **kwargs) -> Any:
+        """Отправляет сообщение через очередь и ждет результата.
+
+        Raises:
+            Exception: Ошибка Telegram, если сообщение не удалось доставить.
+        """
+        return await self.enqueue(chat_id, text, priority, **kwargs)
+
+    async def broadcast(self, chat_ids: Iterable[int], text: str, priority: int = PRIORITY_BULK, **kwargs) -> int:
+        """Рассылает сообщение по чатам и возвращает количество доставленных."""
+        results = await asyncio.gather(
+            *(self.enqueue(chat_id, text, priority, **kwargs) for chat_id in chat_ids), return_exceptions=True
+        )
+        return sum(not isinstance(result, BaseException) for result in results)
+
+    def _chat_bucket(self, chat_id: int, now: float) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst, now)
+        return bucket
+
+    def _defer(self, item: OutgoingMessage, not_before: float) -> None:
+        heapq.heappush(self._delayed, (not_before, item.priority, item.seq, item))
+
+    def _promote(self, now: float) -> None:
+        """Возвращает в очередь готовых сообщения, время которых наступило."""
+        while self._delayed and self._delayed[0][0] <= now:
+            _, priority, seq, item = heapq.heappop(self._delayed)
+            heapq.heappush(self._ready, (priority, seq, item))
+
+    def _prune(self, now: float) -> None:
+        """Удаляет полные корзины: для них нет разницы с новой."""
+        for chat_id in [chat_id for chat_id, bucket in self._chats.items() if bucket.is_full(now)]:
+            del self._chats[chat_id]
+
+    async def _run(self) -> None:
+        while True:
+            now = self.clock()
+            self._promote(now)
+            if now < self._paused_until:
+                await self._sleep(self._paused_until - now)
+                continue
+            if not self._ready:
+                await self._sleep(self._delayed[0][0] - now if self._delayed else None)
+                continue
+            wait = self._global.delay(now)
+            if wait > 0:
+                await self._sleep(wait)
+                continue
+
+            _, _, item = heapq.heappop(self._ready)
+            bucket = self._chat_bucket(item.chat_id, now)
+            chat_wait = bucket.delay(now)
+            if chat_wait > 0:
+                self._defer(item, now + chat_wait)
+                continue
+            self._global.consume(now)
+            bucket.consume(now)
+
+            try:
+                await self._semaphore.acquire()
+            except asyncio.CancelledError:
+                # Остановка во время ожидания слота: close() отменит future вместе с очередью
+                heapq.heappush(self._ready, (item.priority, item.seq, item))
+                raise
+            task = asyncio.create_task(self._deliver(item))
+            self._in_flight.add(task)
+            task.add_done_callback(functools.partial(self._on_delivered, item))
+
+            self._dispatched += 1
+            if self._dispatched % _PRUNE_EVERY == 0:
+                self._prune(now)
+
+    async def _sleep(self, timeout: Optional[float]) -> None:
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _deliver(self, item: OutgoingMessage) -> None:
+        lane = self._lanes.setdefault(item.priority, _LaneStats())
+        try:
+            result = await self.bot.send_message(item.chat_id, item.text, **item.kwargs)
+        except TelegramRetryAfter as e:
+            # Лимит Telegram общий для бота: приостанавливаем всю очередь
+            now = self.clock()
+            self._paused_until = max(self._paused_until, now + e.retry_after)
+            self.pauses += 1
+            lane.retried += 1
+            logger.warning(f"Telegram ограничил отправку на {e.retry_after} с (чат {item.chat_id})")
+            self._defer(item, now + e.retry_after)
+            self._wakeup.set()
+        except TelegramNetworkError as e:
+            item.attempts += 1
+            if item.attempts > self.max_retries:
+                self._fail(item, lane, e)
+            else:
+                lane.retried += 1
+                self._defer(item, self.clock() + 2 ** (item.attempts - 1))
+                self._wakeup.set()
+        except Exception as e:
+            self._fail(item, lane, e)
+        else:
+            lag = self.clock() - item.enqueued_at
+            lane.sent += 1
+            lane.total_lag += lag
+            lane.max_lag = max(lane.max_lag, lag)
+            if not item.future.done():
+                item.future.set_result(result)
+        finally:
+            self._semaphore.release()
+
+    def _on_delivered(self, item: OutgoingMessage, task: asyncio.Task) -> None:
+        self._in_flight.discard(task)
+        # close() отменяет зависшие отправки, в том числе еще не начавшиеся: тогда
+        # _deliver не выполнялся и future ожидающего send_message иначе не завершится
+        if task.cancelled() and not item.future.done():
+            item.future.cancel()
+
+    @staticmethod
+    def _fail(item: OutgoingMessage, lane: _LaneStats, error: Exception) -> None:
+        lane.failed += 1
+        logger.error(f"Не удалось отправить сообщение в чат {item.chat_id}: {error}")
+        if not item.future.done():
+            item.future.set_exception(error)
+
+    @property
+    def pending(self) -> int:
+        return len(self._ready) + len(self._delayed) + len(self._in_flight)
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Дожидается отправки оставшихся сообщений не дольше timeout и останавливает очередь."""
+        if self._task is None:
+            return
+        deadline = self.clock() + timeout
+        while self.pending and self.clock() < deadline:
+            await asyncio.sleep(0.05)
+        self._task.cancel()
+        for task in list(self._in_flight):
+            task.cancel()
+        await asyncio.gather(self._task, *self._in_flight, return_exceptions=True)
+        self._task = None
+        for _, _, item in self._ready:
+            item.future.cancel()
+        for *_, item in self._delayed:
+            item.future.cancel()
+        if self._ready or self._delayed:
+            logger.warning(f"Очередь отправки остановлена, не отправлено сообщений: {len(self._ready) + len(self._delayed)}")
+        self._ready.clear()
+        self._delayed.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Возвращает длину очереди, паузы Telegram и задержку доставки по приоритетам."""
+        queued: Dict[int, int] = {}
+        for _, _, item in self._ready:
+            queued[item.priority] = queued.get(item.priority, 0) + 1
+        for *_, item in self._delayed:
+            queued[item.priority] = queued.get(item.priority, 0) + 1
+        return {
+            "in_flight": len(self._in_flight),
+            "pauses": self.pauses,
+            "lanes": {
+                LANE_NAMES.get(priority, str(priority)): {
+                    "queued": queued.get(priority, 0),
+                    "sent": lane.sent,
+                    "failed": lane.failed,
+                    "retried": lane.retried,
+                    "avg_lag": lane.total_lag / lane.sent if lane.sent else 0.0,
+                    "max_lag": lane.max_lag,
+                }
+                for priority, lane in self._lanes.items()
+            },
+        }
@@ -3,24 +3,36 @@ from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram import types, Dispatcher
 from aiogram.filters import BaseFilter
 from integration.reminder import ReminderService
-import aiohttp
-import requests
-import asyncio
 import logging
-import re
 import os
 import io
+from typing import Optional
 from slugify import slugify
-from unidecode import unidecode
 from authorization import add_user, init_db, get_user_id
-from QRcode import generate_qr
 from interfaces import ChatService, IntentDetector, StateManager, SpeechRecognitionService, AnalysisProcessorService, MessageHandler
-from config import STATE_NORMAL, STATE_AWAITING_FEEDBACK, STATE_AWAITING_REMINDER
+from scraper.specialty import clean_specialty, specialty_slug
+from config import (
+    STATE_NORMAL, STATE_AWAITING_FEEDBACK, STATE_AWAITING_REMINDER, SNAPSHOT_REFRESH_INTERVAL, ANALYSIS_MAX_PDF_BYTES
+)
+from http_client import HttpClient, HttpError
+from snapshot_cache import SnapshotCache
 
 
 API_URL = os.environ.get("API_URL", "http://127.0.0.1:8000")
 logger = logging.getLogger(__name__)
 
+# Общий HTTP-клиент; tg_bot подменяет его через setup_http_client
+http_client = HttpClient()
+# Снимки справочных данных API; представления регистрируются в конце модуля
+snapshot_cache = SnapshotCache(API_URL, http_client, refresh_interval=SNAPSHOT_REFRESH_INTERVAL)
+
+
+def setup_http_client(client: HttpClient) -> None:
+    """Передает обработчикам общий HTTP-клиент приложения."""
+    global http_client
+    http_client = client
+    snapshot_cache.http_client = client
+
 # Фильтры для обработки сообщений
 class TextMessageFilter(BaseFilter):
     """Фильтр для текстовых сообщений, исключающий команды."""
@@ -70,10 +82,10 @@ class TextMessageHandler(MessageHandler):
         """Обрабатывает текстовые сообщения с распознаванием всех намерений."""
         user_id = message.from_user.id
         text = message.text.lower()
-        current_state = self.state_manager.get_state(user_id)
+        current_state = await self.state_manager.get_state(user_id)
 
         if current_state == STATE_AWAITING_FEEDBACK:
-            self.state_manager.set_state(user_id, STATE_NORMAL)
+            await self.state_manager.set_state(user_id, STATE_NORMAL)
             await message.reply("Спасибо за ваш отзыв! Мы его обработаем.")
             logger.info(f"Получен отзыв от пользователя {user_id}: {text}")
             return
@@ -94,9 +106,9 @@ class TextMessageHandler(MessageHandler):
         elif intent == "6":  # Рекомендации
             await recomendation_command(message)
         elif intent == "7":  # Напоминание
-            reminder_time, reminder_text, reminder_type = await self.reminder_service.parse_reminder(text)
+            reminder_time, reminder_text, reminder_type, recurrence = await self.reminder_service.parse_reminder(text)
             if reminder_time and reminder_text and reminder_type:
-                await self.reminder_service.set_reminder(user_id, reminder_time, reminder_text, reminder_type)
+                await self.reminder_service.set_reminder(user_id, reminder_time, reminder_text, reminder_type, recurrence)
                 date_str = reminder_time.strftime("%d %B в %H:%M").replace(
                     "January", "января").replace("February", "февраля").replace(
                     "March", "марта").replace("April", "апреля").replace(
@@ -104,6 +116,8 @@ class TextMessageHandler(MessageHandler):
                     "July", "июля").replace("August", "августа").replace(
                     "September", "сентября").replace("October", "октября").replace(
                     "November", "ноября").replace("December", "декабря")
+                if recurrence:
+                    date_str += f" и далее {recurrence.describe()}"
                 await message.reply(f"Хорошо, я напомню вам о том, что {reminder_text} {date_str}")
             else:
                 await message.reply("Не удалось распознать напоминание. Попробуйте ещё раз, например: 'Напомни мне 31 марта в 14:00, что мне надо выпить таблетки'")
@@ -148,7 +162,7 @@ class VoiceMessageHandler(MessageHandler):
         message.reply("Идёт обработка голосового сообщения")
 
         user_id = message.from_user.id
-        current_state = self.state_manager.get_state(user_id)
+        current_state = await self.state_manager.get_state(user_id)
         recognized_text = await self.speech_service.process_voice_message(message.bot, message.voice.file_id)
         if not recognized_text:
             await message.reply("Не удалось распознать голосовое сообщение. Пожалуйста, попробуйте еще раз.")
@@ -159,7 +173,7 @@ class VoiceMessageHandler(MessageHandler):
         logger.info(f"Распознанный текст из голосового сообщения от пользователя {user_id}: {recognized_text}")
 
         if current_state == STATE_AWAITING_FEEDBACK:
-            self.state_manager.set_state(user_id, STATE_NORMAL)
+            await self.state_manager.set_state(user_id, STATE_NORMAL)
             await message.reply("Спасибо за ваш отзыв! Мы его обработаем.")
             logger.info(f"Получен отзыв от пользователя {user_id}: {recognized_text}")
             return
@@ -180,9 +194,9 @@ class VoiceMessageHandler(MessageHandler):
         elif intent == "6":  # Рекомендации
             await recomendation_command(message)
         elif intent == "7":  # Напоминание
-            reminder_time, reminder_text, reminder_type = await self.reminder_service.parse_reminder(recognized_text)
+            reminder_time, reminder_text, reminder_type, recurrence = await self.reminder_service.parse_reminder(recognized_text)
             if reminder_time and reminder_text and reminder_type:
-                await self.reminder_service.set_reminder(user_id, reminder_time, reminder_text, reminder_type)
+                await self.reminder_service.set_reminder(user_id, reminder_time, reminder_text, reminder_type, recurrence)
                 date_str = reminder_time.strftime("%d %B в %H:%M").replace(
                     "January", "января").replace("February", "февраля").replace(
                     "March", "марта").replace("April", "апреля").replace(
@@ -190,6 +204,8 @@ class VoiceMessageHandler(MessageHandler):
                     "July", "июля").replace("August", "августа").replace(
                     "September", "сентября").replace("October", "октября").replace(
                     "November", "ноября").replace("December", "декабря")
+                if recurrence:
+                    date_str += f" и далее {recurrence.describe()}"
                 await message.reply(f"Хорошо, я напомню вам о том, что {reminder_text} {date_str}")
             else:
                 await message.reply("Не удалось распознать напоминание. Попробуйте ещё раз, например: 'Напомни мне 31 марта в 14:00, что мне надо выпить таблетки'")
@@ -236,13 +252,22 @@ class DocumentMessageHandler:
             logger.warning(f"Пользователь {message.from_user.id} отправил файл не в формате PDF")
             return
 
-        file_id = message.document.file_id
-        file = await message.bot.get_file(file_id)
-        file_path = file.file_path
-        file_data = await message.bot.download_file(file_path)
+        if message.document.file_size and message.document.file_size > ANALYSIS_MAX_PDF_BYTES:
+            await message.answer(f"Файл слишком большой. Максимальный размер — {ANALYSIS_MAX_PDF_BYTES // (1024 * 1024)} МБ.")
+            logger.warning(f"Пользователь {message.from_user.id} отправил слишком большой PDF: {message.document.file_size} байт")
+            return
+
+        # Повторно отправленный файл не скачиваем и не отправляем в GigaChat
+        file_unique_id = message.document.file_unique_id
+        result = await self.analysis_processor.get_cached_result(file_unique_id)
+        if result is None:
+            file_id = message.document.file_id
+            file = await message.bot.get_file(file_id)
+            file_path = file.file_path
+            file_data = await message.bot.download_file(file_path)
 
-        pdf_file = io.BytesIO(file_data.read())
-        result = await self.analysis_processor.process_analysis(pdf_file)
+            pdf_file = io.BytesIO(file_data.read())
+            result = await self.analysis_processor.process_analysis(pdf_file, file_unique_id)
 
         if result:
             # Подготовим строку с результатами в более удобном формате
@@ -298,79 +323,87 @@ async def help_command(message: types.Message):
 
 Также я умею выполнять эти действия не только по конкретной команде, но и если ты попросишь меня сделать это простыми словами. А еще я могу распознать команды в голосовых сообщениях. Что ты хочешь узнать? ☺️''')
 
+def build_schedule_view(data) -> Optional[str]:
+    """Форматирует ответ /schedule в текст сообщения. Пустая строка — расписания нет."""
+    if not isinstance(data, dict) or 'data' not in data:
+        return None
+
+    schedule_text = data['data']
+    if not schedule_text:
+        return ""
+
+    schedule_lines = schedule_text.split('\n')
+    return "🕒 Режим работы клиники:\n\n" + "\n".join(
+        f"• {line}" for line in schedule_lines
+    )
+
 async def schedule_command(message: types.Message):
     try:
-        # Получаем данные о расписании из API
-        response = await asyncio.to_thread(requests.get, f"{API_URL}/schedule")
-        response.raise_for_status()
-        
-        data = response.json()
-        
+        # Получаем расписание из снимка данных API
+        snapshot = await snapshot_cache.get("schedule")
+        formatted_schedule = snapshot.view
+
         # Проверяем структуру ответа
-        if not isinstance(data, dict) or 'data' not in data:
+        if formatted_schedule is None:
             await message.reply("Информация о расписании временно недоступна")
             return
-            
-        schedule_text = data['data']
-        
-        if not schedule_text:
+
+        if not formatted_schedule:
             await message.reply("Расписание работы не найдено")
             return
-            
-        # Форматируем вывод
-        schedule_lines = schedule_text.split('\n')
-        formatted_schedule = "🕒 Режим работы клиники:\n\n" + "\n".join(
-            f"• {line}" for line in schedule_lines
-        )
-        
+
         await message.reply(formatted_schedule)
             
-    except requests.exceptions.RequestException as e:
+    except HttpError as e:
         logger.error(f"Ошибка при запросе расписания: {e}")
         await message.reply("⚠️ Не удалось загрузить расписание. Проблема с соединением.")
     except Exception as e:
         logger.error(f"Неожиданная ошибка: {e}", exc_info=True)
         await message.reply("❌ Произошла ошибка при обработке расписания")
 
+def build_contacts_view(data) -> Optional[str]:
+    """Форматирует ответ /contacts в текст сообщения. Пустая строка — контактов нет."""
+    if not isinstance(data, dict) or 'data' not in data:
+        return None
+
+    contacts = data['data']
+    if not contacts:
+        return ""
+
+    formatted_contacts = []
+    for i, contact in enumerate(contacts, 1):
+        # Разделяем адрес и телефон
+        parts = contact.split(" Телефон")
+        address = parts[0].replace("Адрес: ", "").strip()
+        phone = "Телефон" + parts[1] if len(parts) > 1 else ""
+
+        # Форматируем каждый контакт
+        contact_entry = f"{i}. {address}"
+        if phone:
+            contact_entry += f"\n   {phone}"
+
+        formatted_contacts.append(contact_entry)
+
+    return "📌 Контакты клиники:\n\n" + "\n\n".join(formatted_contacts)
+
 async def contacts_command(message: types.Message):
     try:
-        # Получаем данные о контактах из API
-        response = await asyncio.to_thread(requests.get, f"{API_URL}/contacts")
-        response.raise_for_status()
-        
-        data = response.json()
-        
+        # Получаем контакты из снимка данных API
+        snapshot = await snapshot_cache.get("contacts")
+        contacts_message = snapshot.view
+
         # Проверяем структуру ответа
-        if not isinstance(data, dict) or 'data' not in data:
+        if contacts_message is None:
             await message.reply("Информация о контактах временно недоступна")
             return
-            
-        contacts = data['data']
-        
-        if not contacts:
+
+        if not contacts_message:
             await message.reply("Контактные данные не найдены")
             return
-            
-        # Форматируем вывод
-        formatted_contacts = []
-        for i, contact in enumerate(contacts, 1):
-            # Разделяем адрес и телефон
-            parts = contact.split(" Телефон")
-            address = parts[0].replace("Адрес: ", "").strip()
-            phone = "Телефон" + parts[1] if len(parts) > 1 else ""
-            
-            # Форматируем каждый контакт
-            contact_entry = f"{i}. {address}"
-            if phone:
-                contact_entry += f"\n   {phone}"
-            
-            formatted_contacts.append(contact_entry)
-        
-        # Отправляем сообщение с контактами
-        contacts_message = "📌 Контакты клиники:\n\n" + "\n\n".join(formatted_contacts)
+
         await message.reply(contacts_message)
             
-    except requests.exceptions.RequestException as e:
+    except HttpError as e:
         logger.error(f"Ошибка при запросе контактов: {e}")
         await message.reply("⚠️ Не удалось загрузить контакты. Проблема с соединением.")
     except Exception as e:
@@ -384,70 +417,52 @@ async def unknown_command(message: types.Message):
 Но ты всегда можешь позвонить в клинику и там тебе обязательно подскажут!
 Вот номер для связи 8 (3022) 73-70-73🐢''')
 
-def clean_specialty(specialty):
-    """Удаляет стоп-слова, исправляет падеж и обрабатывает слова через дефис."""
-    if not specialty:
-        return ""
-    
-    stop_words = {"врача", "первичный", "для", "на", "по", "в", "и", "из", "с", 
-                 "медицинский", "доктор", "специалист", "прием", "осмотр", "консультация"}
-    
-    # Удаляем "врача-" в начале
-    specialty = re.sub(r'^врача[- ]?', '', specialty, flags=re.IGNORECASE)
-    
-    # Разбиваем на слова (включая слова через '-')
-    words = re.split(r'[\s\-]+', specialty.strip().lower())
-
-    # Фильтруем стоп-слова и убираем "а" на конце каждого слова
-    cleaned_words = []
-    for word in words:
-        if word not in stop_words:
-            # Удаляем окончание "а" только у существительных женского рода
-            if word.endswith('а') and len(word) > 1:
-                word = word[:-1]
-            cleaned_words.append(word.capitalize())
-
-    # Восстанавливаем дефисы между составными словами
-    result = " ".join(cleaned_words)
-    return result.replace(" - ", "-").title()
+def build_price_view(data) -> Optional[dict]:
+    """Группирует услуги по специальностям и строит индекс slug → услуги и клавиатуру врачей.
+
+    API отдает уже очищенное название специальности и slug; для старых ответов
+    без этих полей они вычисляются на месте.
+    """
+    if not isinstance(data, dict) or 'data' not in data:
+        return None
+
+    # Группируем услуги по врачам
+    specialties = {}
+    for service in data['data']:
+        name = service.get('specialty_name')
+        if name is None:
+            name = clean_specialty(service['doctor_specialty'])
+        slug = service.get('specialty_slug')
+        if slug is None:
+            slug = specialty_slug(name)
+        specialties.setdefault(slug, (name, []))[1].append(service)
+
+    # Создаем inline-клавиатуру с slug в callback_data
+    keyboard = InlineKeyboardBuilder()
+    for slug, (name, _) in sorted(specialties.items(), key=lambda item: item[1][0]):
+        keyboard.button(text=name, callback_data=f"specialty_{slug}")
+    keyboard.adjust(2)
+
+    return {
+        "specialties": specialties,
+        "keyboard": keyboard.as_markup() if specialties else None,
+    }
 
 async def price_command(message: types.Message):
     try:
-        # Получаем данные о ценах из API
-        response = await asyncio.to_thread(requests.get, f"{API_URL}/price")
-        response.raise_for_status()
-        data = response.json()
+        # Получаем данные о ценах из снимка данных API
+        snapshot = await snapshot_cache.get("price")
+        view = snapshot.view
 
-        if not isinstance(data, dict) or 'data' not in data:
+        if view is None:
             await message.reply("Информация о ценах временно недоступна")
             return
 
-        services = data['data']
-        if not services:
+        if not view["keyboard"]:
             await message.reply("Данные о ценах не найдены")
             return
 
-        # Группируем услуги по врачам
-        categories = {}
-        for service in services:
-            specialty = service['doctor_specialty']
-            cleaned_specialty = clean_specialty(specialty)
-            
-            if cleaned_specialty not in categories:
-                categories[cleaned_specialty] = []
-            categories[cleaned_specialty].append(service)
-
-        # Создаем inline-клавиатуру
-        keyboard = InlineKeyboardBuilder()
-        for specialty in sorted(categories.keys()):
-            # Используем очищенное название для отображения
-            display_name = specialty
-            callback_data = f"specialty_{slugify(specialty, separator='_')}"
-            
-            keyboard.button(text=display_name, callback_data=callback_data)
-
-        keyboard.adjust(2)
-        await message.reply("Выбери врача:", reply_markup=keyboard.as_markup())
+        await message.reply("Выбери врача:", reply_markup=view["keyboard"])
 
     except Exception as e:
         logger.error(f"Ошибка в price_command: {e}", exc_info=True)
@@ -461,24 +476,15 @@ async def process_specialty_selection(callback_query: types.CallbackQuery):
         # Получаем slug из callback_data
         specialty_slug = callback_query.data.replace("specialty_", "")
         
-        # Получаем все услуги
-        response = await asyncio.to_thread(requests.get, f"{API_URL}/price")
-        response.raise_for_status()
-        services = response.json()['data']
-
-        # Находим все услуги, где slug совпадает
-        found_services = []
-        for service in services:
-            if specialty_slug == slugify(clean_specialty(service['doctor_specialty']), separator='_'):
-                found_services.append(service)
+        # Находим услуги врача по индексу снимка
+        snapshot = await snapshot_cache.get("price")
+        view = snapshot.view
+        specialty_name, found_services = (view or {}).get("specialties", {}).get(specialty_slug, (None, []))
 
         if not found_services:
             await callback_query.answer("Нет доступных услуг для этого врача.")
             return
 
-        # Получаем очищенное название специальности для заголовка
-        specialty_name = clean_specialty(found_services[0]['doctor_specialty'])
-
         # Форматируем вывод
         message_text = f"<b>🏥 {specialty_name}</b>\n\n"
         for service in found_services:
@@ -498,43 +504,49 @@ async def process_specialty_selection(callback_query: types.CallbackQuery):
 
 # Санитизация callback_data с кодированием
 
+def build_recomendation_view(data) -> Optional[dict]:
+    """Строит индекс slug → рекомендации и клавиатуру анализов."""
+    if not isinstance(data, dict) or 'data' not in data:
+        return None
+
+    analyses = {}
+    keyboard = InlineKeyboardBuilder()
+    for item in data['data']:
+        analysis_type = item['analysis_type']
+        # Используем slugify для создания callback_data
+        slug = slugify(analysis_type, separator='_')
+        analyses.setdefault(slug, item)
+        keyboard.button(text=analysis_type, callback_data=f"rec_{slug}")
+
+    # Располагаем кнопки по 2 в ряду
+    keyboard.adjust(2)
+
+    return {
+        "analyses": analyses,
+        "keyboard": keyboard.as_markup() if analyses else None,
+    }
+
 async def recomendation_command(message: types.Message):
     try:
-        # Получаем данные о рекомендациях из API
-        response = await asyncio.to_thread(requests.get, f"{API_URL}/recomendation")
-        response.raise_for_status()
-        
-        data = response.json()
+        # Получаем данные о рекомендациях из снимка данных API
+        snapshot = await snapshot_cache.get("recomendation")
+        view = snapshot.view
         
         # Проверяем структуру ответа
-        if not isinstance(data, dict) or 'data' not in data:
+        if view is None:
             await message.reply("Информация о рекомендациях временно недоступна")
             return
             
-        recommendations = data['data']
-        
-        if not recommendations:
+        if not view["keyboard"]:
             await message.reply("Рекомендации не найдены")
             return
-            
-        # Создаем клавиатуру с кнопками для каждого анализа
-        keyboard = InlineKeyboardBuilder()
-        
-        for item in recommendations:
-            analysis_type = item['analysis_type']
-            # Используем slugify для создания callback_data
-            callback_data = f"rec_{slugify(analysis_type, separator='_')}"
-            keyboard.button(text=analysis_type, callback_data=callback_data)
-        
-        # Располагаем кнопки по 2 в ряду
-        keyboard.adjust(2)
         
         await message.answer(
             "📋 Выбери анализ, чтобы увидеть рекомендации по подготовке:",
-            reply_markup=keyboard.as_markup()
+            reply_markup=view["keyboard"]
         )
             
-    except requests.exceptions.RequestException as e:
+    except HttpError as e:
         logger.error(f"Ошибка при запросе к API: {e}")
         await message.reply("⚠️ Не удалось загрузить рекомендации. Проблема с соединением.")
     except Exception as e:
@@ -548,17 +560,10 @@ async def recomendation_callback_handler(callback_query: types.CallbackQuery):
         # Получаем slug анализа из callback_data
         analysis_slug = callback_query.data.replace("rec_", "")
         
-        # Получаем все рекомендации
-        response = await asyncio.to_thread(requests.get, f"{API_URL}/recomendation")
-        response.raise_for_status()
-        recommendations = response.json()['data']
-        
-        # Находим нужный анализ
-        selected_analysis = None
-        for item in recommendations:
-            if analysis_slug == slugify(item['analysis_type'], separator='_'):
-                selected_analysis = item
-                break
+        # Находим нужный анализ по индексу снимка
+        snapshot = await snapshot_cache.get("recomendation")
+        view = snapshot.view
+        selected_analysis = (view or {}).get("analyses", {}).get(analysis_slug)
         
         if not selected_analysis:
             await callback_query.message.answer("Рекомендации для этого анализа не найдены")
@@ -583,51 +588,46 @@ async def recomendation_callback_handler(callback_query: types.CallbackQuery):
 async def faq_command(message: types.Message):
     try:
         # Получаем вопросы с API
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{API_URL}/faq") as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    await message.answer("⚠️ Ошибка при загрузке вопросов. Попробуйте позже.")
-                    return
-
-                questions = await response.json()
-
-                # Валидация и подготовка кнопок
-                buttons = []
-                for item in questions:
-                    try:
-                        if isinstance(item, dict) and 'id' in item and 'question' in item:
-                            buttons.append(
-                                types.InlineKeyboardButton(
-                                    text=item['question'][:64],  # Ограничение длины
-                                    callback_data=f"faq_{item['id']}"
-                                )
-                            )
-                    except Exception:
-                        continue  # Пропускаем некорректные вопросы
-
-                # Гарантированно правильное создание клавиатуры
-                if not buttons:
-                    await message.answer("ℹ️ Нет доступных вопросов.")
-                    return
-
-                # Создаем клавиатуру с явным указанием inline_keyboard
-                keyboard = types.InlineKeyboardMarkup(
-                    inline_keyboard=[[btn] for btn in buttons]  # Каждая кнопка в отдельном ряду
-                )
-
-                await message.answer(
-                    "📋 Выберите вопрос:",
-                    reply_markup=keyboard
-                )
+        response = await http_client.get(f"{API_URL}/faq")
+        if response.status != 200:
+            await message.answer("⚠️ Ошибка при загрузке вопросов. Попробуйте позже.")
+            return
 
-    except Exception as e:
-        await message.answer(f"⚠️ Ошибка: {str(e)}")
+        questions = response.json()
+
+        # Валидация и подготовка кнопок
+        buttons = []
+        for item in questions:
+            try:
+                if isinstance(item, dict) and 'id' in item and 'question' in item:
+                    buttons.append(
+                        types.InlineKeyboardButton(
+                            text=item['question'][:64],  # Ограничение длины
+                            callback_data=f"faq_{item['id']}"
+                        )
+                    )
+            except Exception:
+                continue  # Пропускаем некорректные вопросы
+
+        # Гарантированно правильное создание клавиатуры
+        if not buttons:
+            await message.answer("ℹ️ Нет доступных вопросов.")
+            return
 
-    except aiohttp.ClientError as e:
+        # Создаем клавиатуру с явным указанием inline_keyboard
+        keyboard = types.InlineKeyboardMarkup(
+            inline_keyboard=[[btn] for btn in buttons]  # Каждая кнопка в отдельном ряду
+        )
+
+        await message.answer(
+            "📋 Выберите вопрос:",
+            reply_markup=keyboard
+        )
+
+    except HttpError as e:
         await message.answer(f"Ошибка подключения: {str(e)}")
     except Exception as e:
-        await message.answer(f"Неожиданная ошибка: {str(e)}")
+        await message.answer(f"⚠️ Ошибка: {str(e)}")
 
 
 async def faq_callback_handler(callback_query: types.CallbackQuery):
@@ -639,42 +639,40 @@ async def faq_callback_handler(callback_query: types.CallbackQuery):
             await callback_query.answer("Неверный формат вопроса", show_alert=True)
             return
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{API_URL}/faq/{faq_id}") as response:
-                # Проверяем статус ответа
-                if response.status != 200:
-                    error_text = await response.text()
-                    await callback_query.answer(
-                        f"Не удалось загрузить ответ (код {response.status})",
-                        show_alert=True
-                    )
-                    return
-
-                # Парсим JSON
-                try:
-                    faq = await response.json()
-                except Exception as e:
-                    await callback_query.answer("Ошибка при разборе ответа", show_alert=True)
-                    return
-
-                # Проверяем структуру ответа
-                if not isinstance(faq, dict) or 'question' not in faq or 'answer' not in faq:
-                    await callback_query.answer("Неверный формат ответа", show_alert=True)
-                    return
-
-                # Форматируем и отправляем ответ
-                answer = (
-                    f"<b>❓ Вопрос:</b>\n{faq['question']}\n\n"
-                    f"<b>💡 Ответ:</b>\n{faq['answer']}"
-                )
-                
-                try:
-                    await callback_query.message.answer(answer, parse_mode='HTML')
-                    await callback_query.answer()
-                except Exception as e:
-                    await callback_query.answer(f"Ошибка при отправке: {str(e)}", show_alert=True)
-
-    except aiohttp.ClientError as e:
+        response = await http_client.get(f"{API_URL}/faq/{faq_id}")
+        # Проверяем статус ответа
+        if response.status != 200:
+            await callback_query.answer(
+                f"Не удалось загрузить ответ (код {response.status})",
+                show_alert=True
+            )
+            return
+
+        # Парсим JSON
+        try:
+            faq = response.json()
+        except Exception as e:
+            await callback_query.answer("Ошибка при разборе ответа", show_alert=True)
+            return
+
+        # Проверяем структуру ответа
+        if not isinstance(faq, dict) or 'question' not in faq or 'answer' not in faq:
+            await callback_query.answer("Неверный формат ответа", show_alert=True)
+            return
+
+        # Форматируем и отправляем ответ
+        answer = (
+            f"<b>❓ Вопрос:</b>\n{faq['question']}\n\n"
+            f"<b>💡 Ответ:</b>\n{faq['answer']}"
+        )
+        
+        try:
+            await callback_query.message.answer(answer, parse_mode='HTML')
+            await callback_query.answer()
+        except Exception as e:
+            await callback_query.answer(f"Ошибка при отправке: {str(e)}", show_alert=True)
+
+    except HttpError as e:
         await callback_query.answer(f"Ошибка подключения: {str(e)}", show_alert=True)
     except Exception as e:
         await callback_query.answer(f"Неожиданная ошибка: {str(e)}", show_alert=True)
@@ -712,7 +710,8 @@ async def qrcode_command(message: types.Message):
     else:
         await message.reply("ℹ️ Вы уже зарегистрированы.")
 
-    # Генерация QR-кода
+    # Генерация QR-кода; модуль с qrcode нужен только этой команде
+    from QRcode import generate_qr
     qr_result = generate_qr(user_record_id)
     if qr_result is None:
         await message.reply("❌ Ошибка генерации QR-кода!")
@@ -763,3 +762,9 @@ async def operator(message: types.Message):
     except Exception as e:
         logger.error(f"Ошибка в функции problem: {e}")
         await message.reply("❌ Произошла ошибка при отправке сообщения")
+
+
+snapshot_cache.register("schedule", "/schedule", build_schedule_view)
+snapshot_cache.register("contacts", "/contacts", build_contacts_view)
+snapshot_cache.register("price", "/price", build_price_view)
+snapshot_cache.register("recomendation", "/recomendation", build_recomendation_view)
@@ -0,0 +1,211 @@
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Mapping, Optional
+from urllib.parse import urlsplit
+import aiohttp
+from multidict import CIMultiDict
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class HttpError(Exception):
+    """Ошибка HTTP-запроса: сетевой сбой, таймаут или неуспешный статус ответа."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class HttpResponse:
+    """Полностью прочитанный ответ на HTTP-запрос."""
+    status: int
+    headers: Mapping[str, str]
+    body: bytes
+    url: str
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return self.body.decode(encoding, errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            raise HttpError(f"HTTP {self.status} для {self.url}", status=self.status)
+
+
+@dataclass
+class _HostStats:
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    in_flight: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    statuses: Dict[int, int] = field(default_factory=dict)
+
+
+class HttpClient:
+    """Общий для приложения асинхронный HTTP-клиент.
+
+    Использует одну сессию aiohttp с пулом keep-alive соединений и лимитом на хост,
+    повторяет идемпотентные запросы с экспоненциальной задержкой и собирает
+    статистику задержек по каждому внешнему сервису.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 10,
+        timeout: float = 30.0,
+        keepalive_timeout: float = 30.0,
+        retries: int = 2,
+        backoff: float = 0.5,
+    ):
+        """Инициализация клиента.
+
+        Args:
+            limit (int): Максимум одновременных соединений.
+            limit_per_host (int): Максимум одновременных соединений с одним хостом.
+            timeout (float): Общий таймаут запроса в секундах.
+            keepalive_timeout (float): Сколько секунд держать простаивающее соединение.
+            retries (int): Количество повторов при сетевых ошибках и статусах 429/5xx.
+            backoff (float): Базовая задержка между повторами в секундах.
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.keepalive_timeout = keepalive_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._stats: Dict[str, _HostStats] = {}
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Возвращает сессию aiohttp, создавая её при первом обращении."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def request(self, method: str, url: str, *, retry: Optional[bool] = None, **kwargs) -> HttpResponse:
+        """Выполняет запрос и возвращает прочитанный ответ.
+
+        Args:
+            method (str): HTTP-метод.
+            url (str): Адрес запроса.
+            retry (Optional[bool]): Повторять ли запрос; по умолчанию только для идемпотентных методов.
+            **kwargs: Параметры aiohttp (headers, params, data, json, timeout).
+
+        Raises:
+            HttpError: При сетевой ошибке или таймауте после всех повторов.
+        """
+        method = method.upper()
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+        attempts = self.retries + 1 if retry else 1
+        host = urlsplit(url).netloc
+        stats = self._stats.setdefault(host, _HostStats())
+
+        for attempt in range(attempts):
+            if attempt:
+                stats.retries += 1
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+
+            stats.requests += 1
+            stats.in_flight += 1
+            started = time.perf_counter()
+            try:
+                async with self.session.request(method, url, **kwargs) as response:
+                    body = await response.read()
+                    result = HttpResponse(response.status, CIMultiDict(response.headers), body, url)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                stats.errors += 1
+                logger.warning(f"Ошибка запроса {method} к {host} (попытка {attempt + 1}/{attempts}): {e!r}")
+                if attempt + 1 == attempts:
+                    raise HttpError(f"Ошибка запроса {method} к {host}: {e!r}") from e
+                continue
+            finally:
+                elapsed = time.perf_counter() - started
+                stats.in_flight -= 1
+                stats.total_latency += elapsed
+                stats.max_latency = max(stats.max_latency, elapsed)
+
+            stats.statuses[result.status] = stats.statuses.get(result.status, 0) + 1
+            if result.status in RETRY_STATUSES and attempt + 1 < attempts:
+                logger.warning(f"{method} к {host} вернул {result.status}, повторяем запрос")
+                continue
+            return result
+
+    async def iter_chunks(self, url: str, chunk_size: int = 64 * 1024, **kwargs) -> AsyncIterator[bytes]:
+        """Потоково скачивает ответ на GET-запрос по частям, не держа его целиком в памяти.
+
+        Поток нельзя повторить, поэтому запрос выполняется без повторов.
+
+        Raises:
+            HttpError: При сетевой ошибке, таймауте или неуспешном статусе.
+        """
+        host = urlsplit(url).netloc
+        stats = self._stats.setdefault(host, _HostStats())
+        stats.requests += 1
+        stats.in_flight += 1
+        started = time.perf_counter()
+        try:
+            async with self.session.get(url, **kwargs) as response:
+                stats.statuses[response.status] = stats.statuses.get(response.status, 0) + 1
+                if response.status >= 400:
+                    raise HttpError(f"HTTP {response.status} от {host}", status=response.status)
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    yield chunk
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            stats.errors += 1
+            raise HttpError(f"Ошибка запроса GET к {host}: {e!r}") from e
+        finally:
+            elapsed = time.perf_counter() - started
+            stats.in_flight -= 1
+            stats.total_latency += elapsed
+            stats.max_latency = max(stats.max_latency, elapsed)
+
+    async def get(self, url: str, **kwargs) -> HttpResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> HttpResponse:
+        return await self.request("POST", url, **kwargs)
+
+    async def close(self) -> None:
+        """Закрывает сессию и все соединения пула."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Возвращает загрузку пула и статистику задержек по хостам."""
+        hosts = {}
+        for host, s in self._stats.items():
+            hosts[host] = {
+                "requests": s.requests,
+                "errors": s.errors,
+                "retries": s.retries,
+                "in_flight": s.in_flight,
+                "avg_latency": s.total_latency / s.requests if s.requests else 0.0,
+                "max_latency": s.max_latency,
+                "statuses": dict(s.statuses),
+            }
+        return {
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "in_flight": sum(s.in_flight for s in self._stats.values()),
+            "hosts": hosts,
+        }
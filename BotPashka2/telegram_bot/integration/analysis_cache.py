@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Union
+from interfaces import AnalysisProcessorService
+from integration.analysis import AnalysisOutcome, AnalysisProcessor
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedAnalysis:
+    """Сохраненный результат разбора PDF с анализами."""
+    content_hash: str
+    parameters: Dict[str, float]
+    result: Dict[str, str]
+    created_at: float
+
+
+class AnalysisCache:
+    """Кэш результатов анализа PDF в SQLite с TTL.
+
+    Результат хранится по хэшу содержимого файла; file_unique_id Telegram
+    ссылается на хэш, чтобы повторно отправленный файл не нужно было скачивать.
+    """
+
+    def __init__(self, db_path: str, ttl: float = 7 * 24 * 3600):
+        """Инициализация кэша.
+
+        Args:
+            db_path (str): Путь к файлу SQLite.
+            ttl (float): Время жизни записи в секундах.
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+    def _init_db(self) -> None:
+        """Создает таблицы кэша и удаляет устаревшие записи."""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_results (
+                content_hash TEXT PRIMARY KEY,
+                parameters TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """)
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_files (
+                file_unique_id TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """)
+            expired = time.time() - self.ttl
+            conn.execute("DELETE FROM analysis_results WHERE created_at < ?", (expired,))
+            conn.execute("DELETE FROM analysis_files WHERE created_at < ?", (expired,))
+
+    def get(self, file_unique_id: Optional[str] = None, content_hash: Optional[str] = None) -> Optional[CachedAnalysis]:
+        """Ищет результат по file_unique_id или по хэшу содержимого."""
+        try:
+            with self._connect() as conn:
+                if content_hash is None and file_unique_id is not None:
+                    row = conn.execute(
+                        "SELECT content_hash FROM analysis_files WHERE file_unique_id = ? AND created_at >= ?",
+                        (file_unique_id, time.time() - self.ttl)
+                    ).fetchone()
+                    content_hash = row[0] if row else None
+                row = None
+                if content_hash is not None:
+                    row = conn.execute(
+                        "SELECT parameters, result, created_at FROM analysis_results WHERE content_hash = ? AND created_at >= ?",
+                        (content_hash, time.time() - self.ttl)
+                    ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка чтения кэша анализов: {e}")
+            return None
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CachedAnalysis(content_hash, json.loads(row[0]), json.loads(row[1]), row[2])
+
+    def put(self, content_hash: str, parameters: Dict[str, float], result: Dict[str, str], file_unique_id: Optional[str] = None) -> None:
+        """Сохраняет результат и связывает с ним file_unique_id."""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO analysis_results (content_hash, parameters, result, created_at) VALUES (?, ?, ?, ?)",
+                    (content_hash, json.dumps(parameters, ensure_ascii=False), json.dumps(result, ensure_ascii=False), now)
+                )
+                if file_unique_id:
+                    self._link(conn, file_unique_id, content_hash, now)
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка записи в кэш анализов: {e}")
+
+    def link(self, file_unique_id: str, content_hash: str) -> None:
+        """Связывает новый file_unique_id с уже сохраненным результатом."""
+        try:
+            with self._connect() as conn:
+                self._link(conn, file_unique_id, content_hash, time.time())
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка записи в кэш анализов: {e}")
+
+    @staticmethod
+    def _link(conn: sqlite3.Connection, file_unique_id: str, content_hash: str, created_at: float) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO analysis_files (file_unique_id, content_hash, created_at) VALUES (?, ?, ?)",
+            (file_unique_id, content_hash, created_at)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """Возвращает статистику попаданий в кэш."""
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class CachingAnalysisProcessor(AnalysisProcessorService):
+    """Обработчик анализов, возвращающий результат повторно отправленного PDF из кэша без обращения к LLM.
+
+    Запросы к SQLite выполняются в пуле потоков. Одновременные загрузки одного и того же
+    файла (по хэшу содержимого) ждут один разбор и один запрос к GigaChat.
+    """
+
+    def __init__(self, processor: AnalysisProcessor, cache: AnalysisCache):
+        """Инициализация обработчика.
+
+        Args:
+            processor (AnalysisProcessor): Обработчик, к которому идут запросы при промахе кэша.
+            cache (AnalysisCache): Кэш результатов.
+        """
+        self.processor = processor
+        self.cache = cache
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.shared = 0
+
+    async def get_cached_result(self, file_unique_id: str) -> Optional[Dict[str, str]]:
+        """Возвращает результат для уже обработанного файла Telegram без его загрузки."""
+        cached = await asyncio.to_thread(self.cache.get, file_unique_id=file_unique_id)
+        return cached.result if cached else None
+
+    async def process_analysis(self, pdf_file: Union[str, io.BytesIO], file_unique_id: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """Возвращает результат из кэша по хэшу содержимого или обрабатывает файл."""
+        if isinstance(pdf_file, str):
+            with open(pdf_file, "rb") as f:
+                pdf_content = await asyncio.to_thread(f.read)
+        else:
+            pdf_content = pdf_file.getvalue()
+        content_hash = hashlib.sha256(pdf_content).hexdigest()
+
+        cached = await asyncio.to_thread(self.cache.get, content_hash=content_hash)
+        if cached is not None:
+            logger.debug(f"Результат анализа найден в кэше: {content_hash}")
+            if file_unique_id:
+                await asyncio.to_thread(self.cache.link, file_unique_id, content_hash)
+            return cached.result
+
+        task = self._in_flight.get(content_hash)
+        if task is None:
+            task = asyncio.create_task(self._analyze(content_hash, pdf_content, file_unique_id))
+            self._in_flight[content_hash] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(content_hash, None))
+            # shield: отмена первого запроса не прерывает разбор для остальных ожидающих
+            return (await asyncio.shield(task)).result
+
+        self.shared += 1
+        logger.debug(f"Файл {content_hash} уже обрабатывается, ждем результат")
+        outcome = await asyncio.shield(task)
+        if file_unique_id and outcome.result and outcome.from_llm:
+            await asyncio.to_thread(self.cache.link, file_unique_id, content_hash)
+        return outcome.result
+
+    async def _analyze(self, content_hash: str, pdf_content: bytes, file_unique_id: Optional[str]) -> AnalysisOutcome:
+        outcome = await self.processor.analyze(io.BytesIO(pdf_content))
+        # Кэшируем только полный ответ GigaChat, а не запасной результат сравнения
+        if outcome.result and outcome.from_llm:
+            await asyncio.to_thread(
+                self.cache.put, content_hash, outcome.parameters, outcome.result, file_unique_id
+            )
+        return outcome
@@ -1,90 +1,139 @@
+import asyncio
 import io
-import librosa
-import numpy as np
+import multiprocessing
 import wave
+from concurrent.futures import ProcessPoolExecutor
 from aiogram import Bot
 import logging
-import aiohttp
-import requests
+from typing import AsyncIterator, List, Optional, Tuple, Union
+from http_client import HttpClient, HttpError
 
 logger = logging.getLogger(__name__)
 
+# Статусы Deepgram, при которых исходный OGG перекодируется в WAV и отправляется повторно
+FALLBACK_STATUSES = {400, 415}
+
+
+def transcode_to_wav(ogg_bytes: bytes) -> bytes:
+    """Перекодирует OGG в WAV 16 кГц моно (выполняется в пуле процессов)."""
+    # librosa и numpy тяжелые: импортируем их только в процессе перекодирования
+    import librosa
+    import numpy as np
+
+    y, sr = librosa.load(io.BytesIO(ogg_bytes), sr=16000, mono=True)
+    wav_buffer = io.BytesIO()
+    with wave.open(wav_buffer, 'wb') as wav_file:
+        wav_file.setnchannels(1)  # моно
+        wav_file.setsampwidth(2)  # 16 бит
+        wav_file.setframerate(sr)  # 16000 Гц
+        wav_file.writeframes((y * 32767).astype(np.int16).tobytes())
+    return wav_buffer.getvalue()
+
+
 class DeepgramService:
-    def __init__(self, api_key: str, bot_token: str):
-        """Инициализация сервиса Deepgram с API-ключом и токеном бота."""
+    def __init__(self, api_key: str, bot_token: str, http_client: Optional[HttpClient] = None, fallback_workers: int = 1):
+        """Инициализация сервиса Deepgram с API-ключом, токеном бота и общим HTTP-клиентом.
+
+        Args:
+            fallback_workers (int): Процессы для запасного перекодирования в WAV; 0 — без перекодирования.
+        """
         self.api_key = api_key
         self.bot_token = bot_token
+        self.http_client = http_client or HttpClient()
         self.api_url = "https://api.deepgram.com/v1/listen"
+        self.fallback_workers = fallback_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
 
-    async def download_ogg(self, bot: Bot, file_id: str) -> io.BytesIO:
-        """Загрузка голосового сообщения из Telegram и сохранение в OGG."""
-        try:
-            file = await bot.get_file(file_id)
-            file_path = file.file_path
-            file_url = f"https://api.telegram.org/file/bot{self.bot_token}/{file_path}"
-
-            response = requests.get(file_url)
-            if response.status_code == 200:
-                logger.debug(f"OGG-файл скачан, размер: {len(response.content)} байт")
-                return io.BytesIO(response.content)
-            else:
-                logger.error(f"Ошибка загрузки OGG: {response.status_code}")
-                return None
-        except Exception as e:
-            logger.error(f"Ошибка при скачивании OGG: {e}")
-            return None
+    async def _file_url(self, bot: Bot, file_id: str) -> str:
+        file = await bot.get_file(file_id)
+        return f"https://api.telegram.org/file/bot{self.bot_token}/{file.file_path}"
+
+    async def _tee(self, chunks: AsyncIterator[bytes], received: List[bytes]) -> AsyncIterator[bytes]:
+        """Передает части файла дальше и запоминает их для запасного перекодирования."""
+        async for chunk in chunks:
+            received.append(chunk)
+            yield chunk
 
     async def process_voice_message(self, bot: Bot, file_id: str) -> str:
-        """Обработка голосового сообщения с конвертацией и распознаванием текста."""
+        """Обработка голосового сообщения: OGG/Opus из Telegram сразу передается в Deepgram.
+
+        Если Deepgram не принял OGG, файл перекодируется в WAV в пуле процессов.
+        """
+        received: List[bytes] = []
         try:
-            # Скачиваем OGG файл
-            ogg_data = await self.download_ogg(bot, file_id)
-            if not ogg_data:
+            file_url = await self._file_url(bot, file_id)
+            stream = self._tee(self.http_client.iter_chunks(file_url), received)
+            transcript, status = await self._recognize(stream, "audio/ogg")
+        except HttpError as e:
+            if not received:
+                logger.error(f"Ошибка при загрузке голосового сообщения: {e}")
                 return "Ошибка при загрузке файла"
-
-            # Конвертируем OGG в WAV с использованием librosa
-            y, sr = librosa.load(ogg_data, sr=16000, mono=True)  # Загружаем аудио и приводим к моно
-
-            # Сохраняем в WAV для отладки
-            wav_buffer = io.BytesIO()
-            with wave.open(wav_buffer, 'wb') as wav_file:
-                wav_file.setnchannels(1)  # моно
-                wav_file.setsampwidth(2)  # 16 бит
-                wav_file.setframerate(sr)  # 16000 Гц
-                wav_file.writeframes((y * 32767).astype(np.int16).tobytes())
-
-            wav_bytes = wav_buffer.getvalue()
-            logger.info(f"WAV-файл создан, размер: {len(wav_bytes)} байт")
-
-            # Теперь передаем распознанный WAV в Deepgram API
-            return await self.recognize_speech(wav_bytes)
+            logger.error(f"Ошибка при отправке в Deepgram: {e}")
+            return "Ошибка при отправке в Deepgram"
         except Exception as e:
             logger.error(f"Ошибка обработки голосового сообщения: {e}")
             return "Ошибка при обработке голосового сообщения"
 
-    async def recognize_speech(self, audio_data: bytes) -> str:
-        """Распознавание речи через Deepgram API."""
+        if status in FALLBACK_STATUSES and self.fallback_workers > 0 and received:
+            logger.warning(f"Deepgram не принял OGG ({status}), перекодируем в WAV")
+            try:
+                wav_bytes = await asyncio.get_running_loop().run_in_executor(
+                    self._get_executor(), transcode_to_wav, b"".join(received)
+                )
+                logger.info(f"WAV-файл создан, размер: {len(wav_bytes)} байт")
+            except Exception as e:
+                logger.error(f"Ошибка перекодирования голосового сообщения: {e}")
+                return "Ошибка при обработке голосового сообщения"
+            return await self.recognize_speech(wav_bytes)
+
+        return self._describe(transcript, status)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Возвращает пул перекодирования, создавая его при первом обращении."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.fallback_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def _recognize(self, audio_data: Union[bytes, AsyncIterator[bytes]], content_type: str) -> Tuple[Optional[str], int]:
+        """Отправляет аудио в Deepgram и возвращает текст и статус ответа."""
         headers = {
             "Authorization": f"Token {self.api_key}",
-            "Content-Type": "audio/wav",
+            "Content-Type": content_type,
         }
         params = {"model": "general", "language": "ru"}
 
+        response = await self.http_client.post(self.api_url, headers=headers, data=audio_data, params=params)
+        if response.status != 200:
+            return None, response.status
+        result = response.json()
+        transcript = result.get("results", {}).get("channels", [{}])[0].get("alternatives", [{}])[0].get("transcript")
+        return transcript, response.status
+
+    @staticmethod
+    def _describe(transcript: Optional[str], status: int) -> str:
+        """Преобразует результат распознавания в ответ сервиса."""
+        if status != 200:
+            logger.error(f"Ошибка распознавания: {status}")
+            return f"Ошибка распознавания: {status}"
+        if transcript:
+            logger.info(f"Распознанный текст: {transcript}")
+            return transcript
+        logger.warning("Текст не распознан")
+        return "Не удалось распознать текст"
+
+    async def recognize_speech(self, audio_data: bytes, content_type: str = "audio/wav") -> str:
+        """Распознавание речи через Deepgram API."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.api_url, headers=headers, data=audio_data, params=params) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        transcript = result.get("results", {}).get("channels", [{}])[0].get("alternatives", [{}])[0].get("transcript")
-                        if transcript:
-                            logger.info(f"Распознанный текст: {transcript}")
-                            return transcript
-                        else:
-                            logger.warning("Текст не распознан")
-                            return "Не удалось распознать текст"
-                    else:
-                        logger.error(f"Ошибка распознавания: {response.status}")
-                        return f"Ошибка распознавания: {response.status}"
+            transcript, status = await self._recognize(audio_data, content_type)
         except Exception as e:
             logger.error(f"Ошибка при отправке в Deepgram: {e}")
-            return "Ошибка при отправке в Deepgram"
\ No newline at end of file
+            return "Ошибка при отправке в Deepgram"
+        return self._describe(transcript, status)
+
+    def close(self) -> None:
+        """Останавливает пул перекодирования."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
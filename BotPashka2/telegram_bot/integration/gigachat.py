@@ -1,28 +1,39 @@
 # services.py
 import logging
 from typing import Optional
-import gigachat
-from gigachat.models import Chat, Messages, MessagesRole
+from gigachat.models import Messages, MessagesRole
 from interfaces import ChatService, IntentDetector, StateManager
+from integration.gigachat_pool import GigaChatClientPool
+from integration.intent_classifier import INTENT_TRIGGERS
 from config import GIGACHAT_API_KEY, STATE_NORMAL
 
 logger = logging.getLogger(__name__)
 
+GIGACHAT_ERROR_RESPONSE = "Извините, произошла ошибка при обработке запроса."
+
+INTENT_OPTIONS = "\n".join(
+    f"        {code}. {title} (триггеры: " + ", ".join(f'"{t}"' for t in triggers) + ")"
+    for code, (title, triggers) in INTENT_TRIGGERS.items()
+)
+
 class GigaChatService(ChatService):
+    def __init__(self, client_pool: Optional[GigaChatClientPool] = None):
+        """Инициализация сервиса с общим пулом клиентов GigaChat."""
+        self.client_pool = client_pool or GigaChatClientPool(GIGACHAT_API_KEY)
+
     async def get_response(self, prompt: str) -> str:
         """Отправляет запрос к GigaChat и возвращает ответ."""
         try:
-            with gigachat.GigaChat(credentials=GIGACHAT_API_KEY, verify_ssl_certs=False) as giga:
-                messages = [
-                    Messages(role=MessagesRole.SYSTEM, content="Ты полезный помощник в Telegram боте для больницы."),
-                    Messages(role=MessagesRole.USER, content=prompt)
-                ]
-                response = giga.chat(Chat(messages=messages))
-                logger.debug(f"Ответ от GigaChat: {response.choices[0].message.content}")
-                return response.choices[0].message.content
+            messages = [
+                Messages(role=MessagesRole.SYSTEM, content="Ты полезный помощник в Telegram боте для больницы."),
+                Messages(role=MessagesRole.USER, content=prompt)
+            ]
+            response = await self.client_pool.chat(messages)
+            logger.debug(f"Ответ от GigaChat: {response}")
+            return response
         except Exception as e:
             logger.error(f"Ошибка при запросе к GigaChat: {e}")
-            return "Извините, произошла ошибка при обработке запроса."
+            return GIGACHAT_ERROR_RESPONSE
 
 class GigaChatIntentDetector(IntentDetector):
     def __init__(self, chat_service: ChatService):
@@ -34,14 +45,7 @@ class GigaChatIntentDetector(IntentDetector):
         prompt = f"""
         Ты — классификатор намерений. Тебе дан запрос пользователя. Определи его намерение и верни ТОЛЬКО цифру от 1 до 9.
         Варианты:
-        1. Оставить отзыв (триггеры: "отзыв", "feedback", "жалоба", "хочу пожаловаться", "хочу оставить отзыв", "/review")
-        2. Узнать цены (триггеры: "цена", "стоимость", "прайс", "сколько стоит", "/price")
-        3. Часто задаваемые вопросы (триггеры: "вопросы", "faq", "часто задаваемые", "/faq")
-        4. Время работы клиники (триггеры: "расписание", "график", "время работы", "/schedule")
-        5. Контакты (триггеры: "контакты", "адрес", "телефон", "где находится", "/contacts")
-        6. Рекомендации для анализов (триггеры: "рекомендации", "правила", "подготовка", "/recomendation")
-        7. Установить напоминание (триггеры: "напомни", "напомнить", "установи напоминание", "запись к", "выпить таблетки", "/remind")
-        8. Связь с оператором (триггеры: "оператор", "регистратура", "связаться", "передать сообщение", "/operator")
+{INTENT_OPTIONS}
         9. Другое (если не подходит под 1-8)
 
         Запрос: "{user_input}"
@@ -56,11 +60,11 @@ class InMemoryStateManager(StateManager):
         """Инициализация менеджера состояний в памяти."""
         self.user_states = {}
 
-    def get_state(self, user_id: int) -> int:
+    async def get_state(self, user_id: int) -> int:
         """Возвращает текущее состояние пользователя или нормальное по умолчанию."""
         return self.user_states.get(user_id, STATE_NORMAL)
 
-    def set_state(self, user_id: int, state: int) -> None:
+    async def set_state(self, user_id: int, state: int) -> None:
         """Устанавливает состояние для пользователя."""
         self.user_states[user_id] = state
         logger.debug(f"Установлено состояние {state} для пользователя {user_id}")
\ No newline at end of file
@@ -0,0 +1,104 @@
+import asyncio
+import itertools
+import logging
+import time
+from typing import Dict, List, Optional
+import gigachat
+from gigachat.models import Chat, Messages
+
+logger = logging.getLogger(__name__)
+
+
+class GigaChatClientPool:
+    """Пул долгоживущих асинхронных клиентов GigaChat.
+
+    Клиенты создаются один раз и переиспользуются: OAuth-токен и TLS-соединения
+    сохраняются между запросами, а SDK сам обновляет токен по истечении срока.
+    Количество одновременных запросов ограничено семафором, каждый запрос — таймаутом.
+    """
+
+    def __init__(self, credentials: str, size: int = 2, max_concurrency: int = 8, request_timeout: float = 60.0):
+        """Инициализация пула.
+
+        Args:
+            credentials (str): Ключ авторизации GigaChat.
+            size (int): Количество клиентов (независимых соединений и токенов).
+            max_concurrency (int): Максимум одновременных запросов к GigaChat.
+            request_timeout (float): Таймаут одного запроса в секундах.
+        """
+        self.credentials = credentials
+        self.size = max(1, size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.request_timeout = request_timeout
+        self._clients: List[gigachat.GigaChat] = []
+        self._round_robin = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.total_latency = 0.0
+
+    def _create_client(self) -> gigachat.GigaChat:
+        """Создает клиент GigaChat."""
+        return gigachat.GigaChat(
+            credentials=self.credentials,
+            verify_ssl_certs=False,
+            timeout=self.request_timeout,
+        )
+
+    def _next_client(self) -> gigachat.GigaChat:
+        """Возвращает следующий клиент по кругу, создавая пул при первом обращении."""
+        if not self._clients:
+            self._clients = [self._create_client() for _ in range(self.size)]
+            self._round_robin = itertools.cycle(self._clients)
+            logger.info(f"Создан пул из {self.size} клиентов GigaChat")
+        return next(self._round_robin)
+
+    async def chat(self, messages: List[Messages]) -> str:
+        """Отправляет сообщения в GigaChat и возвращает текст ответа.
+
+        Raises:
+            asyncio.TimeoutError: Если GigaChat не ответил за request_timeout секунд.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            client = self._next_client()
+            self.requests += 1
+            self.in_flight += 1
+            started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(client.achat(Chat(messages=messages)), timeout=self.request_timeout)
+                return response.choices[0].message.content
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                logger.error(f"Таймаут запроса к GigaChat ({self.request_timeout} с)")
+                raise
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self.in_flight -= 1
+                self.total_latency += time.perf_counter() - started
+
+    async def close(self) -> None:
+        """Закрывает все клиенты пула."""
+        for client in self._clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Ошибка при закрытии клиента GigaChat: {e}")
+        self._clients = []
+        self._round_robin = None
+
+    def stats(self) -> Dict[str, float]:
+        """Возвращает статистику использования пула."""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "in_flight": self.in_flight,
+            "avg_latency": self.total_latency / self.requests if self.requests else 0.0,
+        }
@@ -0,0 +1,193 @@
+import json
+import logging
+import math
+import os
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from interfaces import IntentDetector
+from integration.text_normalization import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Намерения и их триггеры. Используются и в промпте GigaChat, и в локальном классификаторе.
+INTENT_TRIGGERS: Dict[str, Tuple[str, List[str]]] = {
+    "1": ("Оставить отзыв", ["отзыв", "feedback", "жалоба", "хочу пожаловаться", "хочу оставить отзыв", "/review"]),
+    "2": ("Узнать цены", ["цена", "стоимость", "прайс", "сколько стоит", "/price"]),
+    "3": ("Часто задаваемые вопросы", ["вопросы", "faq", "часто задаваемые", "/faq"]),
+    "4": ("Время работы клиники", ["расписание", "график", "время работы", "/schedule"]),
+    "5": ("Контакты", ["контакты", "адрес", "телефон", "где находится", "/contacts"]),
+    "6": ("Рекомендации для анализов", ["рекомендации", "правила", "подготовка", "/recomendation"]),
+    "7": ("Установить напоминание", ["напомни", "напомнить", "установи напоминание", "запись к", "выпить таблетки", "/remind"]),
+    "8": ("Связь с оператором", ["оператор", "регистратура", "связаться", "передать сообщение", "/operator"]),
+}
+
+# Триггеры, которые есть в промпте GigaChat, но слишком общие для локального ответа без LLM:
+# «запись к» совпадает с любым «записаться к …», «выпить таблетки» — с вопросами о подготовке к анализам
+LOCAL_EXCLUDED_TRIGGERS = {"запись к", "выпить таблетки"}
+
+# Служебные слова не учитываются при оценке того, какую часть запроса покрывает пример
+STOP_WORDS = {
+    "а", "без", "в", "во", "вас", "ваш", "ваша", "ваше", "ваши", "где", "для", "до", "еще", "и", "из", "или",
+    "как", "какие", "какой", "клиника", "клинике", "клиники", "клинику", "к", "ко", "ли", "мне", "можно",
+    "на", "не", "о", "об", "от", "по", "подскажите", "пожалуйста", "с", "со", "у", "хочу", "что", "это",
+}
+
+# Слово запроса считается покрытым примером, если сходство с одним из слов примера не ниже порога
+WORD_MATCH_THRESHOLD = 0.5
+
+DEFAULT_CONFIDENCE_THRESHOLD = 0.75
+DEFAULT_MARGIN = 0.15
+
+
+def _word_trigrams(word: str) -> Set[str]:
+    """Возвращает триграммы слова с выравниванием только по началу.
+
+    Окончания в русском языке меняются чаще корня, поэтому конец слова не дополняется.
+    """
+    padded = f"  {word}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _dice(a: Set[str], b: Set[str]) -> float:
+    """Коэффициент Дайса для двух множеств триграмм."""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class TrigramIntentClassifier:
+    """Локальный классификатор намерений на триграммах слов.
+
+    Каждый пример (триггер) разбивается на слова. Сходство примера — среднее по его словам
+    лучшего сходства с любым словом запроса; оно умножается на корень из доли значимых слов
+    запроса, которые покрыты примером. Поэтому одно совпавшее слово в длинном свободном
+    вопросе («телефон упал в воду») не дает уверенного ответа. Оценка намерения — максимум
+    по его примерам.
+    """
+
+    def __init__(self, examples: Optional[Dict[str, Iterable[str]]] = None):
+        """Инициализация классификатора примерами вида {намерение: [фразы]}."""
+        self._examples: List[Tuple[str, str, List[Set[str]]]] = []
+        self._known: Set[Tuple[str, str]] = set()
+        source = examples if examples is not None else {
+            intent: [trigger for trigger in triggers if trigger not in LOCAL_EXCLUDED_TRIGGERS]
+            for intent, (_, triggers) in INTENT_TRIGGERS.items()
+        }
+        for intent, phrases in source.items():
+            for phrase in phrases:
+                self.add_example(intent, phrase)
+
+    def add_example(self, intent: str, phrase: str) -> bool:
+        """Добавляет пример фразы для намерения. Возвращает False для дубликатов."""
+        normalized = normalize_text(phrase)
+        if not normalized or (intent, normalized) in self._known:
+            return False
+        self._known.add((intent, normalized))
+        self._examples.append((intent, normalized, [_word_trigrams(w) for w in normalized.split()]))
+        return True
+
+    def load_examples(self, path: str) -> int:
+        """Загружает дополнительные примеры из JSON-файла {намерение: [фразы]}."""
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Не удалось загрузить примеры намерений из {path}: {e}")
+            return 0
+        added = sum(self.add_example(intent, phrase) for intent, phrases in data.items() for phrase in phrases)
+        logger.info(f"Загружено {added} примеров намерений из {path}")
+        return added
+
+    def save_examples(self, path: str) -> None:
+        """Сохраняет все примеры в JSON-файл."""
+        data: Dict[str, List[str]] = {}
+        for intent, phrase, _ in self._examples:
+            data.setdefault(intent, []).append(phrase)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Возвращает оценку уверенности (0..1) для каждого намерения."""
+        words = normalize_text(text).split()
+        if not words:
+            return {}
+        input_grams = [_word_trigrams(w) for w in words]
+        content = [grams for word, grams in zip(words, input_grams) if word not in STOP_WORDS] or input_grams
+        result: Dict[str, float] = {}
+        for intent, _, phrase_grams in self._examples:
+            similarity = sum(max(_dice(pg, ig) for ig in input_grams) for pg in phrase_grams) / len(phrase_grams)
+            covered = sum(
+                any(_dice(pg, ig) >= WORD_MATCH_THRESHOLD for pg in phrase_grams) for ig in content
+            )
+            score = similarity * math.sqrt(covered / len(content))
+            if score > result.get(intent, 0.0):
+                result[intent] = score
+        return result
+
+    def predict(self, text: str) -> Tuple[Optional[str], float, float]:
+        """Возвращает (намерение, уверенность, отрыв от второго кандидата)."""
+        ranked = sorted(self.scores(text).items(), key=lambda item: item[1], reverse=True)
+        if not ranked:
+            return None, 0.0, 0.0
+        best_intent, best_score = ranked[0]
+        second_score = ranked[1][1] if len(ranked) > 1 else 0.0
+        return best_intent, best_score, best_score - second_score
+
+
+class FastPathIntentDetector(IntentDetector):
+    """Детектор намерений с локальным быстрым путём и откатом на LLM.
+
+    Уверенные ответы локального классификатора возвращаются сразу; остальные запросы
+    передаются резервному детектору (GigaChat).
+    """
+
+    def __init__(
+        self,
+        fallback: IntentDetector,
+        classifier: Optional[TrigramIntentClassifier] = None,
+        confidence_threshold: float = DEFAULT_CONFIDENCE_THRESHOLD,
+        margin: float = DEFAULT_MARGIN,
+        learn_from_fallback: bool = False,
+    ):
+        """Инициализация детектора.
+
+        Args:
+            fallback (IntentDetector): Детектор для неуверенных случаев.
+            classifier (Optional[TrigramIntentClassifier]): Локальный классификатор.
+            confidence_threshold (float): Минимальная уверенность для ответа без LLM.
+            margin (float): Минимальный отрыв лучшего намерения от второго.
+            learn_from_fallback (bool): Добавлять ли ответы LLM в примеры классификатора.
+        """
+        self.fallback = fallback
+        self.classifier = classifier or TrigramIntentClassifier()
+        self.confidence_threshold = confidence_threshold
+        self.margin = margin
+        self.learn_from_fallback = learn_from_fallback
+        self.hits = 0
+        self.fallbacks = 0
+
+    async def detect(self, user_input: str) -> Optional[str]:
+        """Определяет намерение локально, при низкой уверенности обращается к резервному детектору."""
+        intent, confidence, gap = self.classifier.predict(user_input)
+        if intent is not None and confidence >= self.confidence_threshold and gap >= self.margin:
+            self.hits += 1
+            logger.debug(f"Локальный классификатор: {intent} (уверенность {confidence:.2f}) для текста: {user_input}")
+            return intent
+
+        self.fallbacks += 1
+        logger.debug(f"Локальный классификатор не уверен ({intent}, {confidence:.2f}), запрос к резервному детектору")
+        result = await self.fallback.detect(user_input)
+        if self.learn_from_fallback and result in INTENT_TRIGGERS:
+            self.classifier.add_example(result, user_input)
+        return result
+
+    def stats(self) -> Dict[str, float]:
+        """Возвращает статистику попаданий локального классификатора."""
+        total = self.hits + self.fallbacks
+        return {
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+            "hit_rate": self.hits / total if total else 0.0,
+            "confidence_threshold": self.confidence_threshold,
+        }
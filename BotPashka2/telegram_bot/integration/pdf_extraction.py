@@ -0,0 +1,132 @@
+import asyncio
+import functools
+import io
+import logging
+import multiprocessing
+import os
+import re
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PdfExtractionError(Exception):
+    """PDF не удалось обработать: превышены лимиты, истек таймаут или файл поврежден."""
+
+
+def _report_pid(pids) -> None:
+    """Инициализатор процесса пула: сообщает pid, чтобы зависший процесс можно было завершить."""
+    pids.put(os.getpid())
+
+
+def _count_pages(pdf_content: bytes) -> int:
+    # pdfplumber импортируется только в процессах пула
+    import pdfplumber
+    with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
+        return len(pdf.pages)
+
+
+def _extract_pages(pdf_content: bytes, start: int, stop: int) -> List[str]:
+    """Извлекает текст страниц [start, stop) в процессе пула."""
+    import pdfplumber
+    with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
+        return [pdf.pages[index].extract_text() or "" for index in range(start, stop)]
+
+
+class PdfTextExtractor:
+    """Извлечение текста из PDF в ограниченном пуле процессов.
+
+    Страницы документа делятся на диапазоны и разбираются параллельно, поэтому
+    большой файл одного пользователя не блокирует цикл событий бота.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pages: int = 20, max_bytes: int = 10 * 1024 * 1024, timeout: float = 30.0):
+        """Инициализация извлекателя.
+
+        Args:
+            max_workers (int): Количество процессов пула.
+            max_pages (int): Максимальное количество страниц в документе.
+            max_bytes (int): Максимальный размер файла в байтах.
+            timeout (float): Таймаут обработки одного документа в секундах.
+        """
+        self.max_workers = max_workers
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pids = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Возвращает пул процессов, создавая его при первом обращении."""
+        if self._executor is None:
+            context = multiprocessing.get_context("spawn")
+            self._pids = context.SimpleQueue()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=context, initializer=_report_pid, initargs=(self._pids,)
+            )
+        return self._executor
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args))
+
+    async def _extract(self, pdf_content: bytes) -> str:
+        page_count = await self._run(_count_pages, pdf_content)
+        if page_count > self.max_pages:
+            raise PdfExtractionError(f"В документе {page_count} страниц, допустимо не больше {self.max_pages}")
+
+        chunk = max(1, -(-page_count // self.max_workers))
+        ranges = [(start, min(start + chunk, page_count)) for start in range(0, page_count, chunk)]
+        parts = await asyncio.gather(*(self._run(_extract_pages, pdf_content, start, stop) for start, stop in ranges))
+        return "\n".join(page for pages in parts for page in pages)
+
+    async def extract_text(self, pdf_content: bytes) -> str:
+        """Извлекает текст документа с нормализованными пробелами, сохраняя строки.
+
+        Raises:
+            PdfExtractionError: Если файл превышает лимиты, поврежден или обрабатывается дольше таймаута.
+        """
+        if len(pdf_content) > self.max_bytes:
+            raise PdfExtractionError(f"Размер файла {len(pdf_content)} байт превышает {self.max_bytes}")
+        try:
+            text = await asyncio.wait_for(self._extract(pdf_content), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            # Зависшие процессы завершаются вместе со старым пулом, следующий запрос создаст новый
+            self._reset()
+            raise PdfExtractionError(f"Обработка PDF заняла больше {self.timeout} с")
+        except PdfExtractionError:
+            raise
+        except Exception as e:
+            raise PdfExtractionError(f"Ошибка при извлечении текста из PDF: {e}") from e
+        # Переводы строк сохраняются: по ним разбираются строки таблицы анализов
+        text = re.sub(r'[^\S\n]+', ' ', text)
+        return re.sub(r'\s*\n\s*', '\n', text).strip()
+
+    def _reset(self) -> None:
+        """Останавливает пул, принудительно завершая его процессы."""
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            pids, self._pids = self._pids, None
+            # Публичного способа прервать задачу пула нет: процессы завершаются по pid,
+            # который каждый из них сообщил при запуске
+            workers = set()
+            while not pids.empty():
+                workers.add(pids.get())
+            pids.close()
+            executor.shutdown(wait=False, cancel_futures=True)
+            for pid in workers:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+    def close(self) -> None:
+        """Останавливает пул процессов."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            self._pids.close()
+            self._pids = None
@@ -0,0 +1,330 @@
+"""Референсные диапазоны лабораторных показателей и извлечение показателей из текста анализов.
+
+Диапазоны загружаются из JSON-файла вида::
+
+    {
+      "parameters": [
+        {
+          "name": "Гемоглобин",
+          "unit": "г/дл",
+          "aliases": ["hgb"],
+          "ranges": [
+            {"low": 13.2, "high": 13.3},
+            {"low": 12.0, "high": 15.0, "sex": "female", "age_min": 18}
+          ]
+        }
+      ]
+    }
+
+Диапазон без sex/age_min/age_max используется по умолчанию; при известном поле
+и возрасте пациента выбирается самый точный подходящий вариант.
+"""
+import json
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SEX_RE = re.compile(r'пол\s*:?\s*(муж|жен)')
+AGE_RE = re.compile(r'возраст\s*:?\s*(\d{1,3})')
+
+# Единицы измерения в строке таблицы: «10^9/л», «10*12/л», «г/л», «тыс/мкл», «фл».
+# Числа внутри них (10, 9, 12) не являются значениями показателей.
+UNIT_NUMERIC_PATTERN = r'\d+[ \t]*[\^*][ \t]*\d+(?:[ \t]*/[ \t]*[а-яa-zμµ]+)?'
+UNIT_WORD_PATTERN = r'[а-яa-zμµ]{1,6}/[а-яa-zμµ]+|(?:фл|пг|ед|ме)\b'
+STATUS_PATTERN = r'нормал|норма\b|в[ \t]+норме|повыш|пониж|выше|ниже'
+# Число считается значением, только если за ним идет конец строки, единица
+# измерения, статус, «%», референсный диапазон или пометка отклонения.
+# Так годы («2024 год»), номера и даты не принимаются за значения.
+VALUE_FOLLOWERS = (
+    r'[ \t]*(?:\n|$|%|[<>(*↑↓]|[-–][ \t]*\d|\d+(?:[.,]\d+)?[ \t]*[-–]|'
+    + STATUS_PATTERN + r'|' + UNIT_NUMERIC_PATTERN + r'|\b(?:' + UNIT_WORD_PATTERN + r'))'
+)
+
+
+def normalize_name(text: str) -> str:
+    """Приводит название показателя к виду для поиска: нижний регистр, ё → е, одиночные пробелы."""
+    return " ".join(text.lower().replace("ё", "е").split())
+
+
+@dataclass
+class RangeVariant:
+    """Вариант диапазона для пола и возрастной группы."""
+    low: float
+    high: float
+    sex: Optional[str] = None
+    age_min: Optional[float] = None
+    age_max: Optional[float] = None
+
+    def applies(self, sex: Optional[str], age: Optional[float]) -> bool:
+        if self.sex is not None and self.sex != sex:
+            return False
+        if self.age_min is not None and (age is None or age < self.age_min):
+            return False
+        if self.age_max is not None and (age is None or age > self.age_max):
+            return False
+        return True
+
+    @property
+    def specificity(self) -> int:
+        return (self.sex is not None) + (self.age_min is not None) + (self.age_max is not None)
+
+
+@dataclass
+class ReferenceParameter:
+    """Лабораторный показатель с единицами измерения и вариантами диапазонов."""
+    name: str
+    unit: str = ""
+    aliases: List[str] = field(default_factory=list)
+    variants: List[RangeVariant] = field(default_factory=list)
+
+    def range_for(self, sex: Optional[str] = None, age: Optional[float] = None) -> Optional[RangeVariant]:
+        """Возвращает самый точный диапазон для пациента.
+
+        Если пол или возраст неизвестны и подходящего варианта нет, берется
+        объединение всех вариантов.
+        """
+        applicable = [variant for variant in self.variants if variant.applies(sex, age)]
+        if applicable:
+            return max(applicable, key=lambda variant: variant.specificity)
+        if not self.variants:
+            return None
+        return RangeVariant(min(v.low for v in self.variants), max(v.high for v in self.variants))
+
+    def status(self, value: float, sex: Optional[str] = None, age: Optional[float] = None) -> Optional[str]:
+        """Сравнивает значение с диапазоном: понижено, повышено или в норме."""
+        variant = self.range_for(sex, age)
+        if variant is None:
+            return None
+        if value < variant.low:
+            return "понижено"
+        if value > variant.high:
+            return "повышено"
+        return "в норме"
+
+
+class ReferenceRangeMatcher:
+    """Поиск показателей в тексте по префиксному дереву нормализованных названий.
+
+    Дерево названий компилируется в одно регулярное выражение с общими префиксами,
+    где более длинное продолжение пробуется первым. Поэтому «Лимфоциты
+    относительное количество» сопоставляется с отдельным показателем, а не с
+    «Лимфоцитами». Совпадение может заканчиваться внутри слова, что покрывает
+    падежные окончания («гемоглобина»).
+    """
+
+    def __init__(self, parameters: List[ReferenceParameter]):
+        self.parameters = {parameter.name: parameter for parameter in parameters}
+        self._by_name: Dict[str, ReferenceParameter] = {}
+        trie: Dict = {}
+        for parameter in parameters:
+            for name in [parameter.name, *parameter.aliases]:
+                normalized = normalize_name(name)
+                self._by_name[normalized] = parameter
+                node = trie
+                for char in normalized:
+                    node = node.setdefault(char, {})
+                node[None] = True
+        # Два уровня: сначала по всему тексту ищутся только названия, затем в остатке
+        # строки после названия — первое значение. Числа до значения (единицы «10^9/л»,
+        # даты) поглощаются своими альтернативами и не принимаются за значение.
+        self._name_re = re.compile(r'\b(?P<name>' + self._trie_pattern(trie) + r')')
+        self._value_re = re.compile(
+            r'(?<![\d.,])(?:\d{1,2}[./]\d{1,2}[./]\d{2,4}\b|' + UNIT_NUMERIC_PATTERN
+            + r'|(?P<value>\d+(?:[.,]\d+)?)(?=' + VALUE_FOLLOWERS + r'))'
+            r'|\b(?:' + UNIT_WORD_PATTERN + r')'
+        )
+        # Абсолютный показатель → его относительный вариант в процентах («Нейтрофилы» →
+        # «Нейтрофилы относительное»): строка «Нейтрофилы, % 65» относится ко второму.
+        self._percent_variants: Dict[str, ReferenceParameter] = {}
+        for parameter in parameters:
+            if parameter.unit == "%":
+                continue
+            prefix = normalize_name(parameter.name) + " "
+            for other in parameters:
+                if other.unit == "%" and normalize_name(other.name).startswith(prefix):
+                    self._percent_variants[parameter.name] = other
+                    break
+
+    @classmethod
+    def _trie_pattern(cls, node: Dict) -> str:
+        """Строит регулярное выражение по узлу дерева: сначала продолжения, затем конец названия."""
+        alternatives = [cls._char_pattern(char) + cls._trie_pattern(child) for char, child in sorted(
+            (item for item in node.items() if item[0] is not None), key=lambda item: item[0]
+        )]
+        if not alternatives:
+            return ""
+        pattern = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+        if None in node:
+            pattern = "(?:" + pattern + ")?"
+        return pattern
+
+    @staticmethod
+    def _char_pattern(char: str) -> str:
+        # Пробел в названии совпадает с любым количеством пробелов внутри строки таблицы
+        return r'[ \t]+' if char == " " else re.escape(char)
+
+    @classmethod
+    def load(cls, path: str) -> "ReferenceRangeMatcher":
+        """Загружает показатели и диапазоны из JSON-файла."""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        parameters = [
+            ReferenceParameter(
+                name=item["name"],
+                unit=item.get("unit", ""),
+                aliases=item.get("aliases", []),
+                variants=[RangeVariant(**variant) for variant in item.get("ranges", [])],
+            )
+            for item in data["parameters"]
+        ]
+        logger.info(f"Загружено {len(parameters)} референсных показателей из {path}")
+        return cls(parameters)
+
+    @staticmethod
+    def _prepare(text: str) -> str:
+        return text.lower().replace("ё", "е")
+
+    def find(self, name: str) -> Optional[ReferenceParameter]:
+        """Находит показатель по названию из отчета."""
+        match = self._name_re.search(self._prepare(name))
+        return self._lookup(match.group("name")) if match else None
+
+    def _lookup(self, name: str) -> ReferenceParameter:
+        parameter = self._by_name.get(name)
+        return parameter if parameter is not None else self._by_name[normalize_name(name)]
+
+    def extract(self, text: str) -> Dict[str, float]:
+        """Извлекает значения показателей из текста отчета.
+
+        Текст разбирается построчно как таблица: значением показателя считается
+        первое число после его названия в той же строке, за которым идет конец
+        строки, единица измерения, статус или референсный диапазон. Числа внутри
+        единиц («10^9/л») и даты пропускаются. Если в строке есть «%», а название
+        совпало с абсолютным показателем, значение относится к его относительному
+        варианту, а при отсутствии такого варианта строка пропускается.
+        """
+        text = self._prepare(text)
+        results: Dict[str, float] = {}
+        names = list(self._name_re.finditer(text))
+        # «%» относится к строке: учитывается и до названия, но не до предыдущего
+        # показателя этой строки, у которого уже найдено значение.
+        percent_from = 0
+        for index, match in enumerate(names):
+            start = match.start()
+            if text.rfind("\n", percent_from, start) >= 0:
+                percent_from = text.rfind("\n", 0, start) + 1
+            end = text.find("\n", start)
+            if end < 0:
+                end = len(text)
+            if index + 1 < len(names) and names[index + 1].start() < end:
+                end = names[index + 1].start()
+            # Конец отрезка не передается в finditer: иначе «$» совпал бы на границе
+            # отрезка и число перед следующим названием приняли бы за значение.
+            for value in self._value_re.finditer(text, match.end()):
+                if value.start() >= end:
+                    break
+                if value.lastgroup == "value":
+                    self._store(
+                        results, self._lookup(match.group("name")),
+                        float(value.group("value").replace(",", ".")), "%" in text[percent_from:end],
+                    )
+                    percent_from = end
+                    break
+        return results
+
+    def _store(self, results: Dict[str, float], parameter: ReferenceParameter, value: float, percent: bool) -> None:
+        if percent and parameter.unit != "%":
+            parameter = self._percent_variants.get(parameter.name)
+            if parameter is None:
+                return
+        results.setdefault(parameter.name, value)
+
+    @staticmethod
+    def detect_patient(text: str) -> Tuple[Optional[str], Optional[int]]:
+        """Определяет пол и возраст пациента по шапке отчета, если они указаны."""
+        prepared = ReferenceRangeMatcher._prepare(text)
+        sex_match = SEX_RE.search(prepared)
+        age_match = AGE_RE.search(prepared)
+        sex = None
+        if sex_match:
+            sex = "male" if sex_match.group(1) == "муж" else "female"
+        return sex, int(age_match.group(1)) if age_match else None
+
+
+def _legacy_extract(text: str, reference_ranges: Dict[str, Tuple[float, float]]) -> Dict[str, str]:
+    """Прежний алгоритм (регулярное выражение + линейный поиск) — только для бенчмарка."""
+    pattern = re.compile(
+        r'([А-Яа-я\s]+(?:относительное|абсолютное)?(?:количество)?(?:в крови)?(?:методом автоматизированного подсчёта|расчётным методом|по Вестергрену)?)\s+'
+        r'(\d+\.?\d*)\s+(?:Нормаль(?:ный)?|Повыше(?:нный)?|Пониже(?:нный)?)'
+    )
+    results = {}
+    for name, value in pattern.findall(re.sub(r'\s+', ' ', text)):
+        normalized = name.strip().lower()
+        for ref_param, (low, high) in reference_ranges.items():
+            if ref_param.lower() in normalized:
+                results[name.strip()] = "понижено" if float(value) < low else "повышено" if float(value) > high else "в норме"
+                break
+    return results
+
+
+def benchmark(path: str, reports: int = 200, rows: int = 40, repeats: int = 20) -> Dict[str, float]:
+    """Сравнивает прежний и новый разбор на синтетических отчетах.
+
+    Каждый разбор повторяется repeats раз и берется лучшее время: единичный
+    прогон слишком зависит от шума планировщика, чтобы сравнивать доли миллисекунды.
+    """
+    matcher = ReferenceRangeMatcher.load(path)
+    reference_ranges = {
+        name: (parameter.variants[0].low, parameter.variants[0].high)
+        for name, parameter in matcher.parameters.items() if parameter.variants
+    }
+    rng = random.Random(0)
+    names = list(matcher.parameters)
+    texts = []
+    for _ in range(reports):
+        lines = ["Протокол исследования", "Пол: Жен Возраст: 34"]
+        for _ in range(rows):
+            name = rng.choice(names)
+            value = round(rng.uniform(0, 200), 1)
+            lines.append(f"{name} в крови {value} {rng.choice(['Нормальный', 'Повышенный', 'Пониженный'])} {matcher.parameters[name].unit}")
+        texts.append("\n".join(lines))
+
+    def legacy_run() -> None:
+        for text in texts:
+            _legacy_extract(text, reference_ranges)
+
+    def matcher_run() -> None:
+        for text in texts:
+            sex, age = matcher.detect_patient(text)
+            for name, value in matcher.extract(text).items():
+                matcher.parameters[name].status(value, sex, age)
+
+    def best(run) -> float:
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        return min(timings) / reports * 1000
+
+    return {"legacy": best(legacy_run), "matcher": best(matcher_run)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Бенчмарк сопоставления показателей анализов")
+    parser.add_argument("--path", default="data_base/reference_ranges.json")
+    parser.add_argument("--reports", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=40)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    result = benchmark(args.path, args.reports, args.rows, args.repeats)
+    print(f"Регулярное выражение + линейный поиск: {result['legacy']:.3f} мс на отчет")
+    print(f"Префиксное дерево: {result['matcher']:.3f} мс на отчет")
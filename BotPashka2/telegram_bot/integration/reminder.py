@@ -1,21 +1,75 @@
 from aiogram import Bot
-from datetime import datetime, timedelta
 import asyncio
+from datetime import datetime, timedelta
 import logging
-from integration.gigachat import GigaChatService 
+import time
+from typing import Optional
+from interfaces import ChatService
+from delivery_queue import DeliveryQueue, PRIORITY_REMINDER
+from integration.gigachat import GigaChatService
+from integration.reminder_parser import MONTHS, parse_reminder_text
+from integration.reminder_scheduler import (
+    Recurrence, ReminderScheduler, ReminderStore, ScheduledReminder,
+    STAGE_MAIN, STAGE_DAY_BEFORE, STAGE_TWO_HOURS_BEFORE,
+)
 
 logger = logging.getLogger(__name__)
 
+STAGE_PREFIXES = {
+    STAGE_DAY_BEFORE: "завтра ",
+    STAGE_TWO_HOURS_BEFORE: "через 2 часа ",
+    STAGE_MAIN: "",
+}
+
 class ReminderService:
     """Сервис для обработки и управления напоминаниями."""
 
-    def __init__(self, bot: Bot):
-        """Инициализация сервиса напоминаний."""
+    def __init__(
+        self,
+        bot: Bot,
+        chat_service: Optional[ChatService] = None,
+        db_path: str = "data_base/reminders.db",
+        catchup_window: float = 12 * 3600,
+        delivery: Optional[DeliveryQueue] = None,
+    ):
+        """Инициализация сервиса напоминаний с общим сервисом GigaChat.
+
+        Args:
+            db_path (str): Путь к базе напоминаний.
+            catchup_window (float): Сколько секунд после срока пропущенное при перезапуске напоминание еще отправляется.
+            delivery (Optional[DeliveryQueue]): Общая очередь отправки сообщений; по умолчанию создается своя.
+        """
         self.bot = bot
-        self.reminders = {}
-        self.chat_service = GigaChatService()  # Инициализация GigaChat
+        self._owns_delivery = delivery is None
+        self.delivery = delivery or DeliveryQueue(bot)
+        self.chat_service = chat_service or GigaChatService()
+        self.scheduler = ReminderScheduler(ReminderStore(db_path), self._send, catchup_window=catchup_window)
+        self.local_hits = 0
+        self.llm_hits = 0
+        self.misses = 0
 
-    async def parse_reminder(self, text: str) -> tuple[datetime | None, str | None, str | None]:
+    async def parse_reminder(
+        self, text: str
+    ) -> tuple[datetime | None, str | None, str | None, Recurrence | None]:
+        """Извлекает время, текст, тип и правило повторения напоминания.
+
+        Сначала текст разбирается правилами, затем через GigaChat; GigaChat
+        повторения не распознает.
+        """
+        parsed = parse_reminder_text(text)
+        if parsed is not None:
+            self.local_hits += 1
+            logger.debug(f"Напоминание разобрано локально: {parsed}")
+            return parsed.when, parsed.text, parsed.reminder_type, parsed.recurrence
+
+        reminder_time, reminder_text, reminder_type = await self._parse_with_llm(text)
+        if reminder_time is None:
+            self.misses += 1
+        else:
+            self.llm_hits += 1
+        return reminder_time, reminder_text, reminder_type, None
+
+    async def _parse_with_llm(self, text: str) -> tuple[datetime | None, str | None, str | None]:
         prompt = (
             "Извлеки из текста дату, время и содержание напоминания. "
             "Верни ответ в формате: 'день: <число>, месяц: <название месяца>, время: <часы:минуты>, текст: <содержание>, тип: <pills или doctor>'. "
@@ -50,31 +104,16 @@ class ReminderService:
             
             day = int(data["день"])
             month_str = data["месяц"].lower()
-            time = data["время"]
+            time_str = data["время"]
             reminder_text = data["текст"]
             reminder_type = data["тип"]
             
-            months = {
-                'января': 1, 'январь': 1,
-                'февраля': 2, 'февраль': 2,
-                'марта': 3, 'март': 3,
-                'апреля': 4, 'апрель': 4,
-                'мая': 5, 'май': 5,
-                'июня': 6, 'июнь': 6,
-                'июля': 7, 'июль': 7,
-                'августа': 8, 'август': 8,
-                'сентября': 9, 'сентябрь': 9,
-                'октября': 10, 'октябрь': 10,
-                'ноября': 11, 'ноябрь': 11,
-                'декабря': 12, 'декабрь': 12
-            }
-            
-            if month_str not in months:
+            if month_str not in MONTHS:
                 logger.error(f"Некорректный месяц: {month_str}")
                 return None, None, None
             
-            month = months[month_str]
-            hours, minutes = map(int, time.split(':'))
+            month = MONTHS[month_str]
+            hours, minutes = map(int, time_str.split(':'))
             current_year = datetime.now().year
             reminder_time = datetime(current_year, month, day, hours, minutes)
             
@@ -90,33 +129,64 @@ class ReminderService:
             logger.error(f"Неизвестная ошибка при работе с GigaChat: {e}")
             return None, None, None
 
-    async def set_reminder(self, user_id: int, reminder_time: datetime, message: str, reminder_type: str):
-        """Устанавливает напоминание для пользователя."""
-        if user_id not in self.reminders:
-            self.reminders[user_id] = []
-                
-        self.reminders[user_id].append((reminder_time, message, reminder_type))
-        logger.info(f"Установлено напоминание для {user_id}: {message} на {reminder_time}")
-        asyncio.create_task(self._schedule_reminder(user_id, reminder_time, message, reminder_type))
+    async def set_reminder(
+        self,
+        user_id: int,
+        reminder_time: datetime,
+        message: str,
+        reminder_type: str,
+        recurrence: Optional[Recurrence] = None,
+    ):
+        """Сохраняет напоминание; уведомления отправит диспетчер.
 
-    async def _schedule_reminder(self, user_id: int, reminder_time: datetime, message: str, reminder_type: str):
-        """Планирует отправку напоминаний в зависимости от типа."""
-        now = datetime.now()
-        
+        Для повторяющегося напоминания каждое уведомление (и предупреждения о
+        визите к врачу) хранится одной строкой с правилом повторения.
+        """
+        event_at = reminder_time.timestamp()
+        now = time.time()
+        stages = [(STAGE_MAIN, event_at)]
         if reminder_type == 'doctor':
-            one_day_before = reminder_time - timedelta(days=1)
-            if one_day_before > now:
-                await asyncio.sleep((one_day_before - now).total_seconds())
-                await self.bot.send_message(user_id, f"Напоминание: завтра {message}")
-                logger.info(f"Отправлено напоминание за день для {user_id}: {message}")
+            stages = [
+                (STAGE_DAY_BEFORE, (reminder_time - timedelta(days=1)).timestamp()),
+                (STAGE_TWO_HOURS_BEFORE, (reminder_time - timedelta(hours=2)).timestamp()),
+                *stages,
+            ]
+        rule = until = count = None
+        if recurrence is not None:
+            rule, until, count = recurrence.rule, recurrence.until, recurrence.count
+        await self.scheduler.schedule([
+            ScheduledReminder(user_id, message, reminder_type, stage, event_at, fire_at, None, rule, until, count)
+            for stage, fire_at in stages if fire_at > now
+        ])
+        repeat = f" ({recurrence.describe()})" if recurrence else ""
+        logger.info(f"Установлено напоминание для {user_id}: {message} на {reminder_time}{repeat}")
 
-            two_hours_before = reminder_time - timedelta(hours=2)
-            if two_hours_before > now:
-                await asyncio.sleep((two_hours_before - now).total_seconds())
-                await self.bot.send_message(user_id, f"Напоминание: через 2 часа {message}")
-                logger.info(f"Отправлено напоминание за 2 часа для {user_id}: {message}")
-                
-        if reminder_time > now:
-            await asyncio.sleep((reminder_time - now).total_seconds())
-            await self.bot.send_message(user_id, f"Напоминание: {message}")
-            logger.info(f"Отправлено основное напоминание для {user_id}: {message}")
\ No newline at end of file
+    def _send(self, reminder: ScheduledReminder) -> asyncio.Future:
+        """Ставит уведомление напоминания в очередь доставки и возвращает future отправки."""
+        prefix = STAGE_PREFIXES[reminder.stage]
+        return self.delivery.enqueue(
+            reminder.user_id, f"Напоминание: {prefix}{reminder.message}", priority=PRIORITY_REMINDER
+        )
+
+    async def start(self) -> None:
+        """Восстанавливает сохраненные напоминания и запускает диспетчер."""
+        self.delivery.start()
+        await self.scheduler.start()
+
+    async def close(self) -> None:
+        await self.scheduler.close()
+        if self._owns_delivery:
+            await self.delivery.close()
+
+    def stats(self) -> dict:
+        """Возвращает статистику диспетчера и разбора напоминаний."""
+        parsed = self.local_hits + self.llm_hits + self.misses
+        return {
+            **self.scheduler.stats(),
+            "parser": {
+                "local": self.local_hits,
+                "llm": self.llm_hits,
+                "failed": self.misses,
+                "local_rate": self.local_hits / parsed if parsed else 0.0,
+            },
+        }
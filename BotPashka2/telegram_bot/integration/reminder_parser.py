@@ -0,0 +1,398 @@
+"""Локальный разбор текста напоминаний без обращения к GigaChat.
+
+Поддерживаются типичные формулировки::
+
+    напомни мне 31 марта в 14:00 выпить таблетки
+    напомни завтра в 9 утра, что мне надо к врачу
+    через 2 часа напомни выпить таблетки
+    в пятницу в 18.30 запись к стоматологу
+    напомни 05.04 в 10:00 сдать анализы
+    каждый день в 9:00 выпить таблетки в течение 2 недель
+    каждые 8 часов принять антибиотик 10 раз
+    по понедельникам в 10:00 к врачу до 31 мая
+
+Если не удалось однозначно определить дату и время, разбор возвращает None,
+и сервис напоминаний обращается к GigaChat.
+"""
+import re
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+from integration.reminder_scheduler import Recurrence
+
+MONTHS = {
+    'января': 1, 'январь': 1,
+    'февраля': 2, 'февраль': 2,
+    'марта': 3, 'март': 3,
+    'апреля': 4, 'апрель': 4,
+    'мая': 5, 'май': 5,
+    'июня': 6, 'июнь': 6,
+    'июля': 7, 'июль': 7,
+    'августа': 8, 'август': 8,
+    'сентября': 9, 'сентябрь': 9,
+    'октября': 10, 'октябрь': 10,
+    'ноября': 11, 'ноябрь': 11,
+    'декабря': 12, 'декабрь': 12
+}
+
+WEEKDAYS = {
+    'понедельник': 0, 'вторник': 1, 'среду': 2, 'среда': 2, 'четверг': 3,
+    'пятницу': 4, 'пятница': 4, 'субботу': 5, 'суббота': 5, 'воскресенье': 6,
+}
+
+WEEKDAYS_PLURAL = {
+    'понедельникам': 0, 'вторникам': 1, 'средам': 2, 'четвергам': 3,
+    'пятницам': 4, 'субботам': 5, 'воскресеньям': 6,
+}
+
+RELATIVE_DAYS = {'сегодня': 0, 'завтра': 1, 'послезавтра': 2}
+
+NUMBER_WORDS = {
+    'один': 1, 'одну': 1, 'два': 2, 'две': 2, 'три': 3, 'четыре': 4, 'пять': 5,
+    'шесть': 6, 'десять': 10, 'пятнадцать': 15, 'двадцать': 20, 'тридцать': 30, 'сорок': 40,
+}
+
+_MONTH_NAMES = "|".join(sorted(MONTHS, key=len, reverse=True))
+_NUMBER = r'\d+|' + "|".join(NUMBER_WORDS)
+
+RELATIVE_RE = re.compile(
+    r'\bчерез\s+(?:(?P<number>' + _NUMBER + r'|пол|полтора|полторы)\s*)?'
+    r'(?P<unit>минут[уы]?|мин\b|час(?:а|ов)?|дн(?:я|ей)|день|недел[юиь])'
+)
+DATE_WORDS_RE = re.compile(
+    r'\b(?P<day>\d{1,2})(?:-?го)?\s+(?P<month>' + _MONTH_NAMES + r')\b(?:\s+(?P<year>\d{4})(?:\s*(?:года|г\.?))?)?'
+)
+# Время через двоеточие допускается без предлога, через точку — только после «в»,
+# чтобы не спутать его с датой «31.03»
+TIME_RE = re.compile(
+    r'(?:\bв\s+)?\b(?P<hour>\d{1,2}):(?P<minute>\d{2})\b|\bв\s+(?P<hour_dot>\d{1,2})\.(?P<minute_dot>\d{2})\b'
+)
+# Дата через «/» принимается только с годом или после предлога: «1/2» в
+# «принять 1/2 таблетки» — доза, а не 1 февраля
+DATE_NUMERIC_RE = re.compile(
+    r'(?P<preposition>\b(?:на|к|до|с|от)\s+)?\b(?P<day>\d{1,2})'
+    r'(?(preposition)[./]|(?:\.|/(?=\d{1,2}/\d{2})))'
+    r'(?P<month>\d{1,2})(?:[./](?P<year>\d{4}|\d{2}))?\b'
+)
+TIME_HOUR_RE = re.compile(
+    r'\bв\s+(?P<hour>\d{1,2})(?:\s*(?:час(?:а|ов)?|ч)\b)?(?:\s+(?P<minute>\d{1,2})\s*мин(?:ут[уы]?)?\b)?'
+    r'(?:\s*(?P<period>утра|дня|вечера|ночи))?(?!\s*[\d.:])'
+)
+PERIOD_RE = re.compile(r'^\s*(?P<period>утра|дня|вечера|ночи)\b')
+RELATIVE_DAY_RE = re.compile(r'\b(?P<word>послезавтра|завтра|сегодня)\b')
+WEEKDAY_RE = re.compile(r'(?:\bво?\s+)?\b(?P<word>' + "|".join(WEEKDAYS) + r')\b')
+
+RECURRENCE_RE = re.compile(
+    r'\bкажд(?:ый|ую|ое|ые)\s+(?:(?P<number>' + _NUMBER + r')\s+)?'
+    r'(?P<unit>час(?:а|ов)?|сутки|суток|дн(?:я|ей)|день|недел[юиь])\b|\b(?P<adverb>ежечасно|ежедневно|еженедельно)\b'
+)
+# «каждый понедельник»: сам день недели остается в тексте для разбора даты
+WEEKLY_RE = re.compile(
+    r'\bкажд(?:ый|ую|ое)\s+(?=(?:' + "|".join(WEEKDAYS) + r')\b)'
+    r'|\bпо\s+(?P<weekday>' + "|".join(WEEKDAYS_PLURAL) + r')\b'
+)
+UNTIL_RE = re.compile(
+    r'\bдо\s+(?:(?P<day>\d{1,2})(?:-?го)?\s+(?P<month>' + _MONTH_NAMES + r')(?:\s+(?P<year>\d{4}))?'
+    r'|(?P<nday>\d{1,2})[./](?P<nmonth>\d{1,2})(?:[./](?P<nyear>\d{4}))?)\b'
+)
+DURATION_RE = re.compile(
+    r'\bв\s+течени[еи]\s+(?:(?P<number>' + _NUMBER + r')\s+)?(?P<unit>дн(?:я|ей)|день|недел[юиь]|месяц(?:а|ев)?)\b'
+)
+COUNT_RE = re.compile(r'\b(?P<count>\d+)\s+раз(?:а)?\b')
+# «2 раза в день» без точного времени каждого приема правилом не описывается
+TIMES_PER_RE = re.compile(r'\bраз(?:а)?\s+в\s+(?:день|сутки|неделю|час)\b')
+
+TRIGGER_RE = re.compile(
+    r'^(?:(?:пожалуйста|напомни(?:те)?|напомнить|напоминай(?:те)?|мне|нам|о\s+том|что|чтобы|надо|нужно|необходимо)\b[\s,]*)+'
+)
+DOCTOR_RE = re.compile(
+    r'врач|доктор|при[её]м|запис|клиник|терапевт|стоматолог|окулист|офтальмолог|хирург|педиатр|'
+    r'гинеколог|кардиолог|невролог|эндокринолог|\bлор\b|анализ|узи|осмотр|процедур'
+)
+
+
+@dataclass
+class ParsedReminder:
+    """Результат разбора текста напоминания."""
+    when: datetime
+    text: str
+    reminder_type: str
+    recurrence: Optional[Recurrence] = None
+
+
+def _number(value: Optional[str]) -> float:
+    if value is None:
+        return 1
+    if value == 'пол':
+        return 0.5
+    if value in ('полтора', 'полторы'):
+        return 1.5
+    return int(value) if value.isdigit() else NUMBER_WORDS[value]
+
+
+def _apply_period(hour: int, period: Optional[str]) -> int:
+    """Переводит «8 вечера» и «12 ночи» в 24-часовой формат."""
+    if period in ('дня', 'вечера') and hour < 12:
+        return hour + 12
+    if period == 'ночи' and hour == 12:
+        return 0
+    return hour
+
+
+def _next_day(when: datetime) -> datetime:
+    return when + timedelta(days=1)
+
+
+def _next_week(when: datetime) -> datetime:
+    return when + timedelta(weeks=1)
+
+
+def _next_year(when: datetime) -> datetime:
+    # 29 февраля в невисокосный год не существует: datetime.replace выбросит ValueError
+    return when.replace(year=when.year + 1)
+
+
+class _Scanner:
+    """Текст, из которого по очереди вырезаются найденные фрагменты даты и времени."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def take(self, pattern: re.Pattern) -> Optional[re.Match]:
+        match = pattern.search(self.text)
+        if match:
+            self.text = self.text[:match.start()] + " " + self.text[match.end():]
+        return match
+
+
+def _extract_time(scanner: _Scanner) -> Optional[Tuple[int, int]]:
+    match = scanner.take(TIME_RE)
+    if match:
+        if match.group("hour") is not None:
+            hour, minute = int(match.group("hour")), int(match.group("minute"))
+        else:
+            hour, minute = int(match.group("hour_dot")), int(match.group("minute_dot"))
+        # «в 8:30 вечера»: часть суток идет сразу после времени
+        period = PERIOD_RE.match(scanner.text[match.start():])
+        if period:
+            hour = _apply_period(hour, period.group("period"))
+            start = match.start()
+            scanner.text = scanner.text[:start] + scanner.text[start + period.end():]
+        return hour, minute
+    match = scanner.take(TIME_HOUR_RE)
+    if match:
+        return _apply_period(int(match.group("hour")), match.group("period")), int(match.group("minute") or 0)
+    return None
+
+
+def _extract_date(scanner: _Scanner, now: datetime) -> Tuple[Optional[date], Optional[Callable[[datetime], datetime]]]:
+    """Возвращает дату и сдвиг на случай, если время на эту дату уже прошло.
+
+    Для даты без года это следующий год, для дня недели — следующая неделя,
+    для «завтра» и даты с годом сдвига нет.
+    """
+    match = scanner.take(DATE_WORDS_RE) or scanner.take(DATE_NUMERIC_RE)
+    if match:
+        year = match.group("year")
+        if year and len(year) == 2:
+            year = "20" + year
+        month = match.group("month")
+        month = MONTHS[month] if month in MONTHS else int(month)
+        day = date(int(year) if year else now.year, month, int(match.group("day")))
+        return day, None if year else _next_year
+    match = scanner.take(RELATIVE_DAY_RE)
+    if match:
+        return now.date() + timedelta(days=RELATIVE_DAYS[match.group("word")]), None
+    match = scanner.take(WEEKDAY_RE)
+    if match:
+        days_ahead = (WEEKDAYS[match.group("word")] - now.weekday()) % 7
+        return now.date() + timedelta(days=days_ahead), _next_week
+    return None, None
+
+
+def _extract_recurrence(scanner: _Scanner) -> Optional[Tuple[str, int, Optional[int]]]:
+    """Возвращает единицу и интервал повторения и день недели для «по понедельникам»."""
+    match = scanner.take(RECURRENCE_RE)
+    if match:
+        adverb = match.group("adverb")
+        if adverb:
+            return {"ежечасно": "h", "ежедневно": "d", "еженедельно": "w"}[adverb], 1, None
+        unit = match.group("unit")
+        unit = "h" if unit.startswith("час") else "w" if unit.startswith("нед") else "d"
+        return unit, int(_number(match.group("number"))), None
+    match = scanner.take(WEEKLY_RE)
+    if match:
+        weekday = match.group("weekday")
+        return "w", 1, WEEKDAYS_PLURAL[weekday] if weekday else None
+    return None
+
+
+def _extract_end(scanner: _Scanner, now: datetime) -> Tuple[Optional[datetime], Optional[timedelta], Optional[int]]:
+    """Возвращает окончание серии: дату «до», длительность «в течение» и число повторов «N раз»."""
+    until = duration = count = None
+    match = scanner.take(UNTIL_RE)
+    if match:
+        if match.group("month"):
+            day, month, year = int(match.group("day")), MONTHS[match.group("month")], match.group("year")
+        else:
+            day, month, year = int(match.group("nday")), int(match.group("nmonth")), match.group("nyear")
+        until = datetime(int(year) if year else now.year, month, day, 23, 59, 59)
+        if until < now and not year:
+            until = _next_year(until)
+    match = scanner.take(DURATION_RE)
+    if match:
+        amount = _number(match.group("number"))
+        unit = match.group("unit")
+        days = 7 if unit.startswith("нед") else 30 if unit.startswith("месяц") else 1
+        duration = timedelta(days=amount * days)
+    match = scanner.take(COUNT_RE)
+    if match:
+        count = int(match.group("count"))
+    return until, duration, count
+
+
+def _clean_text(text: str) -> str:
+    text = re.sub(r'\s+', ' ', text).strip(" ,.!?;:-")
+    text = TRIGGER_RE.sub("", text)
+    return re.sub(r'\s+([,.!?])', r'\1', text).strip(" ,.!?;:-")
+
+
+def detect_reminder_type(text: str) -> str:
+    """Напоминание о визите к врачу (doctor) или о приеме лекарств и прочем (pills)."""
+    return "doctor" if DOCTOR_RE.search(text) else "pills"
+
+
+def parse_reminder_text(text: str, now: Optional[datetime] = None) -> Optional[ParsedReminder]:
+    """Извлекает время и текст напоминания правилами.
+
+    Returns:
+        Optional[ParsedReminder]: Результат или None, если дата, время или текст не определены однозначно.
+    """
+    now = now or datetime.now()
+    scanner = _Scanner(text.lower().replace("ё", "е"))
+    if TIMES_PER_RE.search(scanner.text):
+        return None
+
+    repeat = _extract_recurrence(scanner)
+    until = duration = count = None
+    if repeat is not None:
+        try:
+            until, duration, count = _extract_end(scanner, now)
+        except ValueError:
+            return None
+    elif UNTIL_RE.search(scanner.text):
+        # «до 5 марта» без повторения — срок, а не дата напоминания: иначе получилось
+        # бы разовое напоминание 5 марта с текстом «до пить витамины»
+        return None
+
+    relative = scanner.take(RELATIVE_RE)
+    delta = None
+    if relative:
+        unit = relative.group("unit")
+        amount = _number(relative.group("number"))
+        if unit.startswith("мин"):
+            delta = timedelta(minutes=amount)
+        elif unit.startswith("час"):
+            delta = timedelta(hours=amount)
+        elif unit.startswith("нед"):
+            delta = timedelta(weeks=amount)
+        else:
+            delta = timedelta(days=amount)
+
+    try:
+        clock = _extract_time(scanner)
+        day, rollover = _extract_date(scanner, now)
+        if day is None and repeat is not None and repeat[2] is not None:
+            day, rollover = now.date() + timedelta(days=(repeat[2] - now.weekday()) % 7), _next_week
+        if clock is not None:
+            hour, minute = clock
+            if not (0 <= hour < 24 and 0 <= minute < 60):
+                return None
+    except ValueError:
+        # Несуществующая дата, например «31 февраля»
+        return None
+
+    if repeat is not None and repeat[0] == "h" and delta is None and clock is None and day is None:
+        # «каждые 8 часов» без времени: первый раз через интервал
+        delta = timedelta(hours=repeat[1])
+
+    if delta is not None and delta < timedelta(days=1):
+        # «через 2 часа» задает момент целиком: дополнительная дата или время противоречат ему
+        if clock is not None or day is not None:
+            return None
+        when = (now + delta).replace(second=0, microsecond=0)
+    else:
+        if clock is None:
+            return None
+        if delta is not None:
+            if day is not None:
+                return None
+            day = (now + delta).date()
+        if day is None:
+            # Указано только время: ближайшее наступление, сегодня или завтра
+            day, rollover = now.date(), _next_day
+        when = datetime.combine(day, datetime.min.time()).replace(hour=clock[0], minute=clock[1])
+        if when <= now and rollover is not None:
+            try:
+                when = rollover(when)
+            except ValueError:
+                return None
+
+    if when <= now:
+        return None
+    reminder_text = _clean_text(scanner.text)
+    if not reminder_text:
+        return None
+
+    recurrence = None
+    if repeat is not None:
+        if duration is not None:
+            # «в течение 2 недель» — 14 ежедневных повторов, не 15
+            until = min(until or datetime.max, when + duration - timedelta(seconds=1))
+        if until is not None and until < when:
+            return None
+        recurrence = Recurrence(
+            unit=repeat[0], interval=repeat[1], until=until.timestamp() if until else None, count=count
+        )
+    return ParsedReminder(
+        when=when, text=reminder_text, reminder_type=detect_reminder_type(reminder_text), recurrence=recurrence
+    )
+
+
+SAMPLES = [
+    "напомни мне 31 марта в 14:00 выпить таблетки",
+    "напомни мне 31 марта в 14:00, что мне надо выпить таблетки",
+    "напомни завтра в 9 утра, что мне надо к врачу",
+    "через 2 часа напомни выпить таблетки",
+    "напомни через полчаса принять лекарство",
+    "в пятницу в 18.30 запись к стоматологу",
+    "напомни 05.04 в 10:00 сдать анализы",
+    "напомни послезавтра в 8 вечера выпить витамины",
+    "напомни в 21:00 выпить таблетки",
+    "напомни мне про прием у терапевта 12 мая в 9 часов 30 минут",
+    "каждый день в 9:00 выпить таблетки в течение 2 недель",
+    "напоминай каждые 8 часов принять антибиотик 10 раз",
+    "по понедельникам в 10:00 к врачу до 31 мая",
+    "напомни в 10:00 принять 1/2 таблетки",
+    "напомни на 5/4 в 10:00 записаться к врачу",
+]
+
+
+def benchmark(repeat: int = 10000) -> Dict[str, float]:
+    """Среднее время разбора одной фразы из SAMPLES (микросекунды) и доля разобранных."""
+    now = datetime(2025, 3, 1, 12, 0)
+    parsed = sum(parse_reminder_text(sample, now) is not None for sample in SAMPLES)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for sample in SAMPLES:
+            parse_reminder_text(sample, now)
+    elapsed = time.perf_counter() - started
+    return {"us_per_phrase": elapsed / (repeat * len(SAMPLES)) * 1e6, "parsed": parsed / len(SAMPLES)}
+
+
+if __name__ == "__main__":
+    for sample in SAMPLES:
+        print(f"{sample!r} -> {parse_reminder_text(sample)}")
+    result = benchmark()
+    print(f"Разобрано {result['parsed']:.0%} примеров, {result['us_per_phrase']:.1f} мкс на фразу")
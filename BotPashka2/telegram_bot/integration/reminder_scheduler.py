@@ -0,0 +1,566 @@
+"""Хранение напоминаний в SQLite и их отправка одним циклом-диспетчером.
+
+Каждое уведомление (основное, за день, за 2 часа) — отдельная строка таблицы
+с временем срабатывания. Диспетчер держит в куче только уведомления ближайшего
+окна (horizon), спит до самого раннего из них и подгружает следующее окно по
+индексу на fire_at. После перезапуска пропущенные уведомления отправляются,
+если опоздание не превышает catchup_window.
+
+Повторяющееся напоминание хранится одной строкой с правилом (например, «1d» —
+каждый день, «8h» — каждые 8 часов), сроком окончания и числом оставшихся
+повторов. После отправки строка не закрывается, а переносится на следующее
+наступление, поэтому число строк и записей в куче не зависит от числа доз.
+"""
+import asyncio
+import heapq
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+STAGE_MAIN = "main"
+STAGE_DAY_BEFORE = "day_before"
+STAGE_TWO_HOURS_BEFORE = "two_hours_before"
+
+STATUS_PENDING = "pending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+STATUS_EXPIRED = "expired"
+
+# Ограничение на число параметров в одном запросе SQLite
+_SQL_BATCH = 500
+# Через сколько секунд повторяется пачка, обработка которой завершилась ошибкой
+_RETRY_DELAY = 30.0
+
+# Единицы правил повторения: часы отсчитываются в секундах, дни и недели — по
+# календарю, чтобы время суток не сдвигалось при переходе на летнее время
+RECURRENCE_UNITS = {"h": "hours", "d": "days", "w": "weeks"}
+
+
+@dataclass
+class Recurrence:
+    """Правило повторения: каждые interval единиц unit до until или count раз."""
+    unit: str
+    interval: int = 1
+    until: Optional[float] = None
+    count: Optional[int] = None
+
+    def __post_init__(self):
+        if self.unit not in RECURRENCE_UNITS or self.interval < 1:
+            raise ValueError(f"Некорректное правило повторения: {self.interval}{self.unit}")
+
+    @property
+    def rule(self) -> str:
+        """Компактная запись правила для хранения: «1d», «8h», «2w»."""
+        return f"{self.interval}{self.unit}"
+
+    @classmethod
+    def from_rule(cls, rule: str, until: Optional[float] = None, count: Optional[int] = None) -> "Recurrence":
+        return cls(unit=rule[-1], interval=int(rule[:-1]), until=until, count=count)
+
+    def shift(self, timestamp: float, steps: int) -> float:
+        """Время через steps повторений после timestamp."""
+        delta = timedelta(**{RECURRENCE_UNITS[self.unit]: self.interval * steps})
+        if self.unit == "h":
+            return timestamp + delta.total_seconds()
+        return (datetime.fromtimestamp(timestamp) + delta).timestamp()
+
+    def describe(self) -> str:
+        """Описание правила для ответа пользователю."""
+        forms = {"h": ("час", "часа", "часов"), "d": ("день", "дня", "дней"), "w": ("неделю", "недели", "недель")}
+        if self.interval == 1:
+            return {"h": "каждый час", "d": "каждый день", "w": "каждую неделю"}[self.unit]
+        n = self.interval
+        form = forms[self.unit][0 if n % 10 == 1 and n % 100 != 11 else 1 if 2 <= n % 10 <= 4 and not 12 <= n % 100 <= 14 else 2]
+        return f"{'каждый' if form == forms[self.unit][0] else 'каждые'} {n} {form}"
+
+
+@dataclass
+class ScheduledReminder:
+    """Одно уведомление напоминания.
+
+    Для повторяющегося уведомления rule, until и remaining описывают оставшуюся
+    часть серии; remaining включает текущее наступление.
+    """
+    user_id: int
+    message: str
+    reminder_type: str
+    stage: str
+    event_at: float
+    fire_at: float
+    id: Optional[int] = None
+    rule: Optional[str] = None
+    until: Optional[float] = None
+    remaining: Optional[int] = None
+
+    @property
+    def recurrence(self) -> Optional[Recurrence]:
+        return Recurrence.from_rule(self.rule, self.until, self.remaining) if self.rule else None
+
+    def advance(self, after: float) -> bool:
+        """Переносит уведомление на первое наступление позже after.
+
+        Пропущенные наступления расходуют remaining. Возвращает False, если серия закончилась.
+        """
+        recurrence = self.recurrence
+        if recurrence is None:
+            return False
+        # Оценка числа шагов по средней длине периода, затем уточнение по календарю
+        period = timedelta(**{RECURRENCE_UNITS[recurrence.unit]: recurrence.interval}).total_seconds()
+        steps = max(1, int((after - self.fire_at) // period) + 1)
+        fire_at = recurrence.shift(self.fire_at, steps)
+        while fire_at <= after:
+            steps += 1
+            fire_at = recurrence.shift(self.fire_at, steps)
+        event_at = recurrence.shift(self.event_at, steps)
+        if self.remaining is not None and self.remaining - steps <= 0:
+            return False
+        if self.until is not None and event_at > self.until:
+            return False
+        self.fire_at, self.event_at = fire_at, event_at
+        if self.remaining is not None:
+            self.remaining -= steps
+        return True
+
+
+class ReminderStore:
+    """Таблица уведомлений в SQLite с частичным индексом по времени срабатывания."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Обращения идут из потоков asyncio.to_thread, поэтому соединение общее под блокировкой
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _init_db(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS reminders (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                message TEXT NOT NULL,
+                reminder_type TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                event_at REAL NOT NULL,
+                fire_at REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                created_at REAL NOT NULL,
+                sent_at REAL,
+                rule TEXT,
+                until REAL,
+                remaining INTEGER
+            )
+            """)
+            # Базы, созданные до появления повторяющихся напоминаний
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(reminders)")}
+            for column, column_type in (("rule", "TEXT"), ("until", "REAL"), ("remaining", "INTEGER")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE reminders ADD COLUMN {column} {column_type}")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_reminders_pending ON reminders(fire_at) WHERE status = 'pending'"
+            )
+
+    def add(self, reminders: Iterable[ScheduledReminder]) -> List[ScheduledReminder]:
+        """Сохраняет уведомления одной транзакцией и проставляет им id."""
+        reminders = list(reminders)
+        now = time.time()
+        with self._lock, self._conn:
+            for reminder in reminders:
+                cursor = self._conn.execute(
+                    "INSERT INTO reminders (user_id, message, reminder_type, stage, event_at, fire_at, created_at, "
+                    "rule, until, remaining) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (reminder.user_id, reminder.message, reminder.reminder_type, reminder.stage,
+                     reminder.event_at, reminder.fire_at, now, reminder.rule, reminder.until, reminder.remaining),
+                )
+                reminder.id = cursor.lastrowid
+        return reminders
+
+    def due_between(self, start: float, stop: float) -> List[Tuple[float, int]]:
+        """Возвращает (fire_at, id) ожидающих уведомлений с fire_at в [start, stop)."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT fire_at, id FROM reminders WHERE status = 'pending' AND fire_at >= ? AND fire_at < ?",
+                (start, stop),
+            ).fetchall()
+
+    def get_many(self, ids: List[int]) -> List[ScheduledReminder]:
+        """Загружает ожидающие уведомления по id."""
+        result = []
+        with self._lock:
+            for offset in range(0, len(ids), _SQL_BATCH):
+                chunk = ids[offset:offset + _SQL_BATCH]
+                rows = self._conn.execute(
+                    "SELECT user_id, message, reminder_type, stage, event_at, fire_at, id, rule, until, remaining "
+                    "FROM reminders "
+                    f"WHERE status = 'pending' AND id IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                result.extend(ScheduledReminder(*row) for row in rows)
+        return result
+
+    def mark(self, ids: List[int], status: str) -> None:
+        """Переводит уведомления в конечный статус."""
+        now = time.time()
+        with self._lock, self._conn:
+            for offset in range(0, len(ids), _SQL_BATCH):
+                chunk = ids[offset:offset + _SQL_BATCH]
+                self._conn.execute(
+                    f"UPDATE reminders SET status = ?, sent_at = ? WHERE id IN ({','.join('?' * len(chunk))})",
+                    [status, now, *chunk],
+                )
+
+    def reschedule(self, reminders: List[ScheduledReminder]) -> None:
+        """Сохраняет следующее наступление повторяющихся уведомлений."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE reminders SET fire_at = ?, event_at = ?, remaining = ? WHERE id = ?",
+                [(reminder.fire_at, reminder.event_at, reminder.remaining, reminder.id)
+                 for reminder in reminders],
+            )
+
+    def overdue_recurring(self, now: float) -> List[ScheduledReminder]:
+        """Возвращает повторяющиеся уведомления, срок которых прошел."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user_id, message, reminder_type, stage, event_at, fire_at, id, rule, until, remaining "
+                "FROM reminders WHERE status = 'pending' AND fire_at < ? AND rule IS NOT NULL",
+                (now,),
+            ).fetchall()
+        return [ScheduledReminder(*row) for row in rows]
+
+    def expire(self, fired_before: float, now: float) -> int:
+        """Помечает устаревшими слишком старые разовые уведомления и предупреждения о прошедших событиях."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE reminders SET status = ? WHERE status = 'pending' AND fire_at < ? AND rule IS NULL "
+                "AND (fire_at < ? OR (stage != ? AND event_at <= ?))",
+                (STATUS_EXPIRED, now, fired_before, STAGE_MAIN, now),
+            )
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Возвращает количество уведомлений по статусам."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM reminders GROUP BY status").fetchall())
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ReminderScheduler:
+    """Единственный цикл отправки напоминаний вместо отдельной задачи на каждое напоминание."""
+
+    def __init__(
+        self,
+        store: ReminderStore,
+        send: Callable[[ScheduledReminder], Awaitable[Any]],
+        horizon: float = 3600.0,
+        catchup_window: float = 12 * 3600,
+        batch_size: int = 500,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Инициализация диспетчера.
+
+        Args:
+            store (ReminderStore): Хранилище уведомлений.
+            send (Callable): Отправка одного уведомления: возвращает корутину или future
+                (например, DeliveryQueue.enqueue). Диспетчер не ждет доставки, результат
+                учитывается по завершении.
+            horizon (float): Окно в секундах, уведомления которого держатся в памяти.
+            catchup_window (float): Максимальное опоздание, с которым пропущенное уведомление еще отправляется.
+            batch_size (int): Сколько наступивших уведомлений обрабатывается за одну итерацию.
+            clock (Callable): Источник текущего времени (unix-время).
+        """
+        self.store = store
+        self.send = send
+        self.horizon = horizon
+        self.catchup_window = catchup_window
+        self.batch_size = batch_size
+        self.clock = clock
+        self._heap: List[Tuple[float, int]] = []
+        self._queued: Set[int] = set()
+        self._loaded_until = 0.0
+        # Запись новых уведомлений и подгрузка окна не должны перекрываться: иначе
+        # уведомление, добавленное во время запроса окна, не попадет ни в запрос, ни в кучу
+        self._window_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # Отправки, переданные в очередь доставки, и их итоги, еще не записанные в базу
+        self._in_flight: Dict[int, asyncio.Future] = {}
+        self._settled: List[Tuple[ScheduledReminder, Optional[BaseException]]] = []
+        self.scheduled = 0
+        self.sent = 0
+        self.failed = 0
+        self.expired = 0
+        self.caught_up = 0
+        self.max_lag = 0.0
+        self._total_lag = 0.0
+
+    async def start(self) -> None:
+        """Восстанавливает ожидающие уведомления из базы и запускает цикл отправки."""
+        if self._task is not None:
+            return
+        now = self.clock()
+        self.expired += await asyncio.to_thread(self.store.expire, now - self.catchup_window, now)
+        await self._catch_up_recurring(now)
+        await self._refill(now)
+        self.caught_up = sum(1 for fire_at, _ in self._heap if fire_at <= now)
+        if self.caught_up or self.expired:
+            logger.info(f"Пропущенные напоминания: {self.caught_up} будут отправлены, {self.expired} устарели")
+        self._task = asyncio.create_task(self._run())
+
+    async def _catch_up_recurring(self, now: float) -> None:
+        """Переносит пропущенные повторы вперед: отправляется не больше одного опоздавшего.
+
+        Основное уведомление переносится на первое наступление в пределах
+        catchup_window (оно будет отправлено сразу), предупреждение — на первое
+        наступление, событие которого еще впереди.
+        """
+        moved, finished = [], []
+        for reminder in await asyncio.to_thread(self.store.overdue_recurring, now):
+            after = now - self.catchup_window if reminder.stage == STAGE_MAIN else now
+            if reminder.fire_at > after:
+                continue
+            if reminder.advance(after):
+                moved.append(reminder)
+            else:
+                finished.append(reminder.id)
+        if moved:
+            await asyncio.to_thread(self.store.reschedule, moved)
+        if finished:
+            await asyncio.to_thread(self.store.mark, finished, STATUS_EXPIRED)
+            self.expired += len(finished)
+
+    async def schedule(self, reminders: List[ScheduledReminder]) -> List[ScheduledReminder]:
+        """Сохраняет уведомления и будит диспетчер, если одно из них раньше ближайшего."""
+        async with self._window_lock:
+            saved = await asyncio.to_thread(self.store.add, reminders)
+            for reminder in saved:
+                if reminder.fire_at < self._loaded_until:
+                    self._push(reminder.fire_at, reminder.id)
+        self.scheduled += len(saved)
+        return saved
+
+    def _push(self, fire_at: float, reminder_id: int) -> None:
+        if reminder_id in self._queued:
+            return
+        if not self._heap or fire_at < self._heap[0][0]:
+            self._wakeup.set()
+        heapq.heappush(self._heap, (fire_at, reminder_id))
+        self._queued.add(reminder_id)
+
+    async def _refill(self, now: float) -> None:
+        """Подгружает из базы уведомления следующего окна."""
+        until = now + self.horizon
+        async with self._window_lock:
+            for fire_at, reminder_id in await asyncio.to_thread(self.store.due_between, self._loaded_until, until):
+                self._push(fire_at, reminder_id)
+            self._loaded_until = until
+
+    async def _run(self) -> None:
+        while True:
+            if self._settled:
+                await self._flush()
+            now = self.clock()
+            if now >= self._loaded_until:
+                await self._refill(now)
+            due = []
+            while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+                _, reminder_id = heapq.heappop(self._heap)
+                self._queued.discard(reminder_id)
+                due.append(reminder_id)
+            if due:
+                try:
+                    await self._dispatch(due)
+                except Exception as e:
+                    logger.error(f"Ошибка диспетчера напоминаний: {e}", exc_info=True)
+                    # Уведомления остались в базе со статусом pending: повторяем пачку позже,
+                    # get_many пропустит те, что успели получить конечный статус
+                    for reminder_id in due:
+                        self._push(now + _RETRY_DELAY, reminder_id)
+                continue
+
+            next_at = min(self._heap[0][0], self._loaded_until) if self._heap else self._loaded_until
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, next_at - now))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _dispatch(self, ids: List[int]) -> None:
+        """Передает наступившие уведомления отправителю, не дожидаясь доставки.
+
+        Очередь доставки отправляет не больше 30 сообщений в секунду, поэтому
+        ожидание всей пачки остановило бы диспетчер на десятки секунд. Итог каждой
+        отправки записывается в _settled из done-callback и сохраняется в _flush.
+        """
+        for reminder in await asyncio.to_thread(self.store.get_many, ids):
+            if reminder.id in self._in_flight:
+                continue
+            future = asyncio.ensure_future(self.send(reminder))
+            self._in_flight[reminder.id] = future
+            future.add_done_callback(lambda done, reminder=reminder: self._on_sent(reminder, done))
+
+    def _on_sent(self, reminder: ScheduledReminder, future: asyncio.Future) -> None:
+        self._in_flight.pop(reminder.id, None)
+        if future.cancelled():
+            # Очередь доставки остановлена: уведомление остается pending до перезапуска
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Ошибка отправки напоминания {reminder.id} пользователю {reminder.user_id}: {error}")
+            self.failed += 1
+        else:
+            lag = max(0.0, self.clock() - reminder.fire_at)
+            self._total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+            self.sent += 1
+            logger.info(f"Отправлено напоминание ({reminder.stage}) для {reminder.user_id}: {reminder.message}")
+        self._settled.append((reminder, error))
+        self._wakeup.set()
+
+    async def _flush(self) -> None:
+        """Записывает в базу итоги завершившихся отправок одной пачкой."""
+        settled, self._settled = self._settled, []
+        now = self.clock()
+        sent, failed, repeated = [], [], []
+        for reminder, error in settled:
+            # Ошибка одной отправки не прерывает серию повторов
+            if reminder.advance(now):
+                repeated.append(reminder)
+            else:
+                (failed if error is not None else sent).append(reminder.id)
+        try:
+            if sent:
+                await asyncio.to_thread(self.store.mark, sent, STATUS_SENT)
+            if failed:
+                await asyncio.to_thread(self.store.mark, failed, STATUS_FAILED)
+            if repeated:
+                await asyncio.to_thread(self.store.reschedule, repeated)
+        except Exception as e:
+            logger.error(f"Ошибка записи результатов отправки напоминаний: {e}", exc_info=True)
+            # Как и при ошибке пачки в _run: уведомления остались pending и будут повторены
+            for reminder, _ in settled:
+                self._push(now + _RETRY_DELAY, reminder.id)
+            return
+        for reminder in repeated:
+            if reminder.fire_at < self._loaded_until:
+                self._push(reminder.fire_at, reminder.id)
+
+    async def close(self) -> None:
+        """Останавливает цикл отправки; неотправленные уведомления остаются в базе."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._settled:
+            await self._flush()
+        self.store.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Возвращает счетчики диспетчера и задержку отправки."""
+        return {
+            "in_memory": len(self._heap),
+            "in_flight": len(self._in_flight),
+            "scheduled": self.scheduled,
+            "sent": self.sent,
+            "failed": self.failed,
+            "expired": self.expired,
+            "caught_up": self.caught_up,
+            "avg_lag": self._total_lag / self.sent if self.sent else 0.0,
+            "max_lag": self.max_lag,
+        }
+
+
+async def benchmark(count: int = 100_000, spread: float = 5.0, db_path: Optional[str] = None) -> Dict[str, float]:
+    """Планирует count напоминаний и сравнивает диспетчер с задачами asyncio.sleep.
+
+    Половина напоминаний назначена на ближайшие spread секунд и отправляется
+    заглушкой, остальные — на месяц вперед и остаются в базе.
+    """
+    import random
+    import tempfile
+    import tracemalloc
+
+    rng = random.Random(0)
+    directory = tempfile.TemporaryDirectory()
+    db_path = db_path or os.path.join(directory.name, "reminders.db")
+    result: Dict[str, float] = {}
+
+    tracemalloc.start()
+    tasks = [asyncio.create_task(asyncio.sleep(30 * 24 * 3600)) for _ in range(count)]
+    await asyncio.sleep(0)
+    result["tasks_memory_mb"] = tracemalloc.get_traced_memory()[0] / 2 ** 20
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    tracemalloc.stop()
+
+    async def send(reminder: ScheduledReminder) -> None:
+        pass
+
+    store = ReminderStore(db_path)
+    now = time.time()
+    reminders = [
+        ScheduledReminder(
+            user_id=rng.randrange(10_000), message="выпить таблетки", reminder_type="pills", stage=STAGE_MAIN,
+            event_at=fire_at, fire_at=fire_at,
+        )
+        for fire_at in (
+            now + 1 + rng.uniform(0, spread) if i % 2 else now + rng.uniform(3600, 30 * 24 * 3600)
+            for i in range(count)
+        )
+    ]
+    started = time.perf_counter()
+    store.add(reminders)
+    result["insert_s"] = time.perf_counter() - started
+    store.close()
+
+    tracemalloc.start()
+    scheduler = ReminderScheduler(ReminderStore(db_path), send, horizon=60.0)
+    started = time.perf_counter()
+    await scheduler.start()
+    result["startup_s"] = time.perf_counter() - started
+    result["scheduler_memory_mb"] = tracemalloc.get_traced_memory()[0] / 2 ** 20
+    tracemalloc.stop()
+
+    due = count // 2
+    while scheduler.sent + scheduler.failed < due:
+        await asyncio.sleep(0.1)
+    stats = scheduler.stats()
+    result["avg_lag_ms"] = stats["avg_lag"] * 1000
+    result["max_lag_ms"] = stats["max_lag"] * 1000
+    await scheduler.close()
+    directory.cleanup()
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Бенчмарк диспетчера напоминаний")
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--spread", type=float, default=5.0)
+    args = parser.parse_args()
+
+    result = asyncio.run(benchmark(args.count, args.spread))
+    print(f"{args.count} задач asyncio.sleep: {result['tasks_memory_mb']:.1f} МБ")
+    print(f"Запись {args.count} напоминаний: {result['insert_s']:.2f} с")
+    print(f"Запуск диспетчера: {result['startup_s']:.3f} с, {result['scheduler_memory_mb']:.1f} МБ")
+    print(f"Задержка отправки: средняя {result['avg_lag_ms']:.1f} мс, максимальная {result['max_lag_ms']:.1f} мс")
@@ -0,0 +1,290 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+from interfaces import ChatService, IntentDetector
+from integration.text_normalization import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+def _shingles(text: str) -> Set[str]:
+    """Возвращает множество символьных триграмм нормализованного текста."""
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ResponseCache:
+    """LRU-кэш ответов с TTL, индексом похожих запросов и хранением в SQLite.
+
+    Ключ — нормализованный текст запроса. Если точного совпадения нет и нечеткий
+    поиск включен, ищется самый похожий запрос по коэффициенту Жаккара символьных
+    триграмм. Похожим считается только запрос из тех же слов и чисел в другом
+    порядке: «12 недель» и «32 недели», «женщин» и «мужчин» — разные вопросы.
+
+    Асинхронный код использует aget/aput: поиск идет в памяти, а запись в SQLite
+    выполняется в пуле потоков и не блокирует цикл событий.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        ttl: float = 7 * 24 * 3600,
+        max_size: int = 1000,
+        similarity_threshold: Optional[float] = None,
+    ):
+        """Инициализация кэша.
+
+        Args:
+            db_path (Optional[str]): Путь к файлу SQLite или None для кэша только в памяти.
+            ttl (float): Время жизни записи в секундах.
+            max_size (int): Максимальное количество записей.
+            similarity_threshold (Optional[float]): Порог сходства для нечеткого поиска или None, чтобы отключить его.
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._shingle_index: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        if db_path:
+            self._init_db()
+            self._load()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+    def _init_db(self) -> None:
+        """Создает таблицу кэша, если её нет."""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """)
+
+    def _load(self) -> None:
+        """Загружает неустаревшие записи из SQLite в память."""
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM response_cache WHERE created_at < ?", (time.time() - self.ttl,))
+                rows = conn.execute(
+                    "SELECT key, response, created_at FROM response_cache ORDER BY created_at DESC LIMIT ?",
+                    (self.max_size,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка загрузки кэша ответов: {e}")
+            return
+        for key, response, created_at in reversed(rows):
+            self._store(key, response, created_at)
+        logger.info(f"Загружено {len(rows)} ответов из кэша")
+
+    def _store(self, key: str, response: str, created_at: float) -> None:
+        """Добавляет запись в память и индекс похожих запросов."""
+        if key not in self._entries and self.similarity_threshold is not None:
+            for shingle in _shingles(key):
+                self._shingle_index.setdefault(shingle, set()).add(key)
+        self._entries[key] = (response, created_at)
+        self._entries.move_to_end(key)
+
+    def _remove(self, key: str) -> None:
+        """Удаляет запись из памяти и индекса."""
+        if self._entries.pop(key, None) is None or self.similarity_threshold is None:
+            return
+        for shingle in _shingles(key):
+            keys = self._shingle_index.get(shingle)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._shingle_index[shingle]
+
+    def _delete_persisted(self, keys: List[str]) -> None:
+        if not self.db_path or not keys:
+            return
+        try:
+            with self._connect() as conn:
+                conn.executemany("DELETE FROM response_cache WHERE key = ?", [(k,) for k in keys])
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка удаления из кэша ответов: {e}")
+
+    def _persist(self, key: str, response: str, created_at: float, evicted: List[str]) -> None:
+        """Записывает ответ и удаляет вытесненные записи в SQLite."""
+        if not self.db_path:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, response, created_at) VALUES (?, ?, ?)",
+                    (key, response, created_at)
+                )
+                if evicted:
+                    conn.executemany("DELETE FROM response_cache WHERE key = ?", [(k,) for k in evicted])
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка записи в кэш ответов: {e}")
+
+    def _find_similar(self, key: str) -> Optional[str]:
+        """Ищет наиболее похожий закэшированный запрос."""
+        shingles = _shingles(key)
+        overlap: Dict[str, int] = {}
+        for shingle in shingles:
+            for candidate in self._shingle_index.get(shingle, ()):
+                overlap[candidate] = overlap.get(candidate, 0) + 1
+
+        tokens = sorted(key.split())
+        best_key, best_score = None, 0.0
+        for candidate, common in overlap.items():
+            if sorted(candidate.split()) != tokens:
+                continue
+            score = common / (len(shingles) + len(_shingles(candidate)) - common)
+            if score > best_score:
+                best_key, best_score = candidate, score
+        if best_key is not None and best_score >= self.similarity_threshold:
+            return best_key
+        return None
+
+    def _get(self, text: str) -> Tuple[Optional[str], List[str]]:
+        """Ищет ответ в памяти. Возвращает ответ и ключи устаревших записей для удаления из SQLite."""
+        key = normalize_text(text)
+        if not key:
+            return None, []
+
+        entry_key = key if key in self._entries else None
+        if entry_key is None and self.similarity_threshold is not None:
+            entry_key = self._find_similar(key)
+
+        expired = []
+        if entry_key is not None:
+            response, created_at = self._entries[entry_key]
+            if time.time() - created_at <= self.ttl:
+                self._entries.move_to_end(entry_key)
+                if entry_key == key:
+                    self.hits += 1
+                else:
+                    self.similar_hits += 1
+                return response, []
+            self._remove(entry_key)
+            expired.append(entry_key)
+
+        self.misses += 1
+        return None, expired
+
+    def _put(self, text: str, response: str) -> Optional[Tuple[str, str, float, List[str]]]:
+        """Сохраняет ответ в памяти, вытесняя давно не использованные записи.
+
+        Returns:
+            Optional[Tuple]: Аргументы для _persist или None, если запрос пустой.
+        """
+        key = normalize_text(text)
+        if not key:
+            return None
+        created_at = time.time()
+        self._store(key, response, created_at)
+
+        evicted = []
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            evicted.append(oldest)
+        return key, response, created_at, evicted
+
+    def get(self, text: str) -> Optional[str]:
+        """Возвращает закэшированный ответ на запрос или None."""
+        response, expired = self._get(text)
+        self._delete_persisted(expired)
+        return response
+
+    def put(self, text: str, response: str) -> None:
+        """Сохраняет ответ на запрос в памяти и в SQLite."""
+        record = self._put(text, response)
+        if record:
+            self._persist(*record)
+
+    async def aget(self, text: str) -> Optional[str]:
+        """Как get, но удаление устаревших записей из SQLite выполняется в пуле потоков."""
+        response, expired = self._get(text)
+        if expired and self.db_path:
+            await asyncio.to_thread(self._delete_persisted, expired)
+        return response
+
+    async def aput(self, text: str, response: str) -> None:
+        """Как put, но запись в SQLite выполняется в пуле потоков."""
+        record = self._put(text, response)
+        if record and self.db_path:
+            await asyncio.to_thread(self._persist, *record)
+
+    def stats(self) -> Dict[str, float]:
+        """Возвращает статистику попаданий в кэш."""
+        total = self.hits + self.similar_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.similar_hits) / total if total else 0.0,
+        }
+
+
+class CachingChatService(ChatService):
+    """Сервис чата, отвечающий на повторные вопросы из кэша без обращения к LLM."""
+
+    def __init__(self, chat_service: ChatService, cache: ResponseCache, error_response: Optional[str] = None):
+        """Инициализация сервиса.
+
+        Args:
+            chat_service (ChatService): Сервис, к которому идут запросы при промахе кэша.
+            cache (ResponseCache): Кэш ответов.
+            error_response (Optional[str]): Ответ-заглушка об ошибке, который не кэшируется.
+        """
+        self.chat_service = chat_service
+        self.cache = cache
+        self.error_response = error_response
+
+    async def get_response(self, prompt: str) -> str:
+        """Возвращает ответ из кэша или запрашивает его у сервиса чата."""
+        cached = await self.cache.aget(prompt)
+        if cached is not None:
+            logger.debug(f"Ответ найден в кэше для запроса: {prompt}")
+            return cached
+
+        response = await self.chat_service.get_response(prompt)
+        if response and response != self.error_response:
+            await self.cache.aput(prompt, response)
+        return response
+
+
+class CachingIntentDetector(IntentDetector):
+    """Детектор намерений, запоминающий результаты для нормализованных запросов."""
+
+    VALID_INTENTS = {"1", "2", "3", "4", "5", "6", "7", "8", "9"}
+
+    def __init__(self, intent_detector: IntentDetector, cache: ResponseCache):
+        """Инициализация детектора.
+
+        Args:
+            intent_detector (IntentDetector): Детектор, к которому идут запросы при промахе кэша.
+            cache (ResponseCache): Кэш результатов (обычно без SQLite и без нечеткого поиска).
+        """
+        self.intent_detector = intent_detector
+        self.cache = cache
+
+    async def detect(self, user_input: str) -> Optional[str]:
+        """Возвращает намерение из кэша или определяет его через вложенный детектор."""
+        cached = await self.cache.aget(user_input)
+        if cached is not None:
+            return cached
+
+        intent = await self.intent_detector.detect(user_input)
+        if intent in self.VALID_INTENTS:
+            await self.cache.aput(user_input, intent)
+        return intent
@@ -0,0 +1,254 @@
+"""Хранилища состояний пользователей для StateManager.
+
+* TTLStateManager — в памяти процесса, с TTL и ограничением числа пользователей.
+* SqliteStateManager — общий файл SQLite для нескольких процессов на одной машине.
+* RedisStateManager — любой клиент Redis-протокола (redis-py, KeyDB, Dragonfly,
+  локальная заглушка) с методами get, set(ex=) и delete.
+
+Последние два пишут каждое изменение сразу, поэтому другие процессы видят его
+при следующем чтении. Синхронные обращения к SQLite и Redis выполняются в пуле
+потоков и не блокируют цикл событий. Состояние по умолчанию (STATE_NORMAL) не
+хранится: запись о нем удаляется.
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from config import STATE_NORMAL
+from interfaces import StateManager
+
+logger = logging.getLogger(__name__)
+
+
+class TTLStateManager(StateManager):
+    """Состояния в памяти с вытеснением по TTL и по давности изменения."""
+
+    def __init__(self, ttl: float = 24 * 3600, max_size: int = 100_000):
+        """Инициализация менеджера.
+
+        Args:
+            ttl (float): Через сколько секунд без изменений состояние сбрасывается.
+            max_size (int): Максимальное количество пользователей с ненормальным состоянием.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._states: "OrderedDict[int, Tuple[int, float]]" = OrderedDict()
+        self.evicted = 0
+
+    async def get_state(self, user_id: int) -> int:
+        entry = self._states.get(user_id)
+        if entry is None:
+            return STATE_NORMAL
+        state, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._states[user_id]
+            return STATE_NORMAL
+        return state
+
+    async def set_state(self, user_id: int, state: int) -> None:
+        self._states.pop(user_id, None)
+        if state != STATE_NORMAL:
+            self._states[user_id] = (state, time.monotonic() + self.ttl)
+            while len(self._states) > self.max_size:
+                # Самая старая запись — первая: порядок вставки совпадает с порядком истечения
+                self._states.popitem(last=False)
+                self.evicted += 1
+        logger.debug(f"Установлено состояние {state} для пользователя {user_id}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"users": len(self._states), "evicted": self.evicted}
+
+
+class SharedStateManager(StateManager):
+    """Основа для внешних хранилищ: синхронные чтение и запись выполняются в пуле потоков."""
+
+    def __init__(self, ttl: float = 24 * 3600):
+        """Инициализация менеджера.
+
+        Args:
+            ttl (float): Через сколько секунд без изменений состояние сбрасывается.
+        """
+        self.ttl = ttl
+        self.reads = 0
+        self.writes = 0
+        self.errors = 0
+
+    @abstractmethod
+    def _read(self, user_id: int) -> Optional[int]:
+        """Читает состояние из хранилища."""
+
+    @abstractmethod
+    def _write(self, user_id: int, state: int) -> None:
+        """Записывает состояние или удаляет запись, если оно равно STATE_NORMAL."""
+
+    async def get_state(self, user_id: int) -> int:
+        self.reads += 1
+        try:
+            state = await asyncio.to_thread(self._read, user_id)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Ошибка чтения состояния пользователя {user_id}: {e}")
+            return STATE_NORMAL
+        return STATE_NORMAL if state is None else state
+
+    async def set_state(self, user_id: int, state: int) -> None:
+        self.writes += 1
+        try:
+            await asyncio.to_thread(self._write, user_id, state)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Ошибка записи состояния пользователя {user_id}: {e}")
+            return
+        logger.debug(f"Установлено состояние {state} для пользователя {user_id}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"reads": self.reads, "writes": self.writes, "errors": self.errors}
+
+
+class SqliteStateManager(SharedStateManager):
+    """Состояния в SQLite, общие для процессов бота на одной машине."""
+
+    def __init__(self, db_path: str, ttl: float = 24 * 3600):
+        super().__init__(ttl=ttl)
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._db_lock = threading.Lock()
+        with self._db_lock, self._conn:
+            self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS user_states (
+                user_id INTEGER PRIMARY KEY,
+                state INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """)
+            self._conn.execute("DELETE FROM user_states WHERE expires_at < ?", (time.time(),))
+
+    def _read(self, user_id: int) -> Optional[int]:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT state FROM user_states WHERE user_id = ? AND expires_at >= ?", (user_id, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def _write(self, user_id: int, state: int) -> None:
+        with self._db_lock, self._conn:
+            if state == STATE_NORMAL:
+                self._conn.execute("DELETE FROM user_states WHERE user_id = ?", (user_id,))
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO user_states (user_id, state, expires_at) VALUES (?, ?, ?)",
+                    (user_id, state, time.time() + self.ttl),
+                )
+
+    def _close(self) -> None:
+        with self._db_lock:
+            self._conn.close()
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._close)
+
+
+class RedisStateManager(SharedStateManager):
+    """Состояния в Redis или совместимом хранилище, общие для процессов на разных машинах.
+
+    TTL задается самому ключу (SET ... EX), поэтому устаревшие состояния удаляет сервер.
+    """
+
+    def __init__(self, client: Any, ttl: float = 24 * 3600, prefix: str = "bot:state:"):
+        """Инициализация менеджера.
+
+        Args:
+            client (Any): Синхронный клиент с методами get, set(ex=) и delete.
+            prefix (str): Префикс ключей.
+        """
+        super().__init__(ttl=ttl)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, user_id: int) -> str:
+        return f"{self.prefix}{user_id}"
+
+    def _read(self, user_id: int) -> Optional[int]:
+        value = self.client.get(self._key(user_id))
+        return int(value) if value is not None else None
+
+    def _write(self, user_id: int, state: int) -> None:
+        if state == STATE_NORMAL:
+            self.client.delete(self._key(user_id))
+        else:
+            self.client.set(self._key(user_id), state, ex=int(self.ttl))
+
+
+class LocalRedis:
+    """Минимальная замена клиента Redis в памяти процесса для разработки и бенчмарка."""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self.round_trips = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        self.round_trips += 1
+        value = self._data.get(key)
+        if value is None:
+            return None
+        if value[1] is not None and value[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return value[0]
+
+    def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        self.round_trips += 1
+        self._data[key] = (str(value).encode(), time.monotonic() + ex if ex else None)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        self.round_trips += 1
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+
+def benchmark(operations: int = 20_000, users: int = 10_000) -> Dict[str, Dict[str, float]]:
+    """Сравнивает скорость get/set разных хранилищ (микросекунды на операцию)."""
+    import random
+    import tempfile
+
+    rng = random.Random(0)
+    workload = [(rng.randrange(users), rng.choice([STATE_NORMAL, 1, 2])) for _ in range(operations)]
+
+    async def run(manager: StateManager) -> float:
+        started = time.perf_counter()
+        for user_id, state in workload:
+            await manager.set_state(user_id, state)
+            await manager.get_state(user_id)
+        elapsed = time.perf_counter() - started
+        await manager.close()
+        return elapsed
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        local_redis = LocalRedis()
+        managers = {
+            "memory": TTLStateManager(max_size=users),
+            "sqlite": SqliteStateManager(os.path.join(directory, "states.db")),
+            "redis (локальная заглушка)": RedisStateManager(local_redis),
+        }
+        for name, manager in managers.items():
+            elapsed = asyncio.run(run(manager))
+            results[name] = {"us_per_op": elapsed / (2 * operations) * 1e6, **manager.stats()}
+        results["redis (локальная заглушка)"]["round_trips"] = local_redis.round_trips
+    return results
+
+
+if __name__ == "__main__":
+    for name, result in benchmark().items():
+        print(f"{name:<28} " + ", ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                                         for key, value in result.items()))
@@ -0,0 +1,15 @@
+import re
+
+_NON_WORD_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    """Приводит текст к канонической форме для сравнения и кэширования.
+
+    Нижний регистр, замена "ё" на "е", удаление пунктуации и схлопывание пробелов.
+    """
+    if not text:
+        return ""
+    text = text.lower().replace("ё", "е")
+    text = _NON_WORD_RE.sub(" ", text)
+    return " ".join(text.split())
@@ -47,7 +47,7 @@ class StateManager(ABC):
     """
 
     @abstractmethod
-    def get_state(self, user_id: int) -> int:
+    async def get_state(self, user_id: int) -> int:
         """Получает текущее состояние пользователя.
 
         Args:
@@ -59,7 +59,7 @@ class StateManager(ABC):
         pass
 
     @abstractmethod
-    def set_state(self, user_id: int, state: int) -> None:
+    async def set_state(self, user_id: int, state: int) -> None:
         """Устанавливает состояние для пользователя.
 
         Args:
@@ -68,6 +68,12 @@ class StateManager(ABC):
         """
         pass
 
+    async def start(self) -> None:
+        """Запускает фоновые задачи хранилища, если они нужны."""
+
+    async def close(self) -> None:
+        """Освобождает ресурсы хранилища."""
+
 class SpeechRecognitionService(ABC):
     """Абстрактный базовый класс для сервисов распознавания речи.
 
@@ -94,17 +100,29 @@ class AnalysisProcessorService(ABC):
     """
 
     @abstractmethod
-    async def process_analysis(self, pdf_file: Union[str, io.BytesIO]) -> Optional[Dict[str, str]]:
+    async def process_analysis(self, pdf_file: Union[str, io.BytesIO], file_unique_id: Optional[str] = None) -> Optional[Dict[str, str]]:
         """Обрабатывает PDF-файл с анализами и возвращает структурированный результат.
 
         Args:
             pdf_file (Union[str, io.BytesIO]): Путь к PDF-файлу или поток BytesIO.
+            file_unique_id (Optional[str]): Постоянный идентификатор файла в Telegram для кэширования.
 
         Returns:
             Optional[Dict[str, str]]: Результат анализа (понижено/повышено/в норме, рекомендации и т.д.) или None в случае ошибки.
         """
         pass
 
+    async def get_cached_result(self, file_unique_id: str) -> Optional[Dict[str, str]]:
+        """Возвращает сохраненный результат для уже обработанного файла.
+
+        Args:
+            file_unique_id (str): Постоянный идентификатор файла в Telegram.
+
+        Returns:
+            Optional[Dict[str, str]]: Результат анализа или None, если файл еще не обрабатывался.
+        """
+        return None
+
 class BotRunner(ABC):
     """Абстрактный базовый класс для запуска бота.
 
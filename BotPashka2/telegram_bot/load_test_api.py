@@ -0,0 +1,63 @@
+"""Нагрузочный тест API: параллельные запросы к эндпоинтам и итоговая пропускная способность.
+
+Запуск (API должно быть запущено):
+    python load_test_api.py --url http://127.0.0.1:8000 --concurrency 50 --requests 1000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import aiohttp
+
+ENDPOINTS = ["/faq", "/faq/1", "/contacts", "/price", "/price/specialties", "/recomendation", "/schedule"]
+
+
+async def run_endpoint(session: aiohttp.ClientSession, url: str, total: int, concurrency: int) -> dict:
+    """Отправляет total запросов на url не более чем по concurrency одновременно."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one_request():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                async with session.get(url) as response:
+                    await response.read()
+                    if response.status >= 400:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+async def main(base_url: str, concurrency: int, total: int) -> None:
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        for endpoint in ENDPOINTS:
+            result = await run_endpoint(session, f"{base_url}{endpoint}", total, concurrency)
+            print(
+                f"{endpoint:<20} {result['rps']:8.1f} запр/с  "
+                f"p50 {result['p50_ms']:7.1f} мс  p95 {result['p95_ms']:7.1f} мс  ошибок {result['errors']}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Нагрузочный тест API клиники")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.concurrency, args.requests))
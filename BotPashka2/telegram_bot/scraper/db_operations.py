@@ -1,15 +1,48 @@
 # scraper/db_operations.py
+import asyncio
+import functools
 import sqlite3
 import os
-from typing import Optional, List, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, List, Tuple
 import logging
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 logger = logging.getLogger(__name__)
 
+# Параметры, применяемые один раз к каждому новому соединению пула
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "cache_size": -8000,  # ~8 МБ страничного кэша
+    "mmap_size": 64 * 1024 * 1024,
+}
+
+# Время последней успешной синхронизации каждой таблицы, даже если строки не изменились
+SYNC_STATE_SQL = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    table_name TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL
+)
+"""
+
 class DatabaseManager:
-    def __init__(self, db_path: str):
+    """Менеджер SQLite с пулом соединений по одному на поток.
+
+    Соединение открывается при первом обращении из потока и переиспользуется,
+    PRAGMA применяются один раз, а подготовленные выражения кэшируются sqlite3.
+    """
+
+    def __init__(self, db_path: str, pragmas: Optional[Dict[str, Any]] = None, cached_statements: int = 128):
         self.db_path = db_path
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
         self._ensure_db_directory()
         
     def _ensure_db_directory(self):
@@ -17,25 +50,57 @@ class DatabaseManager:
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         
     def get_connection(self) -> Optional[sqlite3.Connection]:
-        try:
-            conn = sqlite3.connect(self.db_path)
-            conn.execute("PRAGMA journal_mode=WAL")
-            conn.execute("PRAGMA foreign_keys=ON")
+        """Возвращает соединение текущего потока, открывая его при необходимости."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
             return conn
+        try:
+            # Соединение используется только своим потоком; check_same_thread
+            # отключен, чтобы close_all мог закрыть его из любого потока.
+            conn = sqlite3.connect(self.db_path, cached_statements=self.cached_statements, check_same_thread=False)
+            for name, value in self.pragmas.items():
+                conn.execute(f"PRAGMA {name}={value}")
         except sqlite3.Error as e:
             logger.error(f"DB connection error: {e}")
             return None
+        self._local.conn = conn
+        with self._lock:
+            self._connections.append(conn)
+        return conn
 
-    def is_data_fresh(self, max_age_hours: int = 24) -> bool:
-        """Проверяет, актуальны ли данные в БД"""
-        query = "SELECT MAX(last_updated) FROM services"
-        result = self.fetch_one(query)
-        
-        if not result or not result[0]:
+    def close_all(self) -> None:
+        """Закрывает все соединения пула."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Ошибка при закрытии соединения: {e}")
+        self._local = threading.local()
+
+    def last_synced(self, table_name: str) -> Optional[float]:
+        """Возвращает время (Unix) последней успешной синхронизации таблицы (sync_table или mark_synced)."""
+        if not self.execute_query(SYNC_STATE_SQL, commit=True):
+            return None
+        result = self.fetch_one("SELECT synced_at FROM sync_state WHERE table_name = ?", (table_name,))
+        return result[0] if result else None
+
+    def mark_synced(self, table_name: str) -> bool:
+        """Записывает успешную проверку таблицы без изменения строк (страница не менялась)."""
+        if not self.execute_query(SYNC_STATE_SQL, commit=True):
             return False
-            
-        last_updated = datetime.strptime(result[0], "%Y-%m-%d %H:%M:%S")
-        return datetime.now() - last_updated < timedelta(hours=max_age_hours)
+        return self.execute_query(
+            "INSERT OR REPLACE INTO sync_state (table_name, synced_at) VALUES (?, ?)",
+            (table_name, time.time()), commit=True
+        )
+
+    def is_data_fresh(self, max_age_hours: int = 24, table_name: str = "services") -> bool:
+        """Проверяет, синхронизировалась ли таблица за последние max_age_hours часов."""
+        synced_at = self.last_synced(table_name)
+        if synced_at is None:
+            return False
+        return time.time() - synced_at < timedelta(hours=max_age_hours).total_seconds()
 
     def create_table(self, create_table_sql: str):
         """Создает таблицу в базе данных."""
@@ -52,8 +117,6 @@ class DatabaseManager:
             logger.error(f"Ошибка при создании таблицы: {e}")
             conn.rollback()
             return False
-        finally:
-            conn.close()
 
     def execute_query(self, query: str, params: Tuple = (), commit: bool = False) -> bool:
         """Выполняет SQL-запрос с параметрами."""
@@ -66,13 +129,14 @@ class DatabaseManager:
             cursor.execute(query, params)
             if commit:
                 conn.commit()
+            elif conn.in_transaction:
+                # Соединение переиспользуется: незафиксированные изменения не должны оставаться открытыми
+                conn.rollback()
             return True
         except sqlite3.Error as e:
             logger.error(f"Ошибка при выполнении запроса: {e}")
             conn.rollback()
             return False
-        finally:
-            conn.close()
 
     def execute_many(self, query: str, data: List[Tuple]) -> bool:
         """Выполняет массовую вставку данных."""
@@ -89,8 +153,18 @@ class DatabaseManager:
             logger.error(f"Ошибка при массовой вставке данных: {e}")
             conn.rollback()
             return False
-        finally:
-            conn.close()
+
+    def fetch_one(self, query: str, params: Tuple = ()) -> Optional[Tuple]:
+        """Выполняет запрос на выборку и возвращает первую строку."""
+        conn = self.get_connection()
+        if not conn:
+            return None
+            
+        try:
+            return conn.execute(query, params).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка при получении данных: {e}")
+            return None
 
     def fetch_all(self, query: str, params: Tuple = ()) -> List[Tuple]:
         """Выполняет запрос на выборку и возвращает все результаты."""
@@ -105,9 +179,155 @@ class DatabaseManager:
         except sqlite3.Error as e:
             logger.error(f"Ошибка при получении данных: {e}")
             return []
-        finally:
-            conn.close()
+
+    def get_columns(self, table_name: str) -> List[str]:
+        """Возвращает список колонок таблицы."""
+        return [row[1] for row in self.fetch_all(f"PRAGMA table_info({table_name})")]
+
+    def add_column_if_missing(self, table_name: str, column: str, definition: str) -> bool:
+        """Добавляет колонку в существующую таблицу, если её еще нет."""
+        if column in self.get_columns(table_name):
+            return True
+        logger.info(f"Добавляем колонку {column} в таблицу {table_name}")
+        return self.execute_query(f"ALTER TABLE {table_name} ADD COLUMN {column} {definition}", commit=True)
+
+    def has_rows(self, table_name: str) -> bool:
+        """Проверяет, есть ли в таблице хотя бы одна запись."""
+        return self.fetch_one(f"SELECT 1 FROM {table_name} LIMIT 1") is not None
+
+    def sync_table(
+        self,
+        table_name: str,
+        key_columns: List[str],
+        value_columns: List[str],
+        rows: List[Tuple],
+        timestamp_column: Optional[str] = None,
+    ) -> Optional[Dict[str, int]]:
+        """Приводит таблицу к переданному набору строк, меняя только отличающиеся записи.
+
+        Строки сопоставляются по естественному ключу; новые добавляются, измененные
+        обновляются, отсутствующие удаляются. Все изменения применяются в одной
+        транзакции, поэтому читатели видят либо старые, либо новые данные целиком.
+        Время синхронизации записывается в sync_state, даже если строки не изменились.
+
+        Args:
+            table_name (str): Имя таблицы.
+            key_columns (List[str]): Колонки естественного ключа.
+            value_columns (List[str]): Остальные сохраняемые колонки.
+            rows (List[Tuple]): Строки в порядке key_columns + value_columns.
+            timestamp_column (Optional[str]): Колонка времени, обновляемая у измененных строк.
+
+        Returns:
+            Optional[Dict[str, int]]: Количество добавленных, обновленных, удаленных
+            и неизменных строк или None при ошибке.
+        """
+        key_size = len(key_columns)
+        incoming = {}
+        for row in rows:
+            incoming[tuple(row[:key_size])] = tuple(row[key_size:])
+
+        conn = self.get_connection()
+        if not conn:
+            return None
+
+        columns = ", ".join(key_columns + value_columns)
+        assignments = [f"{column} = ?" for column in value_columns]
+        if timestamp_column:
+            assignments.append(f"{timestamp_column} = CURRENT_TIMESTAMP")
+
+        try:
+            conn.execute(SYNC_STATE_SQL)
+            conn.execute("BEGIN IMMEDIATE")
+            seen = set()
+            to_update, to_delete = [], []
+            for rowid, *values in conn.execute(f"SELECT rowid, {columns} FROM {table_name}"):
+                key = tuple(values[:key_size])
+                if key not in incoming or key in seen:
+                    to_delete.append((rowid,))
+                    continue
+                seen.add(key)
+                if tuple(values[key_size:]) != incoming[key]:
+                    to_update.append(incoming[key] + (rowid,))
+            to_insert = [key + values for key, values in incoming.items() if key not in seen]
+
+            if to_delete:
+                conn.executemany(f"DELETE FROM {table_name} WHERE rowid = ?", to_delete)
+            if to_update and assignments:
+                conn.executemany(f"UPDATE {table_name} SET {', '.join(assignments)} WHERE rowid = ?", to_update)
+            if to_insert:
+                placeholders = ", ".join("?" for _ in key_columns + value_columns)
+                conn.executemany(f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})", to_insert)
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (table_name, synced_at) VALUES (?, ?)",
+                (table_name, time.time())
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка синхронизации таблицы {table_name}: {e}")
+            if conn.in_transaction:
+                conn.rollback()
+            return None
+
+        return {
+            "added": len(to_insert),
+            "updated": len(to_update),
+            "removed": len(to_delete),
+            "unchanged": len(seen) - len(to_update),
+        }
 
     def clear_table(self, table_name: str) -> bool:
         """Очищает указанную таблицу."""
-        return self.execute_query(f"DELETE FROM {table_name}", commit=True)
\ No newline at end of file
+        return self.execute_query(f"DELETE FROM {table_name}", commit=True)
+
+
+
+class AsyncDatabaseExecutor:
+    """Выделенный пул потоков для синхронных функций работы с SQLite.
+
+    Асинхронный код вызывает run(), и запрос выполняется в одном из потоков пула,
+    не блокируя цикл событий. Каждый поток держит свои соединения DatabaseManager.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Выполняет func(*args, **kwargs) в пуле потоков БД."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        """Останавливает пул, дожидаясь завершения запросов."""
+        self._executor.shutdown(wait=True)
+
+def benchmark(db_path: str, iterations: int = 2000) -> Dict[str, float]:
+    """Сравнивает накладные расходы на запрос: новое соединение на каждый вызов против пула."""
+
+    def fresh_query():
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            return conn.execute("SELECT 1").fetchall()
+        finally:
+            conn.close()
+
+    manager = DatabaseManager(db_path)
+    results = {}
+    for name, func in (("fresh_connection", fresh_query), ("pooled", lambda: manager.fetch_all("SELECT 1"))):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        results[name] = (time.perf_counter() - started) / iterations * 1e6
+    manager.close_all()
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    for name, microseconds in benchmark(path).items():
+        print(f"{name}: {microseconds:.1f} мкс на запрос")
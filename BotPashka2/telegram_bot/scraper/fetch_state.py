@@ -0,0 +1,58 @@
+import os
+import logging
+from dataclasses import dataclass
+from typing import Optional
+from .db_operations import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "..", "data_base", "scraper_state.db")
+
+
+@dataclass
+class FetchState:
+    """Валидаторы последней успешно обработанной версии страницы."""
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+
+
+class FetchStateStore:
+    """Хранит ETag, Last-Modified и хэш содержимого для каждого адреса скраперов."""
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_manager = DatabaseManager(db_path)
+
+    def init_db(self) -> bool:
+        """Создает таблицу состояния загрузок."""
+        create_table_sql = """
+        CREATE TABLE IF NOT EXISTS fetch_state (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            content_hash TEXT NOT NULL,
+            last_checked TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+        return self.db_manager.create_table(create_table_sql)
+
+    def get(self, url: str) -> Optional[FetchState]:
+        """Возвращает сохраненное состояние адреса или None."""
+        row = self.db_manager.fetch_one(
+            "SELECT etag, last_modified, content_hash FROM fetch_state WHERE url = ?", (url,)
+        )
+        if row is None:
+            return None
+        return FetchState(url=url, etag=row[0], last_modified=row[1], content_hash=row[2])
+
+    def save(self, state: FetchState) -> bool:
+        """Запоминает валидаторы страницы и время проверки после обработки или подтверждения, что она не изменилась."""
+        return self.db_manager.execute_query(
+            """
+            INSERT OR REPLACE INTO fetch_state (url, etag, last_modified, content_hash, last_checked)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """,
+            (state.url, state.etag, state.last_modified, state.content_hash),
+            commit=True
+        )
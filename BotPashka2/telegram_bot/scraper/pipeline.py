@@ -0,0 +1,270 @@
+import asyncio
+import functools
+import hashlib
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from http_client import HttpClient
+from . import scraper_contacts, scraper_price, scraper_recomendation, scraper_working_hours
+from .fetch_state import FetchState, FetchStateStore
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+
+CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+
+
+@dataclass
+class FetchResult:
+    """Результат загрузки адреса; body равен None, если сервер ответил 304."""
+    state: FetchState
+    body: Optional[bytes]
+    changed: bool
+    content_type: Optional[str] = None
+
+
+@dataclass
+class ScrapeSource:
+    """Набор данных сайта клиники: откуда скачивать, как разбирать и куда сохранять."""
+    name: str
+    urls: List[str]
+    parse: Callable[[List[FetchResult]], Any]
+    save: Callable[[Any], bool]
+    is_fresh: Callable[[], bool]
+    has_data: Callable[[], bool]
+    mark_synced: Callable[[], bool]
+
+
+def _html(result: FetchResult) -> str:
+    """Декодирует страницу в кодировке из Content-Type или <meta charset>, по умолчанию UTF-8."""
+    candidates = []
+    header_match = CHARSET_RE.search(result.content_type or "")
+    if header_match:
+        candidates.append(header_match.group(1))
+    # Объявление кодировки должно быть в первых 1024 байтах документа
+    meta_match = META_CHARSET_RE.search(result.body[:1024])
+    if meta_match:
+        candidates.append(meta_match.group(1).decode("ascii"))
+    for charset in candidates:
+        try:
+            return result.body.decode(charset, errors="replace")
+        except LookupError:
+            logger.warning(f"Неизвестная кодировка {charset} у {result.state.url}")
+    return result.body.decode("utf-8", errors="replace")
+
+
+SOURCES = [
+    ScrapeSource(
+        name="contacts",
+        urls=[scraper_contacts.URL],
+        parse=lambda results: scraper_contacts.parse_contacts(_html(results[0])),
+        save=scraper_contacts.save_contacts_to_db,
+        is_fresh=scraper_contacts.is_data_fresh,
+        has_data=functools.partial(scraper_contacts.db_manager.has_rows, "addresses"),
+        mark_synced=functools.partial(scraper_contacts.db_manager.mark_synced, "addresses"),
+    ),
+    ScrapeSource(
+        name="price",
+        urls=[scraper_price.URL],
+        parse=lambda results: scraper_price.parse_prices(results[0].body),
+        save=scraper_price.save_prices_to_db,
+        is_fresh=scraper_price.db_manager.is_data_fresh,
+        has_data=functools.partial(scraper_price.db_manager.has_rows, "services"),
+        mark_synced=functools.partial(scraper_price.db_manager.mark_synced, "services"),
+    ),
+    ScrapeSource(
+        name="recomendation",
+        urls=[scraper_recomendation.URL_RECOMMENDATIONS, scraper_recomendation.URL_ADDITIONAL_RECOMMENDATIONS],
+        parse=lambda results: scraper_recomendation.parse_recommendations([_html(result) for result in results]),
+        save=scraper_recomendation.save_recommendations_to_db,
+        is_fresh=scraper_recomendation.is_data_fresh,
+        has_data=functools.partial(scraper_recomendation.db_manager.has_rows, "analysis_recommendations"),
+        mark_synced=functools.partial(scraper_recomendation.db_manager.mark_synced, "analysis_recommendations"),
+    ),
+    ScrapeSource(
+        name="schedule",
+        urls=[scraper_working_hours.URL],
+        parse=lambda results: scraper_working_hours.parse_working_hours(_html(results[0])),
+        save=scraper_working_hours.save_schedule_to_db,
+        is_fresh=scraper_working_hours.is_schedule_fresh,
+        has_data=functools.partial(scraper_working_hours.db_manager.has_rows, "schedule"),
+        mark_synced=functools.partial(scraper_working_hours.db_manager.mark_synced, "schedule"),
+    ),
+]
+
+
+class ScrapePipeline:
+    """Общий асинхронный конвейер скраперов.
+
+    Все страницы и PDF-прейскурант скачиваются одновременно через один пул соединений
+    с лимитом на хост, после чего разбор и запись в БД выполняются в потоках
+    существующими функциями скраперов. Полное обновление занимает примерно
+    столько, сколько самая медленная загрузка.
+
+    Запросы условные (If-None-Match / If-Modified-Since): если сервер ответил 304
+    или хэш содержимого не изменился, разбор и запись в БД пропускаются.
+    """
+
+    def __init__(
+        self,
+        sources: Optional[List[ScrapeSource]] = None,
+        http_client: Optional[HttpClient] = None,
+        state_store: Optional[FetchStateStore] = None,
+    ):
+        """Инициализация конвейера.
+
+        Args:
+            sources (Optional[List[ScrapeSource]]): Наборы данных; по умолчанию все скраперы клиники.
+            http_client (Optional[HttpClient]): HTTP-клиент с пулом соединений.
+            state_store (Optional[FetchStateStore]): Хранилище валидаторов загруженных страниц.
+        """
+        self.sources = {source.name: source for source in (sources or SOURCES)}
+        self.http_client = http_client or HttpClient(limit_per_host=4)
+        self.state_store = state_store or FetchStateStore()
+        self.fetch_durations: Dict[str, float] = {}
+        self.last_refresh_duration: Optional[float] = None
+        self.counters = {"not_modified": 0, "unchanged": 0, "downloaded": 0, "skipped": 0, "parsed": 0}
+
+    def init_db(self) -> bool:
+        return self.state_store.init_db()
+
+    async def fetch(self, url: str, conditional: bool = True) -> FetchResult:
+        """Скачивает страницу или файл, по возможности условным запросом.
+
+        Args:
+            url (str): Адрес страницы.
+            conditional (bool): Передавать ли сохраненные валидаторы.
+
+        Raises:
+            HttpError: При сетевой ошибке или неуспешном статусе.
+        """
+        previous = await asyncio.to_thread(self.state_store.get, url) if conditional else None
+        headers = dict(HEADERS)
+        if previous is not None:
+            if previous.etag:
+                headers["If-None-Match"] = previous.etag
+            if previous.last_modified:
+                headers["If-Modified-Since"] = previous.last_modified
+
+        started = time.perf_counter()
+        response = await self.http_client.get(url, headers=headers)
+        self.fetch_durations[url] = time.perf_counter() - started
+        if response.status == 304 and previous is not None:
+            self.counters["not_modified"] += 1
+            return FetchResult(state=previous, body=None, changed=False)
+
+        response.raise_for_status()
+        content_hash = hashlib.sha256(response.body).hexdigest()
+        changed = previous is None or previous.content_hash != content_hash
+        self.counters["downloaded" if changed else "unchanged"] += 1
+        state = FetchState(
+            url=url,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            content_hash=content_hash,
+        )
+        return FetchResult(
+            state=state, body=response.body, changed=changed, content_type=response.headers.get("Content-Type")
+        )
+
+    async def run_source(self, name: str, force_update: bool = False) -> bool:
+        """Обновляет один набор данных: загрузка, разбор и сохранение.
+
+        Args:
+            name (str): Имя набора данных.
+            force_update (bool): Обновить, даже если данные в БД актуальны.
+        """
+        source = self.sources[name]
+        if not force_update and await asyncio.to_thread(source.is_fresh):
+            logger.info(f"Данные {name} в БД актуальны, пропускаем сканирование")
+            return True
+
+        # Пустую таблицу нужно заполнить, даже если страницы не менялись
+        conditional = await asyncio.to_thread(source.has_data)
+        results = await asyncio.gather(*(self.fetch(url, conditional) for url in source.urls))
+        if conditional and not any(result.changed for result in results):
+            self.counters["skipped"] += 1
+            logger.info(f"Страницы {name} не изменились, разбор пропущен")
+            # Сервер мог выдать новые ETag/Last-Modified для того же содержимого: запоминаем их и время проверки
+            for result in results:
+                await asyncio.to_thread(self.state_store.save, result.state)
+            # Данные в БД подтверждены сайтом: без отметки is_fresh считал бы их устаревшими
+            # и каждый запуск снова скачивал бы страницы
+            await asyncio.to_thread(source.mark_synced)
+            return True
+
+        # Изменилась только часть страниц: тела ответов 304 загружаем заново
+        missing = [i for i, result in enumerate(results) if result.body is None]
+        if missing:
+            refetched = await asyncio.gather(*(self.fetch(results[i].state.url, conditional=False) for i in missing))
+            for i, result in zip(missing, refetched):
+                results[i] = result
+        data = await asyncio.to_thread(source.parse, results)
+        if not data:
+            logger.warning(f"Скрапер {name} не нашел данных")
+            return False
+        if not await asyncio.to_thread(source.save, data):
+            return False
+
+        self.counters["parsed"] += 1
+        # Валидаторы сохраняются только после успешной записи, иначе неудачный разбор не повторится
+        for result in results:
+            await asyncio.to_thread(self.state_store.save, result.state)
+        return True
+
+    async def refresh_all(self, force_update: bool = False) -> Dict[str, bool]:
+        """Обновляет все наборы данных одновременно."""
+        started = time.perf_counter()
+        names = list(self.sources)
+        results = await asyncio.gather(
+            *(self.run_source(name, force_update) for name in names), return_exceptions=True
+        )
+        self.last_refresh_duration = time.perf_counter() - started
+
+        summary = {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error(f"Ошибка обновления {name}: {result}")
+                result = False
+            summary[name] = result
+        return summary
+
+    async def close(self) -> None:
+        await self.http_client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Возвращает длительность последних загрузок и полного обновления."""
+        return {
+            **self.counters,
+            "fetch_durations": dict(self.fetch_durations),
+            "last_refresh_duration": self.last_refresh_duration,
+            "http": self.http_client.stats(),
+        }
+
+
+async def _main() -> None:
+    for source_module in (scraper_contacts, scraper_price, scraper_recomendation, scraper_working_hours):
+        source_module.init_db()
+    pipeline = ScrapePipeline()
+    pipeline.init_db()
+    try:
+        results = await pipeline.refresh_all(force_update=True)
+    finally:
+        await pipeline.close()
+
+    for name, success in results.items():
+        print(f"{name:<15} {'успешно' if success else 'ошибка'}")
+    for url, duration in pipeline.fetch_durations.items():
+        print(f"{duration:6.2f} с  {url}")
+    print(f"Полное обновление: {pipeline.last_refresh_duration:.2f} с")
+    print(f"Пропущено: {pipeline.counters['skipped']}, разобрано заново: {pipeline.counters['parsed']}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
@@ -0,0 +1,190 @@
+import io
+import logging
+import multiprocessing
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+import pdfplumber
+from .specialty import clean_specialty, specialty_slug
+
+logger = logging.getLogger(__name__)
+
+# Строка, после которой в прейскуранте идут выезды на дом — дальше не разбираем
+STOP_MARKER = "выезды на дом"
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+PRICE_RE = re.compile(r'(\d[\d\s:]*[\d.,]+)\s?r?u?b?\.?$', re.IGNORECASE)
+APPOINTMENT_TYPE_PATTERNS = {
+    'повторный': re.compile(r'повторн\w+', re.IGNORECASE),
+    'первичный': re.compile(r'первичн\w+', re.IGNORECASE),
+    'профилактический': re.compile(r'профилактич\w+', re.IGNORECASE),
+}
+DOCTOR_SPECIALTY_PATTERNS = [
+    re.compile(r'врача\s*-\s*детского\s+([а-яё-]+)', re.IGNORECASE),
+    re.compile(r'врача\s*-\s*([а-яё-]+\s[а-яё-]+)', re.IGNORECASE),
+    re.compile(r'врача\s+([а-яё-]+)(?:\s|$)', re.IGNORECASE),
+    re.compile(r'врача\s*-\s*([а-яё-]+)', re.IGNORECASE),
+]
+SPECIALTY_SUFFIX_RE = re.compile(r'(повторн\w+|первичn\w+|планов\w+|консультац\w+|\d+).*$', re.IGNORECASE)
+BRACKETS_RE = re.compile(r'[()]')
+
+# PDF, открытый в процессе-обработчике пула (задается инициализатором)
+_worker_pdf = None
+
+
+def extract_appointment_type(service_name: str) -> str:
+    """Определяет тип приема (первичный, повторный, профилактический)."""
+    for app_type, pattern in APPOINTMENT_TYPE_PATTERNS.items():
+        if pattern.search(service_name):
+            return app_type
+    return 'не указано'
+
+
+def extract_doctor_specialty(service_name: str) -> Optional[str]:
+    """Определяет специальность врача из названия услуги."""
+    for pattern in DOCTOR_SPECIALTY_PATTERNS:
+        match = pattern.search(service_name)
+        if match:
+            specialty = match.group(1).strip()
+            if 'детского' in service_name.lower():
+                return f"детский {specialty}".capitalize()
+            specialty = SPECIALTY_SUFFIX_RE.sub('', specialty)
+            specialty = BRACKETS_RE.sub('', specialty)
+            specialty = specialty.replace('-', ' ').strip()
+            return specialty.capitalize() if specialty else None
+    return None
+
+
+def parse_price_line(line: str) -> Optional[Tuple]:
+    """Разбирает строку прейскуранта с приемом врача в кортеж услуги."""
+    parts = line.split()
+    service_name = " ".join(parts[2:])
+    price_match = PRICE_RE.search(service_name)
+    if not price_match:
+        return None
+
+    price = price_match.group(1).replace(' ', '').replace(':', '').replace(',', '.')
+    service_name_clean = service_name[:price_match.start()].strip()
+    doctor_specialty = extract_doctor_specialty(service_name_clean)
+    appointment_type = extract_appointment_type(service_name_clean)
+    specialty_name = clean_specialty(doctor_specialty)
+    return (
+        service_name_clean,
+        doctor_specialty,
+        appointment_type,
+        float(price),
+        specialty_name,
+        specialty_slug(specialty_name)
+    )
+
+
+def parse_page(pdf, index: int) -> Tuple[List[Tuple], bool]:
+    """Разбирает одну страницу PDF.
+
+    Returns:
+        Tuple[List[Tuple], bool]: Найденные услуги и признак того, что на странице встретился STOP_MARKER.
+    """
+    text = pdf.pages[index].extract_text()
+    services = []
+    if not text:
+        return services, False
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        lowered = line.lower()
+        if STOP_MARKER in lowered:
+            return services, True
+        if "прием" in lowered:
+            service = parse_price_line(line)
+            if service:
+                services.append(service)
+    return services, False
+
+
+def _init_worker(pdf_content: bytes) -> None:
+    """Открывает PDF один раз на процесс пула."""
+    global _worker_pdf
+    _worker_pdf = pdfplumber.open(io.BytesIO(pdf_content))
+
+
+def _parse_page_in_worker(index: int) -> Tuple[List[Tuple], bool]:
+    return parse_page(_worker_pdf, index)
+
+
+def iter_prices(pdf_content: bytes, workers: int = DEFAULT_WORKERS) -> Iterator[Tuple]:
+    """Лениво отдает услуги из PDF-прейскуранта в порядке страниц.
+
+    Страницы разбираются в пуле процессов, но одновременно в работе не больше
+    workers страниц: как только встречается STOP_MARKER, оставшиеся страницы
+    не извлекаются.
+
+    Args:
+        pdf_content (bytes): Содержимое PDF.
+        workers (int): Количество процессов; 1 — разбор в текущем процессе.
+    """
+    with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
+        page_count = len(pdf.pages)
+        workers = min(workers, page_count)
+        if workers <= 1:
+            for index in range(page_count):
+                services, stop = parse_page(pdf, index)
+                yield from services
+                if stop:
+                    return
+            return
+
+    # spawn: API работает с потоками, а fork многопоточного процесса небезопасен
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(pdf_content,)
+    ) as executor:
+        pending = deque()
+        next_page = 0
+        while next_page < page_count and len(pending) < workers:
+            pending.append(executor.submit(_parse_page_in_worker, next_page))
+            next_page += 1
+
+        while pending:
+            services, stop = pending.popleft().result()
+            yield from services
+            if stop:
+                for future in pending:
+                    future.cancel()
+                logger.debug(f"Найдено окончание прейскуранта, разобрано страниц: {next_page - len(pending)} из {page_count}")
+                return
+            if next_page < page_count:
+                pending.append(executor.submit(_parse_page_in_worker, next_page))
+                next_page += 1
+
+
+def benchmark(pdf_path: str, iterations: int = 3, workers: int = DEFAULT_WORKERS) -> dict:
+    """Сравнивает разбор прейскуранта в одном процессе и в пуле процессов."""
+    with open(pdf_path, "rb") as f:
+        pdf_content = f.read()
+
+    results = {}
+    for label, worker_count in (("single", 1), ("pool", workers)):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            services = list(iter_prices(pdf_content, worker_count))
+        results[label] = (time.perf_counter() - started) / iterations
+        results[f"{label}_services"] = len(services)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Бенчмарк разбора PDF-прейскуранта")
+    parser.add_argument("pdf_path", help="Локальная копия 1DP.pdf")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    result = benchmark(args.pdf_path, args.iterations, args.workers)
+    print(f"Один процесс: {result['single']:.2f} с, услуг: {result['single_services']}")
+    print(f"Пул из {args.workers} процессов: {result['pool']:.2f} с, услуг: {result['pool_services']}")
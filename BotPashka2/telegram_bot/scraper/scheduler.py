@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScrapeJob:
+    """Задача обновления одного набора данных и статистика её запусков."""
+    name: str
+    func: Callable[..., Any]
+    interval: float
+    runs: int = 0
+    failures: int = 0
+    last_started: Optional[datetime] = None
+    last_finished: Optional[datetime] = None
+    last_duration: Optional[float] = None
+    last_success: Optional[bool] = None
+    last_error: Optional[str] = None
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    inflight: Optional[asyncio.Task] = None
+    loop_task: Optional[asyncio.Task] = None
+
+
+class ScraperScheduler:
+    """Планировщик фонового обновления данных скраперами.
+
+    Каждый набор данных обновляется по своему интервалу. Одновременные запросы
+    на обновление одного набора объединяются (single-flight): пока скрапер работает,
+    все вызовы ждут тот же запуск, а не стартуют новый.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, ScrapeJob] = {}
+
+    def add_job(self, name: str, func: Callable[..., Any], interval: float) -> None:
+        """Регистрирует задачу.
+
+        Args:
+            name (str): Имя набора данных.
+            func (Callable[..., Any]): Функция скрапера с параметром force_update: синхронная
+                выполняется в отдельном потоке, асинхронная — в цикле событий.
+            interval (float): Интервал принудительного обновления в секундах.
+        """
+        self._jobs[name] = ScrapeJob(name=name, func=func, interval=interval)
+
+    async def run_job(self, name: str, force_update: bool = False) -> bool:
+        """Запускает скрапер или присоединяется к уже идущему запуску."""
+        job = self._jobs[name]
+        if job.inflight is None or job.inflight.done():
+            job.inflight = asyncio.create_task(self._execute(job, force_update))
+        return await asyncio.shield(job.inflight)
+
+    async def _execute(self, job: ScrapeJob, force_update: bool) -> bool:
+        """Выполняет скрапер и записывает результат."""
+        job.runs += 1
+        job.last_started = datetime.now()
+        started = time.perf_counter()
+        success = False
+        error = None
+        try:
+            if asyncio.iscoroutinefunction(job.func):
+                success = bool(await job.func(force_update=force_update))
+            else:
+                success = bool(await asyncio.to_thread(job.func, force_update=force_update))
+            if not success:
+                error = "скрапер не вернул данные"
+        except Exception as e:
+            error = str(e)
+            logger.error(f"Ошибка обновления {job.name}: {e}", exc_info=True)
+
+        job.last_duration = time.perf_counter() - started
+        job.last_finished = datetime.now()
+        job.last_success = success
+        job.last_error = error
+        if not success:
+            job.failures += 1
+        logger.info(f"Обновление {job.name}: {'успешно' if success else 'ошибка'} за {job.last_duration:.1f} с")
+        return success
+
+    async def _job_loop(self, job: ScrapeJob) -> None:
+        """Цикл задачи: первый запуск только при устаревших данных, далее — по интервалу."""
+        force_update = False
+        while True:
+            await self.run_job(job.name, force_update=force_update)
+            try:
+                await asyncio.wait_for(job.wakeup.wait(), timeout=job.interval)
+                # Внеочередной запуск (например, таблица пуста): скрапер сам проверит актуальность
+                force_update = False
+            except asyncio.TimeoutError:
+                force_update = True
+            job.wakeup.clear()
+
+    def trigger(self, name: str) -> None:
+        """Просит обновить набор данных, не дожидаясь интервала."""
+        job = self._jobs.get(name)
+        if job is not None:
+            job.wakeup.set()
+
+    def start(self) -> None:
+        """Запускает циклы всех задач в текущем цикле событий."""
+        for job in self._jobs.values():
+            if job.loop_task is None or job.loop_task.done():
+                job.loop_task = asyncio.create_task(self._job_loop(job))
+
+    async def stop(self) -> None:
+        """Останавливает циклы задач."""
+        tasks = [job.loop_task for job in self._jobs.values() if job.loop_task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in self._jobs.values():
+            job.loop_task = None
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Возвращает состояние и статистику всех задач."""
+        result = {}
+        for name, job in self._jobs.items():
+            result[name] = {
+                "interval": job.interval,
+                "running": job.inflight is not None and not job.inflight.done(),
+                "runs": job.runs,
+                "failures": job.failures,
+                "last_started": job.last_started.isoformat() if job.last_started else None,
+                "last_finished": job.last_finished.isoformat() if job.last_finished else None,
+                "last_duration": job.last_duration,
+                "last_success": job.last_success,
+                "last_error": job.last_error,
+            }
+        return result
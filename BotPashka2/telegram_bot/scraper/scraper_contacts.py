@@ -31,14 +31,8 @@ def create_addresses_table() -> bool:
     return db_manager.create_table(create_table_sql)
 
 def is_data_fresh() -> bool:
-    """Проверяет, актуальны ли данные в таблице."""
-    query = """
-    SELECT MAX(last_updated) FROM addresses
-    """
-    result = db_manager.fetch_all(query)
-    if result and result[0][0]:
-        return True  # Здесь можно добавить проверку на дату
-    return False
+    """Проверяет, синхронизировались ли адреса за последние сутки."""
+    return db_manager.is_data_fresh(table_name="addresses")
 
 def get_contacts_from_db() -> list[tuple]:
     """Получает контакты из базы данных."""
@@ -57,25 +51,28 @@ def check_if_fresh(last_updated: str, freshness_days: int = 1) -> bool:
         logger.error("Ошибка при разборе даты из БД")
         return False
     
+def parse_contacts(html: str) -> list[str]:
+    """Извлекает адреса из HTML главной страницы сайта."""
+    soup = BeautifulSoup(html, 'html.parser')
+    address_blocks = set()
+
+    for td in soup.find_all('td'):
+        if 'Адрес' in td.get_text():
+            parts = [clean_text(element.get_text()) for element in td.children if element.name == 'p']
+            full_text = ' '.join(parts)
+            if full_text:
+                address_blocks.add(full_text)
+    
+    logger.info(f"Найдено {len(address_blocks)} адресов")
+    return list(address_blocks)
+
 def get_contacts() -> list[str]:
     """Скрапит контакты (адреса) с сайта и возвращает список строк-адресов."""
     try:
         logger.info(f"Загружаем страницу {URL}")
         response = requests.get(URL, headers={'User-Agent': 'Mozilla/5.0'})
         response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-        address_blocks = set()
-
-        for td in soup.find_all('td'):
-            if 'Адрес' in td.get_text():
-                parts = [clean_text(element.get_text()) for element in td.children if element.name == 'p']
-                full_text = ' '.join(parts)
-                if full_text:
-                    address_blocks.add(full_text)
-        
-        logger.info(f"Найдено {len(address_blocks)} адресов")
-        return list(address_blocks)
+        return parse_contacts(response.text)
     
     except requests.RequestException as e:
         logger.error(f"Ошибка при запросе: {e}")
@@ -91,17 +88,13 @@ def save_contacts_to_db(addresses: list[str]) -> bool:
         return False
     
     try:
-        if not db_manager.clear_table("addresses"):
-            return False
-        
-        insert_sql = """
-        INSERT INTO addresses (address)
-        VALUES (?)
-        """
-        if not db_manager.execute_many(insert_sql, [(addr,) for addr in addresses]):
+        changes = db_manager.sync_table(
+            "addresses", ["address"], [], [(addr,) for addr in addresses], timestamp_column="last_updated"
+        )
+        if changes is None:
             return False
         
-        logger.info(f"Успешно сохранено {len(addresses)} адресов в БД")
+        logger.info(f"Успешно сохранено {len(addresses)} адресов в БД: {changes}")
         return True
     except Exception as e:
         logger.error(f"Ошибка при сохранении в БД: {e}")
@@ -1,72 +1,25 @@
 # main.py
 import os
-from typing import List, Optional, Tuple
+from typing import List, Tuple
 import requests
-import pdfplumber
-import io
-import re
 import logging
 from .db_operations import DatabaseManager
+from .price_parser import DEFAULT_WORKERS, iter_prices
+from .specialty import clean_specialty, specialty_slug
 
 # Настройка логгирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Константы
-DATABASE = "data_base/price.db"
 URL = "https://clinica.chitgma.ru/images/Preyskurant/2025/1DP.pdf"
-# Добавьте в начало файла
 DB_PATH = os.path.join(os.path.dirname(__file__), "..", "data_base", "price.db")
-db_manager = DatabaseManager(DB_PATH)
 
-# Обновите функцию run_price_scraper
-def run_price_scraper(force_update: bool = False) -> bool:
-    """Запускает скрапер только если данные устарели или принудительно"""
-    if not force_update and db_manager.is_data_fresh():
-        logger.info("Данные в БД актуальны, пропускаем сканирование")
-        return True
-        
-    services = get_prices()
-    if services:
-        return save_prices_to_db(services)
-    return False
 # Инициализация менеджера базы данных
-db_manager = DatabaseManager(DATABASE)
-
-def extract_appointment_type(service_name: str) -> str:
-    """Определяет тип приема (первичный, повторный, профилактический)."""
-    patterns = {
-        'повторный': r'повторн\w+',
-        'первичный': r'первичн\w+',
-        'профилактический': r'профилактич\w+',
-    }
-    for app_type, pattern in patterns.items():
-        if re.search(pattern, service_name, re.IGNORECASE):
-            return app_type
-    return 'не указано'
-
-def extract_doctor_specialty(service_name: str) -> Optional[str]:
-    """Определяет специальность врача из названия услуги."""
-    patterns = [
-        r'врача\s*-\s*детского\s+([а-яё-]+)',
-        r'врача\s*-\s*([а-яё-]+\s[а-яё-]+)',
-        r'врача\s+([а-яё-]+)(?:\s|$)',
-        r'врача\s*-\s*([а-яё-]+)'
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, service_name, re.IGNORECASE)
-        if match:
-            specialty = match.group(1).strip()
-            if 'детского' in service_name.lower():
-                return f"детский {specialty}".capitalize()
-            specialty = re.sub(r'(повторн\w+|первичn\w+|планов\w+|консультац\w+|\d+).*$', '', specialty, flags=re.IGNORECASE)
-            specialty = re.sub(r'[()]', '', specialty)
-            specialty = specialty.replace('-', ' ').strip()
-            return specialty.capitalize() if specialty else None
-    return None
+db_manager = DatabaseManager(DB_PATH)
 
 def create_services_table():
-    """Создает таблицу услуг в базе данных."""
+    """Создает таблицу услуг и индекс по slug специальности."""
     create_table_sql = """
     CREATE TABLE IF NOT EXISTS services (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -74,10 +27,45 @@ def create_services_table():
         doctor_specialty TEXT,
         appointment_type TEXT,
         price REAL NOT NULL,
+        specialty_name TEXT,
+        specialty_slug TEXT,
         last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     );
     """
-    return db_manager.create_table(create_table_sql)
+    if not db_manager.create_table(create_table_sql):
+        return False
+
+    # Миграция таблиц, созданных до появления колонок специальности
+    if not (db_manager.add_column_if_missing("services", "specialty_name", "TEXT")
+            and db_manager.add_column_if_missing("services", "specialty_slug", "TEXT")):
+        return False
+    if not backfill_specialty_columns():
+        return False
+
+    return db_manager.execute_query(
+        "CREATE INDEX IF NOT EXISTS idx_services_specialty_slug ON services (specialty_slug)",
+        commit=True
+    )
+
+def backfill_specialty_columns() -> bool:
+    """Заполняет название и slug специальности для строк, сохраненных без них."""
+    rows = db_manager.fetch_all("SELECT id, doctor_specialty FROM services WHERE specialty_slug IS NULL")
+    if not rows:
+        return True
+    updates = []
+    for row_id, doctor_specialty in rows:
+        name = clean_specialty(doctor_specialty)
+        updates.append((name, specialty_slug(name), row_id))
+    logger.info(f"Заполняем специальности для {len(updates)} услуг")
+    return db_manager.execute_many(
+        "UPDATE services SET specialty_name = ?, specialty_slug = ? WHERE id = ?", updates
+    )
+
+def parse_prices(pdf_content: bytes, workers: int = DEFAULT_WORKERS) -> List[Tuple]:
+    """Парсит цены из PDF-прейскуранта и возвращает список услуг."""
+    services = list(iter_prices(pdf_content, workers))
+    logger.info(f"Найдено {len(services)} услуг")
+    return services
 
 def get_prices() -> List[Tuple]:
     """Скачивает PDF и парсит цены, возвращая список услуг."""
@@ -85,45 +73,7 @@ def get_prices() -> List[Tuple]:
         logger.info(f"Начинаем загрузку PDF с {URL}")
         response = requests.get(URL, timeout=30)
         response.raise_for_status()
-
-        pdf_file = io.BytesIO(response.content)
-        services = []
-        stop_parsing = False
-
-        with pdfplumber.open(pdf_file) as pdf:
-            for page in pdf.pages:
-                if stop_parsing:
-                    break
-                text = page.extract_text()
-                if text:
-                    for line in text.split("\n"):
-                        line = line.strip()
-                        if not line:
-                            continue
-                        if "выезды на дом" in line.lower():
-                            stop_parsing = True
-                            break
-                        if "прием" in line.lower():
-                            parts = line.split()
-                            service_name = " ".join(parts[2:])
-                            price_match = re.search(r'(\d[\d\s:]*[\d.,]+)\s?r?u?b?\.?$', service_name, re.IGNORECASE)
-
-                            if price_match:
-                                price = price_match.group(1).replace(' ', '').replace(':', '').replace(',', '.')
-                                service_name_clean = service_name[:price_match.start()].strip()
-                                doctor_specialty = extract_doctor_specialty(service_name_clean)
-                                appointment_type = extract_appointment_type(service_name_clean)
-
-                                services.append((
-                                    service_name_clean, 
-                                    doctor_specialty, 
-                                    appointment_type, 
-                                    float(price)
-                                ))
-                                logger.debug(f"Найдена услуга: {service_name_clean}")
-
-        logger.info(f"Найдено {len(services)} услуг")
-        return services
+        return parse_prices(response.content)
 
     except requests.RequestException as e:
         logger.error(f"Ошибка при загрузке PDF: {e}")
@@ -139,27 +89,30 @@ def save_prices_to_db(services: List[Tuple]) -> bool:
         return False
 
     try:
-        # Очищаем старые данные
-        if not db_manager.clear_table("services"):
-            return False
-            
-        # Вставляем новые данные
-        insert_sql = """
-        INSERT INTO services (service_name, doctor_specialty, appointment_type, price)
-        VALUES (?, ?, ?, ?)
-        """
-        if not db_manager.execute_many(insert_sql, services):
+        # Меняем только отличающиеся строки, сопоставляя услуги по названию и специальности
+        changes = db_manager.sync_table(
+            "services",
+            ["service_name", "doctor_specialty"],
+            ["appointment_type", "price", "specialty_name", "specialty_slug"],
+            services,
+            timestamp_column="last_updated"
+        )
+        if changes is None:
             return False
             
-        logger.info(f"Успешно сохранено {len(services)} услуг в БД")
+        logger.info(f"Успешно сохранено {len(services)} услуг в БД: {changes}")
         return True
         
     except Exception as e:
         logger.error(f"Критическая ошибка при сохранении в БД: {e}")
         return False
 
-def run_price_scraper() -> bool:
-    """Запускает процесс парсинга и сохранения услуг."""
+def run_price_scraper(force_update: bool = False) -> bool:
+    """Запускает процесс парсинга и сохранения услуг, если данные устарели или принудительно."""
+    if not force_update and db_manager.is_data_fresh():
+        logger.info("Данные в БД актуальны, пропускаем сканирование")
+        return True
+
     services = get_prices()
     if services:
         return save_prices_to_db(services)
@@ -168,12 +121,32 @@ def run_price_scraper() -> bool:
 def get_prices_from_db() -> List[Tuple]:
     """Получает список услуг из базы данных."""
     query = """
-    SELECT service_name, doctor_specialty, appointment_type, price
+    SELECT service_name, doctor_specialty, appointment_type, price, specialty_name, specialty_slug
     FROM services
     ORDER BY doctor_specialty, service_name
     """
     return db_manager.fetch_all(query)
 
+def get_specialties_from_db() -> List[Tuple]:
+    """Получает список специальностей: slug, название и количество услуг."""
+    query = """
+    SELECT specialty_slug, specialty_name, COUNT(*)
+    FROM services
+    GROUP BY specialty_slug, specialty_name
+    ORDER BY specialty_name
+    """
+    return db_manager.fetch_all(query)
+
+def get_prices_by_specialty_from_db(slug: str) -> List[Tuple]:
+    """Получает услуги одной специальности по slug (использует индекс)."""
+    query = """
+    SELECT service_name, doctor_specialty, appointment_type, price, specialty_name, specialty_slug
+    FROM services
+    WHERE specialty_slug = ?
+    ORDER BY service_name
+    """
+    return db_manager.fetch_all(query, (slug,))
+
 def init_db():
     """Инициализирует базу данных."""
     return create_services_table()
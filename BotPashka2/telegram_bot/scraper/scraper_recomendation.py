@@ -70,16 +70,23 @@ def extract_recommendations_list(parent_element) -> str:
     recommendations = [li.get_text(strip=True) for li in next_node.find_all('li', recursive=False)]
     return "\n".join(recommendations)
 
+def parse_recommendations(pages: list[str]) -> list[tuple[str, str]]:
+    """Парсит рекомендации из HTML нескольких страниц и убирает дубликаты."""
+    recommendations = []
+    for html in pages:
+        soup = BeautifulSoup(html, 'html.parser')
+        recommendations.extend(extract_recommendations(soup))
+    return list(set(recommendations))
+
 def get_recommendations() -> list[tuple[str, str]]:
     """Скачивает рекомендации с сайта и парсит их."""
     try:
-        recommendations = []
+        pages = []
         for url in [URL_RECOMMENDATIONS, URL_ADDITIONAL_RECOMMENDATIONS]:
             response = requests.get(url, headers=HEADERS, timeout=30)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            recommendations.extend(extract_recommendations(soup))
-        return list(set(recommendations))
+            pages.append(response.text)
+        return parse_recommendations(pages)
     except requests.RequestException as e:
         logger.error(f"Ошибка при запросе: {e}")
         return []
@@ -93,40 +100,27 @@ def save_recommendations_to_db(recommendations):
         logger.warning("Попытка сохранить пустой список рекомендаций")
         return False
     try:
-        if not db_manager.clear_table("analysis_recommendations"):
-            return False
-        insert_sql = """
-        INSERT INTO analysis_recommendations (analysis_type, recommendations)
-        VALUES (?, ?)
-        """
-        if not db_manager.execute_many(insert_sql, recommendations):
+        changes = db_manager.sync_table(
+            "analysis_recommendations", ["analysis_type"], ["recommendations"], recommendations,
+            timestamp_column="last_updated"
+        )
+        if changes is None:
             return False
-        logger.info(f"Успешно сохранено {len(recommendations)} рекомендаций в БД")
+        logger.info(f"Успешно сохранено {len(recommendations)} рекомендаций в БД: {changes}")
         return True
     except Exception as e:
         logger.error(f"Ошибка при сохранении рекомендаций в БД: {e}")
         return False
 
-from datetime import datetime, timedelta
+def is_data_fresh() -> bool:
+    """Проверяет, синхронизировались ли рекомендации за последние сутки."""
+    return db_manager.is_data_fresh(table_name="analysis_recommendations")
 
-def check_if_fresh(last_updated: str, freshness_days: int = 1) -> bool:
-    """Проверяет, являются ли данные актуальными (по умолчанию, 1 день)."""
-    try:
-        last_date = datetime.strptime(last_updated, "%Y-%m-%d %H:%M:%S")  # Подстрой формат под БД
-        return datetime.now() - last_date < timedelta(days=freshness_days)
-    except ValueError:
-        logger.error("Ошибка при разборе даты из БД")
-        return False
-    
 def run_recommendation_scraper(force_update: bool = False) -> bool:
     """Запускает процесс скрапинга и сохранения рекомендаций."""
-    if not force_update:
-        result = db_manager.fetch_all("SELECT last_updated FROM analysis_recommendations ORDER BY last_updated DESC LIMIT 1")
-        if result:  # Проверяем, есть ли данные
-            last_updated = result[0][0]  # Берем первую запись
-            if check_if_fresh(last_updated):  # Предполагается, что check_if_fresh определен
-                logger.info("Данные в БД актуальны, пропускаем сканирование")
-                return True
+    if not force_update and is_data_fresh():
+        logger.info("Данные в БД актуальны, пропускаем сканирование")
+        return True
 
     recommendations = get_recommendations()
     if recommendations:
@@ -2,7 +2,6 @@ import os
 import logging
 import requests
 from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
 from .db_operations import DatabaseManager
 
 # Настройка логирования
@@ -42,16 +41,28 @@ def get_schedule_from_db() -> list[tuple]:
         return []
 
 def is_schedule_fresh(max_age_hours: int = 24) -> bool:
-    """Проверяет, актуальны ли данные о расписании."""
-    query = """
-    SELECT MAX(last_update) FROM schedule
-    """
-    result = db_manager.fetch_all(query)
-    if not result or not result[0][0]:
-        return False
-    
-    last_update = datetime.strptime(result[0][0], "%Y-%m-%d %H:%M:%S")
-    return datetime.now() - last_update < timedelta(hours=max_age_hours)
+    """Проверяет, синхронизировалось ли расписание за последние max_age_hours часов."""
+    return db_manager.is_data_fresh(max_age_hours, table_name="schedule")
+
+def parse_working_hours(html: str) -> str:
+    """Извлекает строки расписания из HTML страницы отделения."""
+    soup = BeautifulSoup(html, 'html.parser')
+    work_hours = []
+    found = False
+
+    for p in soup.find_all('p'):
+        text = clean_schedule_text(p.get_text())
+        if 'Режим работы отделения' in text:
+            found = True
+            continue
+        if found and text:
+            work_hours.append(text)
+            if len(work_hours) == 3:  # Берем только 3 строки расписания
+                break
+
+    schedule_text = "\n".join(work_hours) if work_hours else ""
+    logger.info(f"Получено расписание: {schedule_text}")
+    return schedule_text
 
 def get_working_hours() -> str:
     """Скрапит расписание работы с сайта и возвращает строку с расписанием."""
@@ -59,24 +70,7 @@ def get_working_hours() -> str:
         logger.info(f"Загружаем страницу {URL}")
         response = requests.get(URL, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
         response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-        work_hours = []
-        found = False
-
-        for p in soup.find_all('p'):
-            text = clean_schedule_text(p.get_text())
-            if 'Режим работы отделения' in text:
-                found = True
-                continue
-            if found and text:
-                work_hours.append(text)
-                if len(work_hours) == 3:  # Берем только 3 строки расписания
-                    break
-
-        schedule_text = "\n".join(work_hours) if work_hours else ""
-        logger.info(f"Получено расписание: {schedule_text}")
-        return schedule_text
+        return parse_working_hours(response.text)
     
     except requests.RequestException as e:
         logger.error(f"Ошибка при запросе расписания: {e}")
@@ -92,17 +86,13 @@ def save_schedule_to_db(schedule_text: str) -> bool:
         return False
     
     try:
-        if not db_manager.clear_table("schedule"):
-            return False
-        
-        insert_sql = """
-        INSERT INTO schedule (hours_text)
-        VALUES (?)
-        """
-        if not db_manager.execute_query(insert_sql, (schedule_text,), commit=True):
+        changes = db_manager.sync_table(
+            "schedule", ["hours_text"], [], [(schedule_text,)], timestamp_column="last_update"
+        )
+        if changes is None:
             return False
         
-        logger.info("Расписание успешно сохранено в БД")
+        logger.info(f"Расписание успешно сохранено в БД: {changes}")
         return True
     except Exception as e:
         logger.error(f"Ошибка при сохранении расписания: {e}")
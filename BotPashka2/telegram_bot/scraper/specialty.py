@@ -0,0 +1,35 @@
+import re
+from slugify import slugify
+
+
+def clean_specialty(specialty):
+    """Удаляет стоп-слова, исправляет падеж и обрабатывает слова через дефис."""
+    if not specialty:
+        return ""
+    
+    stop_words = {"врача", "первичный", "для", "на", "по", "в", "и", "из", "с", 
+                 "медицинский", "доктор", "специалист", "прием", "осмотр", "консультация"}
+    
+    # Удаляем "врача-" в начале
+    specialty = re.sub(r'^врача[- ]?', '', specialty, flags=re.IGNORECASE)
+    
+    # Разбиваем на слова (включая слова через '-')
+    words = re.split(r'[\s\-]+', specialty.strip().lower())
+
+    # Фильтруем стоп-слова и убираем "а" на конце каждого слова
+    cleaned_words = []
+    for word in words:
+        if word not in stop_words:
+            # Удаляем окончание "а" только у существительных женского рода
+            if word.endswith('а') and len(word) > 1:
+                word = word[:-1]
+            cleaned_words.append(word.capitalize())
+
+    # Восстанавливаем дефисы между составными словами
+    result = " ".join(cleaned_words)
+    return result.replace(" - ", "-").title()
+
+
+def specialty_slug(specialty_name: str) -> str:
+    """Возвращает slug очищенного названия специальности для callback_data и поиска."""
+    return slugify(specialty_name, separator='_')
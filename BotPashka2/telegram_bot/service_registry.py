@@ -0,0 +1,117 @@
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceRegistry:
+    """Реестр сервисов с отложенной загрузкой.
+
+    Фабрика сервиса импортирует тяжелые модули внутри себя и вызывается только при
+    первом обращении или при фоновом прогреве после старта бота. Время загрузки
+    каждого сервиса сохраняется для статистики.
+
+    Из цикла событий сервис запрашивается через aget(): фабрика выполняется в
+    потоке, а одновременные запросы ждут одну загрузку на asyncio.Lock. get()
+    блокирует вызывающий поток и предназначен для фабрик и фоновых потоков.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._load_times: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._async_locks: Dict[str, asyncio.Lock] = {}
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        """Регистрирует фабрику сервиса."""
+        self._factories[name] = factory
+
+    def get(self, name: str) -> Any:
+        """Возвращает сервис, создавая его при первом обращении в текущем потоке."""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name not in self._instances:
+                started = time.perf_counter()
+                self._instances[name] = self._factories[name]()
+                self._load_times[name] = time.perf_counter() - started
+                logger.info(f"Сервис {name} загружен за {self._load_times[name]:.2f} с")
+            return self._instances[name]
+
+    async def aget(self, name: str) -> Any:
+        """Возвращает сервис, не блокируя цикл событий на время загрузки."""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        async with self._async_locks.setdefault(name, asyncio.Lock()):
+            instance = self._instances.get(name)
+            if instance is None:
+                instance = await asyncio.to_thread(self.get, name)
+            return instance
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def proxy(self, name: str) -> "LazyService":
+        """Возвращает заместителя, который загружает сервис при первом обращении к атрибуту."""
+        return LazyService(self, name)
+
+    async def warm_up(self, names: Optional[List[str]] = None) -> None:
+        """Загружает сервисы в фоновом потоке, не блокируя цикл событий."""
+        for name in names or list(self._factories):
+            if self.is_loaded(name):
+                continue
+            try:
+                await self.aget(name)
+            except Exception as e:
+                logger.error(f"Ошибка фоновой загрузки сервиса {name}: {e}", exc_info=True)
+
+    async def close(self) -> None:
+        """Вызывает close() у загруженных сервисов в порядке, обратном загрузке."""
+        for name, instance in reversed(list(self._instances.items())):
+            close = getattr(instance, "close", None)
+            if close is None:
+                continue
+            try:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Ошибка при закрытии сервиса {name}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Возвращает загруженные сервисы и время их загрузки."""
+        return {
+            "registered": list(self._factories),
+            "loaded": list(self._instances),
+            "load_times": dict(self._load_times),
+        }
+
+
+class LazyService:
+    """Заместитель сервиса из ServiceRegistry для передачи в обработчики.
+
+    Любой атрибут заместителя — асинхронная функция: она дожидается загрузки
+    сервиса через aget() и вызывает одноименный метод сервиса.
+    """
+
+    __slots__ = ("_registry", "_name")
+
+    def __init__(self, registry: ServiceRegistry, name: str):
+        self._registry = registry
+        self._name = name
+
+    def __getattr__(self, item: str) -> Callable[..., Any]:
+        async def call(*args, **kwargs) -> Any:
+            service = await self._registry.aget(self._name)
+            result = getattr(service, item)(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        return call
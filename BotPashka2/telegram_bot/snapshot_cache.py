@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+import aiohttp
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+from http_client import HttpClient, HttpError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DatasetSnapshot:
+    """Снимок набора данных API с подготовленным для бота представлением."""
+    payload: Any
+    view: Any
+    etag: Optional[str]
+    fetched_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _Dataset:
+    path: str
+    builder: Callable[[Any], Any]
+    snapshot: Optional[DatasetSnapshot] = None
+    lock: Optional[asyncio.Lock] = None
+
+
+class SnapshotCache:
+    """Кэш снимков данных API (/price, /recomendation, /contacts, /schedule) на стороне бота.
+
+    Снимок отдается из памяти, пока не истек refresh_interval; затем выполняется
+    условный запрос с If-None-Match, и при ответе 304 снимок просто продлевается.
+    Для каждого набора данных builder один раз строит индексы и клавиатуры.
+    """
+
+    def __init__(self, api_url: str, http_client: Optional[HttpClient] = None, refresh_interval: float = 60.0, timeout: float = 10.0):
+        """Инициализация кэша.
+
+        Args:
+            api_url (str): Базовый адрес API.
+            http_client (Optional[HttpClient]): Общий HTTP-клиент приложения.
+            refresh_interval (float): Сколько секунд снимок считается свежим без проверки.
+            timeout (float): Таймаут запроса к API в секундах.
+        """
+        self.api_url = api_url
+        self.http_client = http_client or HttpClient()
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self._datasets: Dict[str, _Dataset] = {}
+        self.hits = 0
+        self.not_modified = 0
+        self.reloads = 0
+
+    def register(self, name: str, path: str, builder: Callable[[Any], Any]) -> None:
+        """Регистрирует набор данных и функцию построения его представления."""
+        self._datasets[name] = _Dataset(path=path, builder=builder)
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Сбрасывает один или все снимки."""
+        for key, dataset in self._datasets.items():
+            if name is None or key == name:
+                dataset.snapshot = None
+
+    async def get(self, name: str) -> DatasetSnapshot:
+        """Возвращает актуальный снимок набора данных.
+
+        При ошибке обновления возвращается устаревший снимок, если он есть.
+
+        Raises:
+            HttpError: Если API недоступно и снимка еще нет.
+        """
+        dataset = self._datasets[name]
+        snapshot = dataset.snapshot
+        if snapshot and time.monotonic() - snapshot.fetched_at < self.refresh_interval:
+            self.hits += 1
+            return snapshot
+
+        if dataset.lock is None:
+            dataset.lock = asyncio.Lock()
+        async with dataset.lock:
+            # Пока мы ждали блокировку, снимок мог обновить другой запрос
+            snapshot = dataset.snapshot
+            if snapshot and time.monotonic() - snapshot.fetched_at < self.refresh_interval:
+                self.hits += 1
+                return snapshot
+            try:
+                dataset.snapshot = await self._refresh(dataset)
+            except HttpError as e:
+                if snapshot is None:
+                    raise
+                logger.warning(f"Не удалось обновить {dataset.path}, используем устаревшие данные: {e}")
+                snapshot.fetched_at = time.monotonic()
+            return dataset.snapshot
+
+    async def _refresh(self, dataset: _Dataset) -> DatasetSnapshot:
+        """Выполняет условный запрос к API и при изменениях перестраивает представление."""
+        headers = {}
+        if dataset.snapshot and dataset.snapshot.etag:
+            headers["If-None-Match"] = dataset.snapshot.etag
+
+        response = await self.http_client.get(
+            f"{self.api_url}{dataset.path}", headers=headers, timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        if response.status == 304 and dataset.snapshot:
+            self.not_modified += 1
+            dataset.snapshot.fetched_at = time.monotonic()
+            return dataset.snapshot
+
+        response.raise_for_status()
+        payload = response.json()
+        self.reloads += 1
+        logger.debug(f"Снимок {dataset.path} обновлен")
+        return DatasetSnapshot(payload=payload, view=dataset.builder(payload), etag=response.headers.get("ETag"))
+
+    def stats(self) -> Dict[str, int]:
+        """Возвращает статистику обращений к кэшу."""
+        return {"hits": self.hits, "not_modified": self.not_modified, "reloads": self.reloads}
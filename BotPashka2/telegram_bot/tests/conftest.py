@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Модули бота импортируются от корня telegram_bot, как при запуске tg_bot.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
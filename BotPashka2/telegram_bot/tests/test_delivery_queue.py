@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiogram")
+
+from delivery_queue import DeliveryQueue  # noqa: E402
+
+
+class HangingBot:
+    """Бот, запросы которого к Telegram не завершаются."""
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await asyncio.sleep(3600)
+
+
+def test_close_settles_every_future():
+    async def scenario():
+        queue = DeliveryQueue(HangingBot(), global_rate=1000, chat_rate=1000, chat_burst=1000, max_in_flight=10)
+        queue.start()
+        futures = [queue.enqueue(chat_id, "текст") for chat_id in range(20)]
+        await asyncio.sleep(0.01)
+        await queue.close(timeout=0.05)
+        return futures
+
+    futures = asyncio.run(scenario())
+    # Отправленные, ожидающие слота и оставшиеся в очереди сообщения отменены
+    assert all(future.cancelled() for future in futures)
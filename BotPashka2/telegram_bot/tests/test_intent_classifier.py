@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiogram")
+
+from integration.intent_classifier import FastPathIntentDetector, TrigramIntentClassifier  # noqa: E402
+
+
+class RecordingDetector:
+    """Резервный детектор, запоминающий запросы, которые дошли до LLM."""
+
+    def __init__(self, answer: str = "9"):
+        self.answer = answer
+        self.calls = []
+
+    async def detect(self, user_input: str) -> str:
+        self.calls.append(user_input)
+        return self.answer
+
+
+@pytest.fixture
+def detector():
+    return FastPathIntentDetector(RecordingDetector(), classifier=TrigramIntentClassifier())
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("/price", "2"),
+    ("сколько стоит прием", "2"),
+    ("хочу оставить отзыв", "1"),
+    ("контакты клиники", "5"),
+    ("где находится клиника", "5"),
+    ("время работы", "4"),
+    ("напомни", "7"),
+    ("установи напоминание", "7"),
+])
+def test_short_commands_use_fast_path(detector, text, intent):
+    assert asyncio.run(detector.detect(text)) == intent
+    assert detector.fallback.calls == []
+
+
+@pytest.mark.parametrize("text", [
+    "как записаться к врачу",
+    "нужно ли выпить таблетки от давления перед сдачей крови",
+    "какие правила приема антибиотиков",
+    "сколько стоит жизнь без боли, как лечить мигрень",
+    "телефон упал в воду",
+])
+def test_free_form_questions_fall_back_to_llm(detector, text):
+    assert asyncio.run(detector.detect(text)) == "9"
+    assert detector.fallback.calls == [text]
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from integration.reference_ranges import ReferenceRangeMatcher
+
+REFERENCE_RANGES_PATH = os.path.join(os.path.dirname(__file__), "..", "data_base", "reference_ranges.json")
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return ReferenceRangeMatcher.load(REFERENCE_RANGES_PATH)
+
+
+@pytest.mark.parametrize("row, expected", [
+    ("Гемоглобин в крови 13.1 Нормальный г/дл", {"Гемоглобин": 13.1}),
+    ("Тромбоциты 10^9/л 250", {"Тромбоциты": 250.0}),
+    ("Тромбоциты, 10*9/л 250 150-400", {"Тромбоциты": 250.0}),
+    ("Гемоглобин, г/дл 13,5 12,0-16,0", {"Гемоглобин": 13.5}),
+    ("Нейтрофилы 3.2 10^9/л 1.8-7.7", {"Нейтрофилы": 3.2}),
+    ("Нейтрофилы, % 65", {"Нейтрофилы относительное": 65.0}),
+    ("Нейтрофилы 65 % 47-72", {"Нейтрофилы относительное": 65.0}),
+    ("Лимфоциты относительное количество 35 %", {"Лимфоциты относительное": 35.0}),
+    ("СОЭ по Вестергрену 12 мм/ч 2-15", {"Скорость оседания эритроцитов": 12.0}),
+    ("Базофилы 0.5 ↑", {"Базофилы": 0.5}),
+])
+def test_extract_report_rows(matcher, row, expected):
+    assert matcher.extract(row) == expected
+
+
+def test_numbers_not_followed_by_unit_are_skipped(matcher):
+    text = "Гемоглобин: исследование от 12.03.2024, 2024 год\nГемоглобин 13.1 Нормальный г/дл"
+    assert matcher.extract(text) == {"Гемоглобин": 13.1}
+
+
+def test_percent_row_without_relative_parameter_is_skipped(matcher):
+    assert matcher.extract("Лейкоциты, % 65") == {}
+
+
+def test_several_parameters_in_one_row(matcher):
+    text = "Лимфоциты 2.1 Повышенный 10^9/л Лимфоциты относительное количество 35 %"
+    assert matcher.extract(text) == {"Лимфоциты": 2.1, "Лимфоциты относительное": 35.0}
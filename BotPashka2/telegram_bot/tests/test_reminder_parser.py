@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pytest
+
+from integration.reminder_parser import SAMPLES, parse_reminder_text
+
+# Суббота, полдень: «сегодня в 11:00» уже прошло, «в пятницу» — на следующей неделе
+NOW = datetime(2025, 3, 1, 12, 0)
+
+
+@pytest.mark.parametrize("text, when, message, reminder_type", [
+    ("напомни мне 31 марта в 14:00 выпить таблетки", datetime(2025, 3, 31, 14, 0), "выпить таблетки", "pills"),
+    ("напомни мне 31 марта в 14:00, что мне надо выпить таблетки", datetime(2025, 3, 31, 14, 0), "выпить таблетки", "pills"),
+    ("напомни завтра в 9 утра, что мне надо к врачу", datetime(2025, 3, 2, 9, 0), "к врачу", "doctor"),
+    ("через 2 часа напомни выпить таблетки", datetime(2025, 3, 1, 14, 0), "выпить таблетки", "pills"),
+    ("напомни через полчаса принять лекарство", datetime(2025, 3, 1, 12, 30), "принять лекарство", "pills"),
+    ("в пятницу в 18.30 запись к стоматологу", datetime(2025, 3, 7, 18, 30), "запись к стоматологу", "doctor"),
+    ("напомни 05.04 в 10:00 сдать анализы", datetime(2025, 4, 5, 10, 0), "сдать анализы", "doctor"),
+    ("напомни послезавтра в 8 вечера выпить витамины", datetime(2025, 3, 3, 20, 0), "выпить витамины", "pills"),
+    ("напомни в 21:00 выпить таблетки", datetime(2025, 3, 1, 21, 0), "выпить таблетки", "pills"),
+    ("напомни мне про прием у терапевта 12 мая в 9 часов 30 минут", datetime(2025, 5, 12, 9, 30), "про прием у терапевта", "doctor"),
+    # «1/2» без предлога — доза, а не 1 февраля; с предлогом «на» — дата
+    ("напомни в 10:00 принять 1/2 таблетки", datetime(2025, 3, 2, 10, 0), "принять 1/2 таблетки", "pills"),
+    ("напомни на 5/4 в 10:00 записаться к врачу", datetime(2025, 4, 5, 10, 0), "записаться к врачу", "doctor"),
+])
+def test_one_shot(text, when, message, reminder_type):
+    parsed = parse_reminder_text(text, NOW)
+    assert parsed is not None
+    assert (parsed.when, parsed.text, parsed.reminder_type, parsed.recurrence) == (when, message, reminder_type, None)
+
+
+@pytest.mark.parametrize("text, when, rule, until, count", [
+    ("каждый день в 9:00 выпить таблетки в течение 2 недель", datetime(2025, 3, 2, 9, 0), "1d",
+     datetime(2025, 3, 16, 8, 59, 59), None),
+    ("напоминай каждые 8 часов принять антибиотик 10 раз", datetime(2025, 3, 1, 20, 0), "8h", None, 10),
+    ("по понедельникам в 10:00 к врачу до 31 мая", datetime(2025, 3, 3, 10, 0), "1w", datetime(2025, 5, 31, 23, 59, 59), None),
+    ("каждый день в 9:00 выпить таблетки до 5 марта", datetime(2025, 3, 2, 9, 0), "1d", datetime(2025, 3, 5, 23, 59, 59), None),
+])
+def test_recurring(text, when, rule, until, count):
+    parsed = parse_reminder_text(text, NOW)
+    assert parsed is not None and parsed.recurrence is not None
+    recurrence = parsed.recurrence
+    assert parsed.when == when
+    assert recurrence.rule == rule
+    assert (datetime.fromtimestamp(recurrence.until) if recurrence.until else None) == until
+    assert recurrence.count == count
+
+
+@pytest.mark.parametrize("text, now, when", [
+    # Время сегодня уже прошло — завтра
+    ("напомни в 11:00 выпить таблетки", NOW, datetime(2025, 3, 2, 11, 0)),
+    # Дата без года уже прошла — следующий год
+    ("напомни 1 марта в 10:00 выпить таблетки", NOW, datetime(2026, 3, 1, 10, 0)),
+    # Сегодняшний день недели с прошедшим временем — через неделю
+    ("в субботу в 10:00 к врачу", NOW, datetime(2025, 3, 8, 10, 0)),
+    ("напомни в 23:30 выпить таблетки", datetime(2025, 12, 31, 23, 45), datetime(2026, 1, 1, 23, 30)),
+])
+def test_rollover(text, now, when):
+    parsed = parse_reminder_text(text, now)
+    assert parsed is not None and parsed.when == when
+
+
+@pytest.mark.parametrize("text, now", [
+    # «до 5 марта» без повторения — срок, а не дата напоминания
+    ("напомни в 14:00 до 5 марта пить витамины", NOW),
+    # 29 февраля прошло, а в следующем году его нет
+    ("напомни 29 февраля в 10:00 выпить таблетки", datetime(2024, 3, 1, 12, 0)),
+    ("напомни 31 февраля в 10:00 выпить таблетки", NOW),
+    ("напомни завтра в 25:00 выпить таблетки", NOW),
+    # Дата с годом в прошлом не переносится
+    ("напомни 1 марта 2024 года в 10:00 выпить таблетки", NOW),
+    ("через 2 часа в 15:00 выпить таблетки", NOW),
+    ("принимать 2 раза в день таблетки", NOW),
+    ("напомни выпить таблетки", NOW),
+])
+def test_falls_back_to_llm(text, now):
+    assert parse_reminder_text(text, now) is None
+
+
+def test_all_samples_parsed():
+    assert all(parse_reminder_text(sample, NOW) is not None for sample in SAMPLES)
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+from integration.reminder_scheduler import (
+    STAGE_MAIN, STATUS_FAILED, STATUS_SENT, ReminderScheduler, ReminderStore, ScheduledReminder,
+)
+
+
+class SlowDelivery:
+    """Очередь доставки, которая завершает отправки только по команде теста."""
+
+    def __init__(self):
+        self.pending = {}
+
+    def send(self, reminder):
+        future = asyncio.get_running_loop().create_future()
+        self.pending[reminder.message] = future
+        return future
+
+
+def _reminder(message, fire_at, rule=None, remaining=None):
+    return ScheduledReminder(
+        user_id=1, message=message, reminder_type="pills", stage=STAGE_MAIN,
+        event_at=fire_at, fire_at=fire_at, rule=rule, remaining=remaining,
+    )
+
+
+async def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_dispatch_does_not_wait_for_delivery(tmp_path):
+    async def scenario():
+        delivery = SlowDelivery()
+        scheduler = ReminderScheduler(ReminderStore(str(tmp_path / "reminders.db")), delivery.send)
+        await scheduler.start()
+        now = time.time()
+        await scheduler.schedule([_reminder("first", now - 1)])
+        await _wait_for(lambda: "first" in delivery.pending)
+
+        # Первая отправка еще не доставлена, а следующее уведомление уже передано в очередь
+        await scheduler.schedule([_reminder("second", now - 1), _reminder("series", now - 1, rule="1d", remaining=3)])
+        await _wait_for(lambda: {"second", "series"} <= set(delivery.pending))
+        assert scheduler.stats()["in_flight"] == 3
+
+        delivery.pending["first"].set_result(None)
+        delivery.pending["second"].set_exception(RuntimeError("chat not found"))
+        delivery.pending["series"].set_result(None)
+        await _wait_for(lambda: scheduler.sent + scheduler.failed == 3 and not scheduler._settled)
+        counts = scheduler.store.counts()
+        await scheduler.close()
+        return scheduler, counts
+
+    scheduler, counts = asyncio.run(scenario())
+    assert (scheduler.sent, scheduler.failed) == (2, 1)
+    assert counts == {STATUS_SENT: 1, STATUS_FAILED: 1, "pending": 1}
+
+
+def test_cancelled_delivery_stays_pending(tmp_path):
+    async def scenario():
+        delivery = SlowDelivery()
+        scheduler = ReminderScheduler(ReminderStore(str(tmp_path / "reminders.db")), delivery.send)
+        await scheduler.start()
+        await scheduler.schedule([_reminder("first", time.time() - 1)])
+        await _wait_for(lambda: "first" in delivery.pending)
+        delivery.pending["first"].cancel()
+        await asyncio.sleep(0.05)
+        counts = scheduler.store.counts()
+        await scheduler.close()
+        return scheduler, counts
+
+    scheduler, counts = asyncio.run(scenario())
+    assert (scheduler.sent, scheduler.failed) == (0, 0)
+    assert counts == {"pending": 1}
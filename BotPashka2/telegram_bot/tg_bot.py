@@ -1,17 +1,33 @@
 import asyncio
 import logging
-import os
+from dataclasses import dataclass, field
+from typing import Set
 from aiogram import Bot, F
 from aiogram import Dispatcher
 from aiogram.filters import Command
 from aiogram.types import BotCommand, BotCommandScopeDefault
 
 # Конфигурация и ключи API
-from config import TELEGRAM_TOKEN, DEEPGRAM_API_KEY, GIGACHAT_API_KEY
-from integration.gigachat import GigaChatService, GigaChatIntentDetector, InMemoryStateManager
-from integration.deepgram import DeepgramService
-from integration.analysis import AnalysisProcessor
+from config import (
+    TELEGRAM_TOKEN, DEEPGRAM_API_KEY, GIGACHAT_API_KEY, INTENT_CONFIDENCE_THRESHOLD, INTENT_EXAMPLES_PATH,
+    GIGACHAT_POOL_SIZE, GIGACHAT_MAX_CONCURRENCY, GIGACHAT_REQUEST_TIMEOUT,
+    RESPONSE_CACHE_DB, RESPONSE_CACHE_TTL, RESPONSE_CACHE_SIZE, RESPONSE_CACHE_SIMILARITY,
+    INTENT_CACHE_TTL, INTENT_CACHE_SIZE,
+    HTTP_POOL_LIMIT, HTTP_POOL_LIMIT_PER_HOST, HTTP_TIMEOUT, HTTP_RETRIES,
+    ANALYSIS_PDF_WORKERS, ANALYSIS_MAX_PDF_PAGES, ANALYSIS_MAX_PDF_BYTES, ANALYSIS_PDF_TIMEOUT,
+    ANALYSIS_CACHE_DB, ANALYSIS_CACHE_TTL, REMINDER_DB, REMINDER_CATCHUP_WINDOW,
+    DELIVERY_GLOBAL_RATE, DELIVERY_CHAT_RATE, DELIVERY_MAX_IN_FLIGHT, DELIVERY_MAX_RETRIES,
+    STATE_BACKEND, STATE_TTL, STATE_MAX_USERS, STATE_DB, STATE_REDIS_URL
+)
+from http_client import HttpClient
+from delivery_queue import DeliveryQueue
+from integration.gigachat_pool import GigaChatClientPool
+from integration.gigachat import GigaChatService, GigaChatIntentDetector, GIGACHAT_ERROR_RESPONSE
+from integration.response_cache import ResponseCache, CachingChatService, CachingIntentDetector
+from integration.intent_classifier import FastPathIntentDetector, TrigramIntentClassifier
 from integration.reminder import ReminderService
+from interfaces import StateManager
+from service_registry import ServiceRegistry
 # Импорт обработчиков
 from handlers import (
     TextMessageHandler, 
@@ -19,71 +35,208 @@ from handlers import (
     faq_command, operator, price_command, recomendation_callback_handler, 
     recomendation_command, start_command, help_command, schedule_command, 
     contacts_command, review, qrcode_command, unknown_command, 
-    process_specialty_selection
+    process_specialty_selection, setup_http_client
 )
 
 
-# Настройки логирования
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Инициализация бота и диспетчера
-bot = Bot(token=TELEGRAM_TOKEN)
-dp = Dispatcher()
-
-# Инициализация сервисов
-chat_service = GigaChatService()
-intent_detector = GigaChatIntentDetector(chat_service)
-state_manager = InMemoryStateManager()
-speech_service = DeepgramService(api_key=DEEPGRAM_API_KEY, bot_token=TELEGRAM_TOKEN)
-analysis_processor = AnalysisProcessor(gigachat_api_key=GIGACHAT_API_KEY)
-reminder_service = ReminderService(bot)
-
-handlers = [
-    TextMessageHandler(chat_service, intent_detector, state_manager, reminder_service),
-    VoiceMessageHandler(chat_service, intent_detector, state_manager, speech_service),
-    DocumentMessageHandler(analysis_processor),
-]
-
-for handler in handlers:
-     handler.register_handlers(dp)
-
-
-# Регистрация обработчиков сообщений и команд
-dp.callback_query.register(process_specialty_selection, lambda c: c.data.startswith("specialty_"))
-dp.callback_query.register(recomendation_callback_handler, lambda c: c.data.startswith('rec_'))
-dp.callback_query.register(faq_callback_handler, F.data.startswith("faq_"))
-
-dp.message.register(start_command, Command("start"))
-dp.message.register(help_command, Command("help"))
-dp.message.register(schedule_command, Command("schedule"))
-dp.message.register(faq_command, Command("faq"))
-dp.message.register(faq_command, F.text.in_(["FAQ", "Частые вопросы"]))
-dp.message.register(contacts_command, Command("contacts"))
-dp.message.register(price_command, Command("price"))
-dp.message.register(recomendation_command, Command("recomendation"))
-dp.message.register(operator, Command("operator"))
-dp.message.register(review, Command("review"))
-dp.message.register(qrcode_command, Command("qrcode"))
-dp.message.register(unknown_command)
-
-async def set_bot_commands():
-    commands = [
-        BotCommand(command="start", description="Главное меню"),
-        BotCommand(command="help", description="Помощь"),
-        BotCommand(command="review", description="Оставить отзыв"),
-        BotCommand(command="price", description="Узнать цены"),
-        BotCommand(command="faq", description="Частые вопросы"),
-        BotCommand(command="schedule", description="Время работы"),
-        BotCommand(command="contacts", description="Контакты клиник"),
-        BotCommand(command="recomendation", description="Рекомендации"),
-        BotCommand(command="operator", description="Связаться с оператором"),
+# Процессы пулов разбора PDF и перекодирования запускаются через spawn и заново
+# импортируют главный модуль, поэтому при импорте здесь ничего не создается:
+# бот, соединения и фоновые сервисы собираются в build_app() из main().
+
+
+def build_state_manager():
+    """Создает хранилище состояний пользователей, выбранное в STATE_BACKEND."""
+    from integration.state_store import RedisStateManager, SqliteStateManager, TTLStateManager
+    if STATE_BACKEND == "sqlite":
+        return SqliteStateManager(STATE_DB, ttl=STATE_TTL)
+    if STATE_BACKEND == "redis":
+        import redis
+        return RedisStateManager(redis.Redis.from_url(STATE_REDIS_URL), ttl=STATE_TTL)
+    return TTLStateManager(ttl=STATE_TTL, max_size=STATE_MAX_USERS)
+
+
+def build_services(http_client: HttpClient, gigachat_pool: GigaChatClientPool) -> ServiceRegistry:
+    """Регистрирует тяжелые интеграции: они загружаются при первом обращении или в фоне после старта бота."""
+    services = ServiceRegistry()
+
+    def build_speech_service():
+        from integration.deepgram import DeepgramService
+        return DeepgramService(api_key=DEEPGRAM_API_KEY, bot_token=TELEGRAM_TOKEN, http_client=http_client)
+
+    def build_pdf_extractor():
+        from integration.pdf_extraction import PdfTextExtractor
+        return PdfTextExtractor(
+            max_workers=ANALYSIS_PDF_WORKERS,
+            max_pages=ANALYSIS_MAX_PDF_PAGES,
+            max_bytes=ANALYSIS_MAX_PDF_BYTES,
+            timeout=ANALYSIS_PDF_TIMEOUT,
+        )
+
+    def build_analysis_processor():
+        from integration.analysis import AnalysisProcessor
+        from integration.analysis_cache import AnalysisCache, CachingAnalysisProcessor
+        return CachingAnalysisProcessor(
+            AnalysisProcessor(
+                gigachat_api_key=GIGACHAT_API_KEY, client_pool=gigachat_pool, pdf_extractor=services.get("pdf_extractor")
+            ),
+            AnalysisCache(ANALYSIS_CACHE_DB, ttl=ANALYSIS_CACHE_TTL),
+        )
+
+    services.register("speech", build_speech_service)
+    services.register("pdf_extractor", build_pdf_extractor)
+    services.register("analysis", build_analysis_processor)
+    return services
+
+
+@dataclass
+class BotApp:
+    """Бот, диспетчер и общие ресурсы, которые нужно запустить и закрыть."""
+    bot: Bot
+    dp: Dispatcher
+    http_client: HttpClient
+    gigachat_pool: GigaChatClientPool
+    state_manager: StateManager
+    delivery_queue: DeliveryQueue
+    reminder_service: ReminderService
+    services: ServiceRegistry
+    background_tasks: Set[asyncio.Task] = field(default_factory=set)
+
+    async def on_startup(self):
+        """Запускает очередь отправки и напоминания, прогревает отложенные сервисы в фоне."""
+        self.delivery_queue.start()
+        await self.state_manager.start()
+        await self.reminder_service.start()
+        task = asyncio.create_task(self.services.warm_up())
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+
+    async def set_bot_commands(self):
+        commands = [
+            BotCommand(command="start", description="Главное меню"),
+            BotCommand(command="help", description="Помощь"),
+            BotCommand(command="review", description="Оставить отзыв"),
+            BotCommand(command="price", description="Узнать цены"),
+            BotCommand(command="faq", description="Частые вопросы"),
+            BotCommand(command="schedule", description="Время работы"),
+            BotCommand(command="contacts", description="Контакты клиник"),
+            BotCommand(command="recomendation", description="Рекомендации"),
+            BotCommand(command="operator", description="Связаться с оператором"),
+        ]
+        await self.bot.set_my_commands(commands, scope=BotCommandScopeDefault())
+
+    async def close(self):
+        await self.reminder_service.close()
+        await self.delivery_queue.close()
+        await self.state_manager.close()
+        await self.services.close()
+        await self.gigachat_pool.close()
+        await self.http_client.close()
+
+
+def build_app() -> BotApp:
+    """Создает бота, сервисы и регистрирует обработчики."""
+    bot = Bot(token=TELEGRAM_TOKEN)
+    dp = Dispatcher()
+
+    http_client = HttpClient(
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        timeout=HTTP_TIMEOUT,
+        retries=HTTP_RETRIES,
+    )
+    setup_http_client(http_client)
+    gigachat_pool = GigaChatClientPool(
+        GIGACHAT_API_KEY,
+        size=GIGACHAT_POOL_SIZE,
+        max_concurrency=GIGACHAT_MAX_CONCURRENCY,
+        request_timeout=GIGACHAT_REQUEST_TIMEOUT,
+    )
+    chat_service = GigaChatService(gigachat_pool)
+    answer_service = CachingChatService(
+        chat_service,
+        ResponseCache(
+            RESPONSE_CACHE_DB,
+            ttl=RESPONSE_CACHE_TTL,
+            max_size=RESPONSE_CACHE_SIZE,
+            similarity_threshold=RESPONSE_CACHE_SIMILARITY,
+        ),
+        error_response=GIGACHAT_ERROR_RESPONSE,
+    )
+    intent_classifier = TrigramIntentClassifier()
+    intent_classifier.load_examples(INTENT_EXAMPLES_PATH)
+    intent_detector = FastPathIntentDetector(
+        CachingIntentDetector(
+            GigaChatIntentDetector(chat_service),
+            ResponseCache(ttl=INTENT_CACHE_TTL, max_size=INTENT_CACHE_SIZE, similarity_threshold=None),
+        ),
+        classifier=intent_classifier,
+        confidence_threshold=INTENT_CONFIDENCE_THRESHOLD,
+    )
+
+    state_manager = build_state_manager()
+    delivery_queue = DeliveryQueue(
+        bot,
+        global_rate=DELIVERY_GLOBAL_RATE,
+        chat_rate=DELIVERY_CHAT_RATE,
+        max_in_flight=DELIVERY_MAX_IN_FLIGHT,
+        max_retries=DELIVERY_MAX_RETRIES,
+    )
+    reminder_service = ReminderService(
+        bot, chat_service, db_path=REMINDER_DB, catchup_window=REMINDER_CATCHUP_WINDOW, delivery=delivery_queue
+    )
+    services = build_services(http_client, gigachat_pool)
+
+    handlers = [
+        TextMessageHandler(answer_service, intent_detector, state_manager, reminder_service),
+        VoiceMessageHandler(answer_service, intent_detector, state_manager, services.proxy("speech")),
+        DocumentMessageHandler(services.proxy("analysis")),
     ]
-    await bot.set_my_commands(commands, scope=BotCommandScopeDefault())
+    for handler in handlers:
+        handler.register_handlers(dp)
+
+    # Регистрация обработчиков сообщений и команд
+    dp.callback_query.register(process_specialty_selection, lambda c: c.data.startswith("specialty_"))
+    dp.callback_query.register(recomendation_callback_handler, lambda c: c.data.startswith('rec_'))
+    dp.callback_query.register(faq_callback_handler, F.data.startswith("faq_"))
+
+    dp.message.register(start_command, Command("start"))
+    dp.message.register(help_command, Command("help"))
+    dp.message.register(schedule_command, Command("schedule"))
+    dp.message.register(faq_command, Command("faq"))
+    dp.message.register(faq_command, F.text.in_(["FAQ", "Частые вопросы"]))
+    dp.message.register(contacts_command, Command("contacts"))
+    dp.message.register(price_command, Command("price"))
+    dp.message.register(recomendation_command, Command("recomendation"))
+    dp.message.register(operator, Command("operator"))
+    dp.message.register(review, Command("review"))
+    dp.message.register(qrcode_command, Command("qrcode"))
+    dp.message.register(unknown_command)
+
+    app = BotApp(
+        bot=bot,
+        dp=dp,
+        http_client=http_client,
+        gigachat_pool=gigachat_pool,
+        state_manager=state_manager,
+        delivery_queue=delivery_queue,
+        reminder_service=reminder_service,
+        services=services,
+    )
+    dp.startup.register(app.on_startup)
+    return app
+
 
 async def main():
-    await set_bot_commands()
-    await dp.start_polling(bot)
+    app = build_app()
+    await app.set_bot_commands()
+    try:
+        await app.dp.start_polling(app.bot)
+    finally:
+        await app.close()
 
 if __name__ == '__main__':
+    # Настройки логирования
+    logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
     asyncio.run(main())